@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'task',
     'rest_framework',
     'rest_framework_simplejwt',
@@ -55,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # першим – латентність запиту включає всі інші middleware (GET /metrics)
+    'task.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -148,8 +151,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-
+        # JWTAuthentication без SELECT з auth_user на кожен запит
+        'task.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -196,8 +199,10 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
-
+    'TOKEN_OBTAIN_SERIALIZER': 'task.authentication.ClaimsTokenObtainPairSerializer',
 }
+# Скільки секунд тримати дані користувача для токенів без claims (видані до ClaimsRefreshToken)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=60, cast=int)
 
 ASGI_APPLICATION = 'TaskMaster.asgi.application'
 
@@ -220,15 +225,55 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
 
+REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/0')
+
 # Redis як брокер та бекенд результатів
-CELERY_BROKER_URL = config('REDIS_URL', default='redis://127.0.0.1:6379/0')
-CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://127.0.0.1:6379/0')
+CELERY_BROKER_URL = REDIS_URL
+CELERY_RESULT_BACKEND = REDIS_URL
+
+# Кеш (Redis): версії дошок та серіалізовані знімки /project/<pk>/full/
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('CACHE_REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    }
+}
+
+# Скільки секунд зберігати серіалізований знімок дошки (ключ все одно змінюється з версією)
+BOARD_CACHE_TIMEOUT = config('BOARD_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+# Скільки задач на колонку віддає посторінкова дошка /project/<pk>/board/ за замовчуванням
+BOARD_TASKS_PER_COLUMN = config('BOARD_TASKS_PER_COLUMN', default=20, cast=int)
+# Скільки останніх подій дошки зберігати для resume_from (Redis stream на проєкт)
+BOARD_EVENT_LOG_MAXLEN = config('BOARD_EVENT_LOG_MAXLEN', default=1000, cast=int)
+# Вікно (мс), протягом якого події групи project_<id> збираються в один кадр; 0 – без злиття
+BOARD_EVENT_COALESCE_MS = config('BOARD_EVENT_COALESCE_MS', default=5, cast=int)
+
+# Скільки секунд зберігати закешовані відповіді списків міток/проєктів/колонок (ключ все одно змінюється з версіями тегів)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=60 * 60, cast=int)
+# Скільки секунд зберігати множину проєктів користувача (ключ все одно змінюється з версією)
+MEMBERSHIP_CACHE_TIMEOUT = config('MEMBERSHIP_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Bearer-токен для GET /metrics; порожній – ендпойнт відкритий (доступ обмежується мережею)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# На скільки підзавдань (за assigned_to_id) ділити щоденні нагадування про дедлайни
+DEADLINE_REMINDER_SHARDS = config('DEADLINE_REMINDER_SHARDS', default=8, cast=int)
+# Година (TIME_ZONE) щоденного запуску нагадувань
+DEADLINE_REMINDER_HOUR = config('DEADLINE_REMINDER_HOUR', default=9, cast=int)
+
+# Як часто (с) переносити буфер переходів задач з Redis у журнал TaskTransition
+TASK_TRANSITION_FLUSH_SECONDS = config('TASK_TRANSITION_FLUSH_SECONDS', default=5, cast=int)
 
 CELERY_BEAT_SCHEDULE = {
     # щодня о 9:00 відправляємо нагадування по задачах, дедлайн яких завтра
     'send-deadline-reminders-every-morning': {
         'task': 'task.tasks.send_deadline_reminders',
-        'schedule': crontab(hour=9, minute=0),
+        'schedule': crontab(hour=DEADLINE_REMINDER_HOUR, minute=0),
+    },
+    # пакетний запис журналу переходів задач (task.transitions)
+    'flush-task-transitions': {
+        'task': 'task.tasks.flush_task_transitions',
+        'schedule': timedelta(seconds=TASK_TRANSITION_FLUSH_SECONDS),
     },
 }
 
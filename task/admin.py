@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Task, Label, Project, Comment, Column, Invitation
+from .models import Task, Label, Project, Comment, Column, Invitation, SentReminder
 
 # Register your models here.
 admin.site.register(Task)
@@ -10,3 +10,4 @@ admin.site.register(Column)
 admin.site.register(Invitation)
 
 
+admin.site.register(SentReminder)
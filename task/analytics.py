@@ -0,0 +1,301 @@
+# file: task/analytics.py
+"""
+Аналітика проєкту з інкрементальних rollup-ів.
+
+TaskRollup зберігає агрегати задач у "кошиках" (project, column, assignee,
+is_complete, due_day): кількість задач, сума estimated_time і time_spent.
+Запис задачі (API, ProjectConsumer, адмінка – через сигнали Task) переносить
+її внесок зі старого кошика в новий у тій самій транзакції, тож дашборд
+читає сотні рядків rollup-ів замість сканування всіх задач проєкту.
+
+Старий стан задачі береться зі знімка, зробленого в Task.from_db, – без
+додаткового SELECT; для задач, завантажених частково (.only()), – одним
+запитом у pre_save.
+
+Прострочені = незавершені з due_day < сьогодні (з rollup-ів) плюс
+незавершені з дедлайном сьогодні, що вже минув (живий запит за індексом
+due_date по вузькому вікну одного дня).
+
+Перебудова з нуля та звірка з живими агрегатами – manage.py rebuild_analytics.
+"""
+
+import datetime
+
+from django.db import connection, transaction
+from django.db.models import Count, DurationField, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from django.utils.duration import duration_string
+
+from .models import TASK_ROLLUP_FIELDS as ROLLUP_FIELDS, Column, Task, TaskRollup
+from .reminders import due_window
+
+
+ZERO = datetime.timedelta(0)
+
+_ROLLUP_NAMES = {*ROLLUP_FIELDS, 'project', 'column', 'assigned_to'}
+
+
+def snapshot(task):
+    return tuple(getattr(task, field) for field in ROLLUP_FIELDS)
+
+
+def _bucket(state):
+    """(ключ кошика, (кількість, estimated, spent)) для знімка задачі."""
+    project_id, column_id, assignee_id, is_complete, due_date, estimated, spent = state
+    due_day = timezone.localdate(due_date) if due_date is not None else None
+    key = (project_id, column_id, assignee_id, is_complete, due_day)
+    return key, (1, estimated or ZERO, spent or ZERO)
+
+
+def _deltas(*changes):
+    """Сумарна різниця внесків {ключ: [кількість, estimated, spent]} для пар (старий, новий), без нульових."""
+    deltas = {}
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            key, values = _bucket(state)
+            delta = deltas.setdefault(key, [0, ZERO, ZERO])
+            for i, value in enumerate(values):
+                delta[i] += sign * value
+    return {key: delta for key, delta in deltas.items() if delta != [0, ZERO, ZERO]}
+
+
+def _apply(deltas):
+    """
+    Додатні кошики – INSERT ... ON CONFLICT DO UPDATE (новий кошик створюється),
+    решта – UPDATE ... FROM (VALUES ...) наявних. Зменшення ніколи не вставляє рядків:
+    якщо кошик щойно видалено каскадом разом з колонкою чи проєктом, віднімати вже нічого.
+    Щонайбільше два запити незалежно від кількості кошиків.
+    """
+    if not deltas:
+        return
+    table = connection.ops.quote_name(TaskRollup._meta.db_table)
+    inserts, updates = [], []
+    for key, (count, estimated, spent) in deltas.items():
+        (inserts if count > 0 else updates).append([*key, count, estimated, spent])
+    with connection.cursor() as cursor:
+        if updates:
+            cursor.execute(f"""
+                UPDATE {table} AS r
+                SET task_count = r.task_count + d.task_count,
+                    estimated_time = r.estimated_time + d.estimated_time,
+                    time_spent = r.time_spent + d.time_spent
+                FROM (VALUES {', '.join(['(%s::bigint, %s::bigint, %s::integer, %s::boolean, %s::date, '
+                                         '%s::integer, %s::interval, %s::interval)'] * len(updates))})
+                    AS d (project_id, column_id, assignee_id, is_complete, due_day,
+                          task_count, estimated_time, time_spent)
+                WHERE r.project_id = d.project_id AND r.column_id = d.column_id
+                  AND r.assignee_id IS NOT DISTINCT FROM d.assignee_id AND r.is_complete = d.is_complete
+                  AND r.due_day IS NOT DISTINCT FROM d.due_day
+            """, [value for row in updates for value in row])
+        if inserts:
+            # унікальний індекс NULLS NOT DISTINCT – ON CONFLICT спрацьовує і для assignee/due_day = NULL
+            cursor.execute(f"""
+                INSERT INTO {table}
+                    (project_id, column_id, assignee_id, is_complete, due_day, task_count, estimated_time, time_spent)
+                VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(inserts))}
+                ON CONFLICT (project_id, column_id, assignee_id, is_complete, due_day) DO UPDATE
+                SET task_count = {table}.task_count + EXCLUDED.task_count,
+                    estimated_time = {table}.estimated_time + EXCLUDED.estimated_time,
+                    time_spent = {table}.time_spent + EXCLUDED.time_spent
+            """, [value for row in inserts for value in row])
+
+
+# --- інкрементальне оновлення (викликається з task.signals) ---
+
+def task_saving(task, update_fields=None):
+    """pre_save: запам'ятовує стан задачі в БД, якщо його не дав знімок from_db."""
+    if update_fields is not None and not _ROLLUP_NAMES & set(update_fields):
+        task._rollup_skip = True
+        return
+    task._rollup_skip = False
+    if task.pk is None:
+        task._rollup_state = None
+    elif getattr(task, '_rollup_state', None) is None:
+        task._rollup_state = Task.objects.filter(pk=task.pk).values_list(*ROLLUP_FIELDS).first()
+
+
+def task_saved(task, created, update_fields=None):
+    """
+    post_save: переносить внесок задачі в новий кошик.
+    Повертає (старий, новий) знімки або None, якщо rollup-поля не зберігались.
+    """
+    if getattr(task, '_rollup_skip', False):
+        return None
+    old = None if created else getattr(task, '_rollup_state', None)
+    new = snapshot(task)
+    if old is not None and update_fields is not None:
+        # у БД змінилися лише update_fields – решта полів лишилась як у старому стані
+        saved = {field.attname for field in (Task._meta.get_field(name) for name in update_fields)}
+        new = tuple(value if field in saved else before
+                    for field, value, before in zip(ROLLUP_FIELDS, new, old))
+    _apply(_deltas((old, new)))
+    task._rollup_state = new
+    return old, new
+
+
+def task_deleted(task):
+    """post_delete: прибирає внесок задачі; повертає її останній знімок."""
+    old = getattr(task, '_rollup_state', None)
+    if old is not None:
+        _apply(_deltas((old, None)))
+    return old
+
+
+def tasks_changed(changes):
+    """
+    Для bulk_create/bulk_update, які не надсилають сигналів: пари (старий, новий)
+    знімків задач (None – задачі не було/немає) одним набором дельт.
+    """
+    _apply(_deltas(*changes))
+
+
+# --- перебудова та звірка ---
+
+def live_buckets(project_ids=None):
+    """Кошики, пораховані напряму з Task: {ключ: (кількість, estimated, spent)}."""
+    tasks = Task.objects.all()
+    if project_ids is not None:
+        tasks = tasks.filter(project_id__in=project_ids)
+    rows = (
+        tasks
+            .annotate(due_day=TruncDate('due_date'))
+            .values_list('project_id', 'column_id', 'assigned_to_id', 'is_complete', 'due_day')
+            .annotate(
+                count=Count('id'),
+                estimated=Sum(Coalesce('estimated_time', Value(ZERO, output_field=DurationField()))),
+                spent=Sum('time_spent'),
+            )
+            .order_by()
+    )
+    return {tuple(row[:5]): (row[5], row[6] or ZERO, row[7] or ZERO) for row in rows}
+
+
+def stored_buckets(project_ids=None):
+    """Кошики з TaskRollup (порожні пропускаються)."""
+    rollups = TaskRollup.objects.exclude(task_count=0, estimated_time=ZERO, time_spent=ZERO)
+    if project_ids is not None:
+        rollups = rollups.filter(project_id__in=project_ids)
+    rows = rollups.values_list(
+        'project_id', 'column_id', 'assignee_id', 'is_complete', 'due_day',
+        'task_count', 'estimated_time', 'time_spent',
+    )
+    return {tuple(row[:5]): tuple(row[5:]) for row in rows}
+
+
+def rebuild(project_ids=None):
+    """
+    Перераховує rollup-и з нуля. LOCK TABLE (SHARE ROW EXCLUSIVE) чекає на транзакції,
+    що вже змінили rollup-и, і блокує нові до коміту перебудови, тож паралельний
+    запис задачі не загубиться і не порахується двічі. Повертає кількість кошиків.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {connection.ops.quote_name(TaskRollup._meta.db_table)} '
+                           f'IN SHARE ROW EXCLUSIVE MODE')
+        rollups = TaskRollup.objects.all()
+        if project_ids is not None:
+            rollups = rollups.filter(project_id__in=project_ids)
+        rollups.delete()
+        buckets = live_buckets(project_ids)
+        TaskRollup.objects.bulk_create(
+            (
+                TaskRollup(project_id=project_id, column_id=column_id, assignee_id=assignee_id,
+                           is_complete=is_complete, due_day=due_day,
+                           task_count=count, estimated_time=estimated, time_spent=spent)
+                for (project_id, column_id, assignee_id, is_complete, due_day), (count, estimated, spent)
+                in buckets.items()
+            ),
+            batch_size=1000,
+        )
+    return len(buckets)
+
+
+def check(project_ids=None):
+    """Розбіжності rollup-ів з живими агрегатами: [(ключ, збережене, живе)]."""
+    live, stored = live_buckets(project_ids), stored_buckets(project_ids)
+    return [
+        (key, stored.get(key), live.get(key))
+        for key in sorted(live.keys() | stored.keys(), key=repr)
+        if stored.get(key) != live.get(key)
+    ]
+
+
+def rebuild_for_assignee(user_id):
+    """
+    Після видалення користувача його задачі отримують assigned_to = NULL одним
+    UPDATE без сигналів – перераховуємо проєкти, де він мав задачі.
+    """
+    project_ids = set(TaskRollup.objects.filter(assignee_id=user_id).values_list('project_id', flat=True))
+    if project_ids:
+        rebuild(project_ids)
+
+
+# --- читання ---
+
+def _stats(open_count=0, done=0, overdue=0, estimated=ZERO, spent=ZERO):
+    return {
+        'open': open_count,
+        'done': done,
+        'overdue': overdue,
+        'estimated_time': duration_string(estimated),
+        'time_spent': duration_string(spent),
+    }
+
+
+def project_stats(project):
+    """
+    Статистика проєкту: підсумок, по колонках і по виконавцях.
+    Два запити до rollup-ів, один до колонок і один вузький до Task (прострочені сьогодні).
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    today_start, _ = due_window(today)
+    measures = dict(
+        open_count=Coalesce(Sum('task_count', filter=Q(is_complete=False)), 0),
+        done=Coalesce(Sum('task_count', filter=Q(is_complete=True)), 0),
+        overdue=Coalesce(Sum('task_count', filter=Q(is_complete=False, due_day__lt=today)), 0),
+        estimated=Coalesce(Sum('estimated_time'), Value(ZERO, output_field=DurationField())),
+        spent=Coalesce(Sum('time_spent'), Value(ZERO, output_field=DurationField())),
+    )
+    rollups = TaskRollup.objects.filter(project=project).order_by()
+    by_column = {row.pop('column_id'): row for row in rollups.values('column_id').annotate(**measures)}
+    by_assignee = {
+        row.pop('assignee_id'): row
+        for row in rollups.values('assignee_id', 'assignee__username').annotate(**measures)
+    }
+
+    # Сьогоднішні дедлайни, що вже минули, – у rollup-ах сьогоднішній день ще не прострочений
+    overdue_today = (
+        Task.objects
+            .filter(project=project, is_complete=False, due_date__gte=today_start, due_date__lt=now)
+            .values_list('column_id', 'assigned_to_id')
+            .order_by()
+    )
+    for column_id, assignee_id in overdue_today:
+        for rows, key in ((by_column, column_id), (by_assignee, assignee_id)):
+            if key in rows:
+                rows[key]['overdue'] += 1
+
+    columns = [
+        {'id': column.pk, 'name': column.name, **_stats(**by_column.get(column.pk, {}))}
+        for column in Column.objects.filter(project=project).only('pk', 'name', 'order')
+    ]
+    totals = {key: sum(row[key] for row in by_column.values())
+              for key in ('open_count', 'done', 'overdue')}
+    totals['estimated'] = sum((row['estimated'] for row in by_column.values()), ZERO)
+    totals['spent'] = sum((row['spent'] for row in by_column.values()), ZERO)
+    assignees = [
+        {'user': assignee_id, 'username': row.pop('assignee__username'), **_stats(**row)}
+        for assignee_id, row in sorted(by_assignee.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        if row['open_count'] or row['done']
+    ]
+    return {
+        'project': project.pk,
+        'generated_at': now,
+        'totals': _stats(**totals),
+        'columns': columns,
+        'assignees': assignees,
+    }
@@ -0,0 +1,93 @@
+# file: task/authentication.py
+"""
+JWT-автентифікація без запиту до БД.
+
+Стандартний JWTAuthentication на кожен запит робить SELECT з auth_user.
+Токени, видані ClaimsRefreshToken, уже містять username та is_staff, тож
+ClaimsJWTAuthentication будує з них користувача в пам'яті. Для старих токенів
+без цих claims дані користувача беруться з короткого кешу (Redis), а з БД –
+лише при промаху.
+
+Деактивованих (чи видалених) користувачів не пускає список відкликання
+TokenRevocation: момент, до якого всі видані токени відхиляються. Його пише
+тригер на auth_user (і для QuerySet.update()/bulk-дій адмінки), зокрема й
+при зміні username/is_staff – claims у старих токенах застаріли, клієнт
+логіниться знову. Кеш лише прискорює перевірку: при промаху (витіснення,
+flush, рестарт) момент читається з БД, тож відкликані токени не оживають;
+"не відкликано" кешується на AUTH_USER_CACHE_TIMEOUT, сигнали User скидають
+кеш одразу після коміту.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import ClaimsUser, TokenRevocation, USER_CLAIMS
+
+
+def _revoked_key(user_id):
+    return f'auth:revoked:{user_id}'
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    """Скидає закешовані дані й момент відкликання користувача – наступний запит прочитає їх з БД."""
+    cache.delete_many([_user_key(user_id), _revoked_key(user_id)])
+
+
+def revoked_at(user_id):
+    """Unix-час, до якого (включно) токени користувача недійсні; 0 – не відкликались."""
+    key = _revoked_key(user_id)
+    value = cache.get(key)
+    if value is None:
+        revoked = TokenRevocation.objects.filter(user_id=user_id).values_list('revoked_at', flat=True).first()
+        value = int(revoked.timestamp()) if revoked is not None else 0
+        lifetime = max(api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME)
+        cache.set(key, value, int(lifetime.total_seconds()) if value else settings.AUTH_USER_CACHE_TIMEOUT)
+    return value
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh-токен (а з ним і access), що несе дані користувача, потрібні API."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """Автентифікація за claims токена; БД – лише для старих токенів при промаху кешу."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if validated_token.get('iat', 0) <= revoked_at(user_id):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        if all(claim in validated_token for claim in USER_CLAIMS):
+            return ClaimsUser.from_claims(user_id, validated_token)
+
+        claims = cache.get(_user_key(user_id))
+        if claims is None:
+            user = super().get_user(validated_token)
+            claims = {claim: getattr(user, claim) for claim in USER_CLAIMS}
+            cache.set(_user_key(user_id), claims, settings.AUTH_USER_CACHE_TIMEOUT)
+        return ClaimsUser.from_claims(user_id, claims)
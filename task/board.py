@@ -0,0 +1,149 @@
+# file: task/board.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Project, Column, Task, Comment
+from .pagination import ColumnTaskPagination, cursor_for
+from .serializers import TaskCardSerializer, ProjectNestedSerializer
+
+
+BOARD_VERSION_KEY = 'board:version:{project_id}'
+BOARD_PAYLOAD_KEY = 'board:payload:{project_id}:{version}:{variant}'
+
+
+def board_queryset():
+    """
+    Queryset проєкту з усім деревом дошки, завантаженим наперед.
+
+    Незалежно від розміру дошки виконується фіксована кількість запитів:
+      1) проєкт,
+      2) колонки,
+      3) задачі (відсортовані за (column, order) – обслуговується індексом),
+      4) мітки задач через M2M,
+      5) коментарі разом з автором (select_related('user')).
+    Далі Django збирає дерево в пам'яті, тож ProjectNestedSerializer
+    більше не робить ліниві запити на кожну колонку/задачу/коментар.
+    """
+    comments = Comment.objects.select_related('user').order_by('created_at', 'id')
+    tasks = (
+        Task.objects
+            .order_by('column_id', 'order', 'id')
+            .prefetch_related('labels', Prefetch('comments', queryset=comments))
+    )
+    columns = Column.objects.order_by('order', 'id')
+    return Project.objects.prefetch_related(
+        Prefetch('columns', queryset=columns),
+        Prefetch('columns__tasks', queryset=tasks),
+    )
+
+
+def get_board_version(project_id):
+    """
+    Поточна версія дошки проєкту (лише Redis, без запитів до БД).
+    Якщо ключ відсутній (новий проєкт або витіснення з кешу), ініціалізуємо його
+    часом у наносекундах, щоб нова версія ніколи не збіглася зі старими ETag.
+    """
+    key = BOARD_VERSION_KEY.format(project_id=project_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_board_version(project_id):
+    """Збільшує версію дошки – усі закешовані знімки та ETag стають застарілими."""
+    key = BOARD_VERSION_KEY.format(project_id=project_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключа немає – будь-яка нова ініціалізація вже відрізняється від попередніх версій
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def board_etag(project_id, version, variant='full'):
+    if variant == 'full':
+        return f'"board-{project_id}-{version}"'
+    return f'"board-{project_id}-{version}-{variant}"'
+
+
+def get_cached_board(project_id, version, variant='full'):
+    return cache.get(BOARD_PAYLOAD_KEY.format(project_id=project_id, version=version, variant=variant))
+
+
+def set_cached_board(project_id, version, payload, variant='full'):
+    cache.set(
+        BOARD_PAYLOAD_KEY.format(project_id=project_id, version=version, variant=variant),
+        payload,
+        settings.BOARD_CACHE_TIMEOUT,
+    )
+
+
+def full_board_snapshot(project_id):
+    """Повний знімок дошки (як /project/<pk>/full/), з кешу під поточною версією."""
+    version = get_board_version(project_id)
+    payload = get_cached_board(project_id, version)
+    if payload is None:
+        payload = ProjectNestedSerializer(board_queryset().get(pk=project_id)).data
+        set_cached_board(project_id, version, payload)
+    return payload
+
+
+def task_cards_queryset():
+    """Задачі для карток дошки: мітки через prefetch, коментарі – денормалізований comment_count."""
+    return Task.objects.prefetch_related('labels')
+
+
+def build_paged_board(project, per_column):
+    """
+    Дошка для дуже великих проєктів: кожна колонка містить лише перші
+    `per_column` задач і курсор `next_cursor` для наступної сторінки
+    (GET /project/<pk>/columns/<column_id>/tasks/?cursor=...).
+    Перші сторінки всіх колонок вибираються одним запитом через
+    ROW_NUMBER() OVER (PARTITION BY column_id ORDER BY order, id).
+    """
+    ordering = ColumnTaskPagination.ordering
+    columns = list(project.columns.order_by('order', 'id'))
+    tasks = (
+        task_cards_queryset()
+            .filter(project=project)
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F('column_id')],
+                order_by=[F(name).asc() for name in ordering],
+            ))
+            # +1 рядок на колонку – щоб знати, чи є наступна сторінка
+            .filter(position__lte=per_column + 1)
+            .order_by('column_id', *ordering)
+    )
+
+    by_column = {column.id: [] for column in columns}
+    for task in tasks:
+        by_column.setdefault(task.column_id, []).append(task)
+
+    payload_columns = []
+    for column in columns:
+        column_tasks = by_column[column.id]
+        page = column_tasks[:per_column]
+        has_next = len(column_tasks) > per_column
+        payload_columns.append({
+            'id': column.id,
+            'name': column.name,
+            'order': column.order,
+            'task_count': column.task_count,
+            'tasks': TaskCardSerializer(page, many=True).data,
+            'next_cursor': cursor_for(page[-1], ordering) if has_next else None,
+        })
+
+    return {
+        'id': project.id,
+        'name': project.name,
+        'description': project.description,
+        'tasks_per_column': per_column,
+        'columns': payload_columns,
+    }
@@ -0,0 +1,278 @@
+# file: task/bulk.py
+"""
+Пакетне створення, редагування та переміщення задач (POST /api/tasks/bulk/).
+
+На відміну від сотні окремих POST /api/tasks/:
+  - зв'язані об'єкти (колонки, виконавці, мітки) перевіряються кількома
+    запитами на весь пакет, членство – по разу на проєкт (task.membership);
+  - запис – bulk_create/bulk_update в одній транзакції; колонки-призначення
+    блокуються раніше за задачі (той самий порядок, що в ProjectConsumer);
+  - учасники кожного проєкту отримують одну подію tasks_bulk_changed,
+    серіалізовану одним проходом.
+
+bulk_create/bulk_update не надсилають сигналів, тож rollup-и аналітики,
+лічильники, журнал переходів, версія дошки й теги кешу міток оновлюються тут явно.
+"""
+
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from . import analytics, counters, labels as label_counts, membership, response_cache, transitions
+from .models import Column, Label, Task
+from .ordering import key_between
+from .serializers import TaskNestedSerializer, TaskSerializer
+from .signals import bump_board_version_on_commit
+
+
+MAX_BULK_ITEMS = 500
+
+class BulkTaskFieldsSerializer(serializers.ModelSerializer):
+    """
+    Поля задачі для пакета. Зв'язки – просто id: перевіряються разом для всього
+    пакета в apply(), а не запитом на кожен елемент (PrimaryKeyRelatedField).
+    """
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+    column = serializers.IntegerField()
+    labels = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=50)
+
+    class Meta:
+        model = Task
+        fields = ('title', 'description', 'due_date', 'is_complete', 'assigned_to', 'labels',
+                  'column', 'estimated_time', 'time_spent')
+        extra_kwargs = {
+            'title': {'required': True},
+            'description': {'required': True},
+        }
+
+
+class BulkTaskCreateSerializer(BulkTaskFieldsSerializer):
+    project = serializers.IntegerField()
+
+    class Meta(BulkTaskFieldsSerializer.Meta):
+        fields = BulkTaskFieldsSerializer.Meta.fields + ('project',)
+
+
+class BulkTaskUpdateSerializer(BulkTaskFieldsSerializer):
+    """Часткове редагування; project змінити не можна – задача лишається у своєму проєкті."""
+    id = serializers.IntegerField()
+    column = serializers.IntegerField(required=False)
+
+    class Meta(BulkTaskFieldsSerializer.Meta):
+        fields = BulkTaskFieldsSerializer.Meta.fields + ('id',)
+        extra_kwargs = {'title': {'required': False}, 'description': {'required': False}}
+
+
+class BulkTaskMoveSerializer(serializers.Serializer):
+    """Переміщення в кінець колонки (у порядку елементів пакета)."""
+    id = serializers.IntegerField()
+    column = serializers.IntegerField()
+
+
+class BulkTaskSerializer(serializers.Serializer):
+    create = BulkTaskCreateSerializer(many=True, required=False)
+    update = BulkTaskUpdateSerializer(many=True, required=False)
+    move = BulkTaskMoveSerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        total = sum(len(attrs.get(op, ())) for op in ('create', 'update', 'move'))
+        if not total:
+            raise ValidationError('Порожній пакет.')
+        if total > MAX_BULK_ITEMS:
+            raise ValidationError(f'Не більше {MAX_BULK_ITEMS} операцій в одному пакеті.')
+        ids = [item['id'] for op in ('update', 'move') for item in attrs.get(op, ())]
+        if len(ids) != len(set(ids)):
+            raise ValidationError('Кожна задача може з\'явитися в update/move лише один раз.')
+        return attrs
+
+
+class BulkResult:
+    def __init__(self):
+        self.created, self.updated, self.moved = [], [], []
+
+    def project_ids(self):
+        return {task.project_id for task in self.created + self.updated + self.moved}
+
+
+def apply(request, data):
+    """Виконує провалідований пакет (BulkTaskSerializer.validated_data); повертає BulkResult."""
+    creates, updates, moves = data.get('create', []), data.get('update', []), data.get('move', [])
+    member_of = membership.project_ids(request)
+
+    def check_project(project_id):
+        if not request.user.is_staff and project_id not in member_of:
+            raise PermissionDenied(f'У вас немає доступу до проєкту {project_id}.')
+
+    result = BulkResult()
+    with transaction.atomic():
+        # 1) колонки-призначення – одним запитом і з блокуванням (раніше за задачі); разом з ними
+        # і поточні колонки задач, чиї лічильники task_count теж зміняться, – усе в порядку id
+        column_ids = {item['column'] for item in creates + updates + moves if 'column' in item}
+        task_ids = [item['id'] for item in updates + moves]
+        current_columns = set(Task.objects.filter(pk__in=task_ids).values_list('column_id', flat=True).order_by())
+        columns = {
+            column.pk: column
+            for column in Column.objects.select_for_update().filter(pk__in=sorted(column_ids | current_columns))
+                .order_by('pk')
+        }
+        missing = column_ids - columns.keys()
+        if missing:
+            raise ValidationError({'column': f'Колонок не існує: {sorted(missing)}.'})
+
+        # 2) задачі для update/move – теж одним запитом
+        tasks = {task.pk: task for task in Task.objects.select_for_update().filter(pk__in=task_ids).order_by('pk')}
+        missing = set(task_ids) - tasks.keys()
+        if missing:
+            raise ValidationError({'id': f'Задач не існує: {sorted(missing)}.'})
+
+        # 3) членство – по разу на проєкт
+        for project_id in sorted({item['project'] for item in creates} | {t.project_id for t in tasks.values()}):
+            check_project(project_id)
+
+        # 4) виконавці й мітки – по запиту на пакет
+        user_ids = {item['assigned_to'] for item in creates + updates if item.get('assigned_to') is not None}
+        missing = user_ids - set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+        if missing:
+            raise ValidationError({'assigned_to': f'Користувачів не існує: {sorted(missing)}.'})
+        label_ids = {label for item in creates + updates for label in item.get('labels', ())}
+        label_projects = dict(Label.objects.filter(pk__in=label_ids).values_list('pk', 'project_id'))
+        missing = label_ids - label_projects.keys()
+        if missing:
+            raise ValidationError({'labels': f'Міток не існує: {sorted(missing)}.'})
+
+        def check_column(column_id, project_id):
+            if columns[column_id].project_id != project_id:
+                raise ValidationError({'column': f'Колонка {column_id} не належить проєкту {project_id}.'})
+
+        def check_labels(task_labels, project_id):
+            foreign = sorted(label for label in task_labels if label_projects[label] != project_id)
+            if foreign:
+                raise ValidationError({'labels': f'Мітки {foreign} не належать проєкту {project_id}.'})
+
+        # Нові ключі order: у кінець колонок, останні ключі – одним запитом
+        last_orders = dict(
+            Task.objects.filter(column_id__in=column_ids).values_list('column_id')
+                .annotate(last=Max('order')).order_by()
+        )
+
+        def append_order(column_id):
+            last_orders[column_id] = key_between(last_orders.get(column_id), None)
+            return last_orders[column_id]
+
+        changes, labels = [], {}
+        for item in creates:
+            check_column(item['column'], item['project'])
+            task_labels = item.pop('labels', [])
+            check_labels(task_labels, item['project'])
+            task = Task(
+                project_id=item.pop('project'), column_id=item.pop('column'),
+                assigned_to_id=item.pop('assigned_to', None), **item,
+            )
+            task.order = append_order(task.column_id)
+            result.created.append(task)
+            labels[id(task)] = task_labels
+
+        changed_fields = set()
+        for item in updates:
+            task = tasks[item.pop('id')]
+            old = getattr(task, '_rollup_state', None) or analytics.snapshot(task)
+            if 'labels' in item:
+                labels[id(task)] = item.pop('labels')
+                check_labels(labels[id(task)], task.project_id)
+            if 'assigned_to' in item:
+                task.assigned_to_id = item.pop('assigned_to')
+                changed_fields.add('assigned_to')
+            if 'column' in item:
+                column_id = item.pop('column')
+                check_column(column_id, task.project_id)
+                if column_id != task.column_id:
+                    task.column_id, task.order = column_id, append_order(column_id)
+                    changed_fields |= {'column', 'order'}
+            for field, value in item.items():
+                setattr(task, field, value)
+            changed_fields |= item.keys()
+            changes.append((old, analytics.snapshot(task)))
+            result.updated.append(task)
+
+        for item in moves:
+            task = tasks[item['id']]
+            check_column(item['column'], task.project_id)
+            old = getattr(task, '_rollup_state', None) or analytics.snapshot(task)
+            task.column_id, task.order = item['column'], append_order(item['column'])
+            changed_fields |= {'column', 'order'}
+            changes.append((old, analytics.snapshot(task)))
+            result.moved.append(task)
+
+        # 5) запис
+        Task.objects.bulk_create(result.created)
+        changes += [(None, analytics.snapshot(task)) for task in result.created]
+        if result.updated or result.moved:
+            # bulk_update не викликає pre_save – auto_now для updated_at ставимо самі (і для зміни лише міток)
+            now = timezone.now()
+            for task in result.updated + result.moved:
+                task.updated_at = now
+            changed_fields.add('updated_at')
+            Task.objects.bulk_update(result.updated + result.moved, sorted(changed_fields), batch_size=MAX_BULK_ITEMS)
+        _set_labels(result.created, result.updated, labels)
+
+        # 6) те, що зазвичай роблять сигнали Task
+        changed_tasks = result.updated + result.moved + result.created
+        analytics.tasks_changed(changes)
+        counters.tasks_changed(changes)
+        transitions.record(transitions.transition(task.pk, old, new) for task, (old, new) in zip(changed_tasks, changes))
+        for task, (_, new) in zip(changed_tasks, changes):
+            task._rollup_state = new
+        for project_id in result.project_ids():
+            bump_board_version_on_commit(project_id)
+        response_cache.invalidate_on_commit(
+            response_cache.labels_tag(task.project_id) for task in result.created + result.updated if id(task) in labels
+        )
+    return result
+
+
+def _set_labels(created, updated, labels):
+    """
+    Мітки задач пакета: видалення старих і вставка нових – по запиту на пакет,
+    Label.task_count – сумарною різницею (task.labels).
+    """
+    tasks = [task for task in created + updated if labels.get(id(task))]
+    through = Task.labels.through
+    deltas = Counter()
+    replaced = [task.pk for task in updated if id(task) in labels]
+    if replaced:
+        old = through.objects.filter(task_id__in=replaced)
+        deltas.subtract(dict(old.values_list('label_id').annotate(count=Count('*')).order_by()))
+        old.delete()
+    rows = [through(task_id=task.pk, label_id=label_id) for task in tasks for label_id in dict.fromkeys(labels[id(task)])]
+    through.objects.bulk_create(rows, batch_size=MAX_BULK_ITEMS)
+    deltas.update(row.label_id for row in rows)
+    label_counts.adjust_task_counts(deltas)
+
+
+def payloads(result):
+    """
+    (відповідь API, {project_id: подія tasks_bulk_changed}) – серіалізація
+    одним проходом: задачі з мітками й коментарями підтягуються prefetch-ем.
+    """
+    changed = {task.pk for task in result.created + result.updated}
+    full = {
+        task.pk: task
+        for task in Task.objects.filter(pk__in=changed).prefetch_related('labels', 'comments__user')
+    }
+    events = defaultdict(lambda: {'action': 'tasks_bulk_changed', 'created': [], 'updated': [], 'moved': []})
+    response = {'created': [], 'updated': [], 'moved': []}
+    for kind, tasks in (('created', result.created), ('updated', result.updated)):
+        for task in tasks:
+            task = full[task.pk]
+            events[task.project_id][kind].append(TaskNestedSerializer(task).data)
+            response[kind].append(TaskSerializer(task).data)
+    for task in result.moved:
+        moved = {'id': task.pk, 'column': task.column_id, 'order': task.order}
+        events[task.project_id]['moved'].append(moved)
+        response['moved'].append(moved)
+    return response, dict(events)
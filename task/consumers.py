@@ -1,153 +1,287 @@
-from channels.generic.websocket import JsonWebsocketConsumer
-from asgiref.sync import async_to_sync
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db import transaction
+from django.db.models import Max
+from task import metrics
+from task.board import full_board_snapshot
+from task.events import apublish, current_seq, replay
 from task.models import Project, Task, Column
+from task.ordering import (
+    key_between, neighbours_at, needs_rebalance, task_siblings, column_siblings,
+    rebalance_tasks, rebalance_columns, lock_columns, lock_project,
+)
 from task.serializers import ColumnSerializer, TaskOrderSerializer
+from task.tasks import rebalance_task_order, rebalance_column_order
+
+
+# Результат resume: кадри вже надіслано, розсилати нічого
+RESUMED = object()
+
+
+class InvalidMessage(ValueError):
+    """Некоректне повідомлення клієнта – відповідь {"action": "error"} лише йому."""
+
+
+def int_field(content, key, default=...):
+    """Ціле поле повідомлення; без default поле обов'язкове."""
+    value = content.get(key, default)
+    if value is ... or (value is None and default is not None):
+        raise InvalidMessage(f'{key} is required.')
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise InvalidMessage(f'{key} must be an integer.')
+
+
+class ProjectConsumer(AsyncJsonWebsocketConsumer):
+    """
+    WebSocket дошки проєкту: ws://.../ws/projects/<project_id>/
+
+    Повністю асинхронний: кадри обробляються в event loop без потоку з
+    sync-executor на кожне повідомлення, group_send викликається напряму.
+    Прості читання/записи – через async ORM; переміщення, яким потрібні
+    transaction.atomic() і SELECT ... FOR UPDATE (async ORM транзакцій
+    не підтримує), виконуються як одна sync-функція в database_sync_to_async.
 
-class ProjectConsumer(JsonWebsocketConsumer):
-    def connect(self):
+    Кожна подія має `seq` (див. task.events). Після перепідключення клієнт
+    передає ?resume_from=<seq> (або надсилає {"action": "resume", "resume_from": seq})
+    і отримує лише пропущені події; якщо журнал уже обрізано – повний знімок
+    {"action": "board_snapshot", "seq": ..., "board": {...}}. Події можуть
+    повторитися (група підключається до повтору), тож клієнт відкидає seq,
+    які вже бачив. Події, що прийшли протягом BOARD_EVENT_COALESCE_MS,
+    надходять одним кадром {"action": "events_batch", "events": [...]}.
+
+    Некоректне повідомлення (нечислові id чи позиції, add_column без назви)
+    отримує лише відправник: {"action": "error", "request": <дія>, "detail": "..."}.
+    add_column приймає необов'язкову позицію `position` (1-based, як new_order).
+    Старі клієнти надсилають `order` – щільний номер колонки (1, 2, ...); ключі
+    тепер розріджені (task.ordering), тож він тлумачиться як та сама позиція.
+    """
+
+    async def connect(self):
         self.project_id = self.scope['url_route']['kwargs']['project_id']
-        try:
-            Project.objects.get(pk=self.project_id)
-        except Project.DoesNotExist:
-            return self.close(code=4001)
+        if not await Project.objects.filter(pk=self.project_id).aexists():
+            return await self.close(code=4001)
 
         self.group_name = f'project_{self.project_id}'
-        async_to_sync(self.channel_layer.group_add)(
+        await self.channel_layer.group_add(
             self.group_name,
             self.channel_name
         )
-        self.accept()
+        await self.accept()
 
-    def disconnect(self, close_code):
-        async_to_sync(self.channel_layer.group_discard)(
-            self.group_name,
-            self.channel_name
-        )
+        resume_from = parse_qs(self.scope.get('query_string', b'').decode()).get('resume_from')
+        if resume_from:
+            await self.resume(resume_from[0])
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(
+                self.group_name,
+                self.channel_name
+            )
 
-    def receive_json(self, content, **kwargs):
+    async def receive_json(self, content, **kwargs):
         action = content.get('action')
+        # латентність, SQL, серіалізація і group_send дії – у /metrics (task.metrics)
+        with metrics.measure('ws', type(self).__name__, metrics.consumer_action(action), 'error') as sample:
+            sample.status = await self.handle_action(action, content)
+
+    async def handle_action(self, action, content):
+        """Виконує дію й розсилає результат; повертає 'ok', 'ignored' або 'invalid' (для метрик)."""
+        try:
+            result = await self.dispatch_action(action, content)
+        except InvalidMessage as exc:
+            await self.send_json({"action": "error", "request": action, "detail": str(exc)})
+            return 'invalid'
+        if result is None:
+            return 'ignored'  # ігноруємо запити до неіснуючих задач/колонок
+        if result is RESUMED:
+            return 'ok'
+        message_type, response = result
+
+        # Журнал подій (seq) + розсилка всім клієнтам у групі
+        await apublish(self.project_id, message_type, response)
+        return 'ok'
+
+    async def dispatch_action(self, action, content):
+        if action == "resume":
+            await self.resume(content.get('resume_from'))
+            return RESUMED
+        elif action == "move_task":
+            return await self.move_task(content)
+        elif action == "move_column":
+            return await self.move_column(content)
+        elif action == "add_column":
+            return await self.add_column(content)
+        # якщо інші дії — просто ехо
+        return "task_update", content
 
-        if action == "move_task":
-            task_id    = content.get('task_id')
-            to_column  = content.get('new_column')
-            new_order  = int(content.get('new_order', 1))
+    async def resume(self, resume_from):
+        """Надсилає події після resume_from або, якщо їх уже немає в журналі, повний знімок."""
+        try:
+            seq = int(resume_from)
+        except (TypeError, ValueError):
+            seq = None
+        missed = None
+        if seq is not None:
+            missed = await sync_to_async(replay, thread_sensitive=False)(self.project_id, seq)
+        if missed is None:
+            return await self.send_snapshot()
+        for message in missed:
+            await self.send_json(message)
+
+    async def send_snapshot(self):
+        # seq читаємо до знімка: усе, що станеться після, клієнт отримає подіями
+        seq = await sync_to_async(current_seq, thread_sensitive=False)(self.project_id)
+        board = await database_sync_to_async(full_board_snapshot)(self.project_id)
+        await self.send_json({"action": "board_snapshot", "seq": seq, "board": board})
+
+    @database_sync_to_async
+    def move_task(self, content):
+        task_id    = int_field(content, 'task_id')
+        to_column  = int_field(content, 'new_column')
+        new_order  = int_field(content, 'new_order', 1)
 
+        # Одна транзакція на переміщення; блокування колонок (потім задачі) серіалізує
+        # паралельні переміщення та фоновий rebalance колонки-призначення. Блокуємо і
+        # поточну колонку задачі – її task_count теж зміниться (task.counters).
+        with transaction.atomic():
             try:
-                task = Task.objects.get(pk=task_id, project_id=self.project_id)
-            except Task.DoesNotExist:
-                return  # ігноруємо невірні запити
+                current = Task.objects.filter(pk=task_id, project_id=self.project_id) \
+                    .values_list('column_id', flat=True).first()
+                if current is None:
+                    raise Task.DoesNotExist
+                lock_columns(self.project_id, {current, to_column})
+                task = Task.objects.select_for_update().get(pk=task_id, project_id=self.project_id)
+            except (Column.DoesNotExist, Task.DoesNotExist):
+                return None
 
             from_column = task.column_id
 
-            # 1) Переміщуємо таску (якщо змінилася колонка)
+            # 1) Новий ключ між сусідами на позиції new_order – пишемо лише цей рядок
+            before, after = neighbours_at(task_siblings(to_column, exclude_id=task.pk), new_order)
+            order = key_between(before, after)
+            rebalanced = []
+            if order is None:
+                # Ключі закінчилися, а фоновий rebalance ще не встиг – перенумеровуємо
+                # колонку зараз, одним UPDATE (кількість round-trip не залежить від розміру колонки)
+                rebalanced = rebalance_tasks(to_column)
+                before, after = neighbours_at(task_siblings(to_column, exclude_id=task.pk), new_order)
+                order = key_between(before, after)
+            elif needs_rebalance(before, order, after):
+                transaction.on_commit(lambda: rebalance_task_order.delay(to_column))
+
             task.column_id = to_column
-            task.order     = new_order
-            task.save(update_fields=['column_id','order'])
+            task.order     = order
+            task.save(update_fields=['column_id', 'order', 'updated_at'])
 
-            # 2) Перенумеровуємо таски у старій колонці
-            src_tasks_qs = Task.objects.filter(
-                project_id=self.project_id,
-                column_id=from_column
-            ).order_by('order','id')
-            src_tasks = list(src_tasks_qs)
-            for idx, t in enumerate(src_tasks, start=1):
-                if t.order != idx:
-                    t.order = idx
-                    t.save(update_fields=['order'])
-
-            # 3) Перенумеровуємо таски у новій колонці
-            tgt_tasks_qs = Task.objects.filter(
-                project_id=self.project_id,
-                column_id=to_column
-            ).order_by('order','id')
-            tgt_tasks = list(tgt_tasks_qs)
-            for idx, t in enumerate(tgt_tasks, start=1):
-                if t.order != idx:
-                    t.order = idx
-                    t.save(update_fields=['order'])
-
-            # 4) Підготуємо payload
-            response = {
-                "action":       "task_moved",
-                "task_id":      task_id,
-                "from_column":  from_column,
-                "to_column":    to_column,
-                "source_tasks": TaskOrderSerializer(src_tasks, many=True).data,
-                "target_tasks": TaskOrderSerializer(tgt_tasks, many=True).data,
-            }
-            message_type = "task_update"
+        # 2) Payload: нові ключі лише змінених задач (клієнт сортує за order)
+        return "task_update", {
+            "action":       "task_moved",
+            "task_id":      task_id,
+            "from_column":  from_column,
+            "to_column":    to_column,
+            "order":        order,
+            "source_tasks": [],
+            "target_tasks": TaskOrderSerializer(
+                [t for t in rebalanced if t.pk != task.pk] + [task], many=True
+            ).data,
+        }
 
-        elif action == "move_column":
-            column_id = content.get('column_id')
-            new_order = int(content.get('new_order', 1))
+    @database_sync_to_async
+    def move_column(self, content):
+        column_id = int_field(content, 'column_id')
+        new_order = int_field(content, 'new_order', 1)
+        with transaction.atomic():
             try:
+                lock_project(self.project_id)
                 moved_column = Column.objects.get(
                     pk=column_id,
                     project_id=self.project_id
                 )
-            except Column.DoesNotExist:
-                return
+            except (Project.DoesNotExist, Column.DoesNotExist):
+                return None
 
-            other_columns = list(
-                Column.objects.filter(
-                    project_id=self.project_id
-                ).exclude(pk=column_id).order_by('order','id')
-            )
+            siblings = column_siblings(self.project_id, exclude_id=moved_column.pk)
+            before, after = neighbours_at(siblings, new_order)
+            order = key_between(before, after)
+            rebalanced = []
+            if order is None:
+                rebalanced = rebalance_columns(self.project_id)
+                siblings = column_siblings(self.project_id, exclude_id=moved_column.pk)
+                before, after = neighbours_at(siblings, new_order)
+                order = key_between(before, after)
+            elif needs_rebalance(before, order, after):
+                project_id = self.project_id
+                transaction.on_commit(lambda: rebalance_column_order.delay(project_id))
 
-            # виправляємо межі
-            new_order = max(1, min(new_order, len(other_columns) + 1))
+            moved_column.order = order
+            moved_column.save(update_fields=['order'])
 
-            # Формуємо новий список і заново нумеруємо
-            new_columns = (
-                other_columns[:new_order-1]
-                + [moved_column]
-                + other_columns[new_order-1:]
-            )
-            for idx, col in enumerate(new_columns, start=1):
-                if col.order != idx:
-                    col.order = idx
-                    col.save(update_fields=['order'])
+        # Лише змінені колонки (клієнт сортує за order)
+        changed = [col for col in rebalanced if col.pk != moved_column.pk] + [moved_column]
+        return "column_update", {
+            "action":  "column_moved",
+            "columns": ColumnSerializer(changed, many=True).data,
+        }
 
-            response = {
-                "action":  "column_moved",
-                "columns": [ColumnSerializer(col).data for col in new_columns],
-            }
-            message_type = "column_update"
+    async def add_column(self, content):
+        column_name = content.get('column_name')
+        if not isinstance(column_name, str) or not column_name.strip():
+            raise InvalidMessage('column_name is required.')
+        position = int_field(content, 'position', None)
+        if position is None:
+            # старий протокол: щільний order і є позицією
+            position = int_field(content, 'order', None)
+        return await self.insert_column(column_name, position)
 
-        elif action == "add_column":
-            column_name = content.get('column_name')
-            order       = int(content.get('order', 0))
+    @database_sync_to_async
+    def insert_column(self, column_name, position):
+        # Блокування проєкту, як у move_column: інакше паралельні додавання
+        # прочитали б той самий останній ключ і отримали однаковий order
+        rebalanced = []
+        with transaction.atomic():
+            lock_project(self.project_id)
+            siblings = column_siblings(self.project_id)
+            if position is None:
+                before, after = siblings.aggregate(last=Max('order'))['last'], None
+            else:
+                before, after = neighbours_at(siblings, position)
+            order = key_between(before, after)
+            if order is None:  # лише при вставці між сусідами – у кінці ключ є завжди
+                rebalanced = rebalance_columns(self.project_id)
+                before, after = neighbours_at(column_siblings(self.project_id), position)
+                order = key_between(before, after)
             column = Column.objects.create(
                 project_id=self.project_id,
                 name=column_name,
                 order=order
             )
-            response = {
-                "action": "column_added",
-                "column": ColumnSerializer(column).data
-            }
-            message_type = "column_update"
-
-        else:
-            # якщо інші дії — просто ехо
-            response     = content
-            message_type = "task_update"
-
-        # Відправляємо всім клієнтам у групі
-        async_to_sync(self.channel_layer.group_send)(
-            self.group_name,
-            {"type": message_type, "message": response}
-        )
+        return "column_update", {
+            "action": "column_added",
+            "column": ColumnSerializer(column).data,
+            "columns": ColumnSerializer(rebalanced, many=True).data,
+        }
 
     # Обробники вхідних group_send
-    def task_update(self, event):
-        self.send_json(event['message'])
+    async def task_update(self, event):
+        await self.send_json(event['message'])
+
+    async def column_update(self, event):
+        await self.send_json(event['message'])
 
-    def column_update(self, event):
-        self.send_json(event['message'])
+    async def comment_update(self, event):
+        await self.send_json(event['message'])
 
-    def comment_update(self, event):
-        self.send_json(event['message'])
+    async def project_update(self, event):
+        await self.send_json(event['message'])
 
-    def project_update(self, event):
-        self.send_json(event['message'])
+    async def events_batch(self, event):
+        # Злиті події за вікно BOARD_EVENT_COALESCE_MS – одним кадром
+        await self.send_json(event['message'])
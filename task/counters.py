@@ -0,0 +1,103 @@
+# file: task/counters.py
+"""
+Денормалізовані лічильники: Column.task_count, Project.open_task_count,
+Task.comment_count (Label.task_count змінюється в task.labels, але
+звіряється й ремонтується тут разом з рештою).
+
+Змінюються атомарно F()-виразом (UPDATE ... SET n = n + delta) у транзакції
+запису: задачі – з тих самих знімків (старий, новий), що й rollup-и
+task.analytics (сигнали Task, bulk), коментарі – сигналами Comment,
+імпорт – своїми set-based запитами. Якщо змінюється кілька рядків, вони
+спершу блокуються в порядку id – паралельні переміщення між тими самими
+колонками не взаємоблокуються.
+
+Перерахунок з нуля і звірка – drift()/repair(), manage.py repair_counters.
+"""
+
+from collections import Counter
+
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Column, Comment, Label, Project, Task
+
+
+# Індекси полів у знімку TASK_ROLLUP_FIELDS
+_PROJECT, _COLUMN, _COMPLETE = 0, 1, 3
+
+
+def adjust(model, field, deltas):
+    """deltas – {pk: зміна}; один UPDATE (плюс SELECT ... FOR UPDATE, якщо рядків кілька)."""
+    deltas = {pk: delta for pk, delta in Counter(deltas).items() if delta and pk is not None}
+    if not deltas:
+        return
+    rows = model.objects.filter(pk__in=sorted(deltas))
+    if len(deltas) > 1:
+        list(rows.select_for_update().order_by('pk').values_list('pk', flat=True))
+        delta = Case(*(When(pk=pk, then=Value(d)) for pk, d in deltas.items()), output_field=IntegerField())
+    else:
+        (delta,) = deltas.values()
+    rows.update(**{field: F(field) + delta})
+
+
+def tasks_changed(changes):
+    """Пари (старий, новий) знімків задач (None – задачі не було/немає), як у analytics.tasks_changed."""
+    columns, open_tasks = Counter(), Counter()
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            columns[state[_COLUMN]] += sign
+            if not state[_COMPLETE]:
+                open_tasks[state[_PROJECT]] += sign
+    columns = {pk: delta for pk, delta in columns.items() if delta}
+    open_tasks = {pk: delta for pk, delta in open_tasks.items() if delta}
+    adjust(Column, 'task_count', columns)
+    adjust(Project, 'open_task_count', open_tasks)
+    # кешовані списки колонок і проєктів лічильників не містять (ColumnListSerializer,
+    # ProjectListSerializer), тож кеш відповідей (task.response_cache) тут не скидаємо
+
+
+def comments_changed(deltas):
+    """deltas – {task_id: зміна кількості коментарів}."""
+    adjust(Task, 'comment_count', deltas)
+
+
+# --- перерахунок і звірка ---
+
+def _live_counts():
+    """(модель, поле-лічильник, вираз живого значення, фільтр за проєктами)."""
+    def count(queryset, field):
+        return Coalesce(Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(field)
+                .annotate(count=Count('*')).values('count')
+        ), Value(0))
+
+    return (
+        (Column, 'task_count', count(Task.objects.all(), 'column_id'), 'project_id__in'),
+        (Project, 'open_task_count', count(Task.objects.filter(is_complete=False), 'project_id'), 'pk__in'),
+        (Task, 'comment_count', count(Comment.objects.all(), 'task_id'), 'project_id__in'),
+        (Label, 'task_count', count(Task.labels.through.objects.all(), 'label_id'), 'project_id__in'),
+    )
+
+
+def drift(project_ids=None):
+    """Розбіжності [(модель, pk, збережене, живе)] – по запиту на лічильник."""
+    result = []
+    for model, field, live, scope in _live_counts():
+        rows = model.objects.all()
+        if project_ids is not None:
+            rows = rows.filter(**{scope: project_ids})
+        rows = rows.annotate(live=live).exclude(**{field: F('live')}).order_by('pk')
+        result += [(model.__name__, pk, stored, actual) for pk, stored, actual in rows.values_list('pk', field, 'live')]
+    return result
+
+
+def repair(project_ids=None):
+    """Перераховує лічильники рядків з розбіжностями (UPDATE ... = (SELECT COUNT(*))); повертає drift()."""
+    found = drift(project_ids)
+    for model, field, live, _ in _live_counts():
+        pks = [pk for name, pk, _, _ in found if name == model.__name__]
+        if pks:
+            model.objects.filter(pk__in=pks).update(**{field: live})
+    return found
@@ -0,0 +1,300 @@
+# file: task/events.py
+"""
+Події дошки проєкту з порядковими номерами.
+
+Кожна подія, що розсилається групі project_<id>, спершу дописується в
+обмежений журнал проєкту (Redis stream, MAXLEN ~ BOARD_EVENT_LOG_MAXLEN)
+і отримує монотонно зростаючий `seq`. Клієнт, що перепідключився, надсилає
+resume_from=<seq> і отримує лише пропущені події; повний знімок дошки
+потрібен тільки тоді, коли журнал уже обрізано.
+
+Розсилка групі йде через EventCoalescer: події проєкту збираються протягом
+BOARD_EVENT_COALESCE_MS, повторні оновлення однієї задачі/колонки зливаються
+(перемагає останнє), і учасники отримують один кадр
+{"action": "events_batch", "events": [...]}. Журнал при цьому зберігає всі
+події, тож seq у пакеті можуть іти з пропусками.
+"""
+
+import asyncio
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import redis
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .metrics import timed_group_send
+
+
+logger = logging.getLogger(__name__)
+
+EVENT_SEQ_KEY = 'events:{project_id}:seq'
+EVENT_LOG_KEY = 'events:{project_id}:log'
+
+# INCR + XADD атомарно: id запису в stream = seq, тож порядок записів
+# завжди збігається з порядком номерів навіть при паралельних публікаціях.
+APPEND_EVENT_SCRIPT = """
+local seq = redis.call('INCR', KEYS[1])
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], seq .. '-0', 'event', ARGV[1])
+return seq
+"""
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+@lru_cache(maxsize=None)
+def _append_script():
+    return get_redis().register_script(APPEND_EVENT_SCRIPT)
+
+
+def group_name(project_id):
+    return f'project_{project_id}'
+
+
+def append_event(project_id, event_type, message):
+    """Дописує подію в журнал проєкту й повертає її seq."""
+    payload = json.dumps({'type': event_type, 'message': message}, cls=DjangoJSONEncoder)
+    return int(_append_script()(
+        keys=[EVENT_SEQ_KEY.format(project_id=project_id), EVENT_LOG_KEY.format(project_id=project_id)],
+        args=[payload, settings.BOARD_EVENT_LOG_MAXLEN],
+    ))
+
+
+def _sequenced(project_id, event_type, message):
+    message = dict(message)
+    try:
+        message['seq'] = append_event(project_id, event_type, message)
+    except redis.RedisError:
+        # Журнал недоступний – подію все одно розсилаємо, але без seq:
+        # клієнт, що її пропустить, відновиться через повний знімок.
+        logger.warning('Board event log is unavailable for project %s', project_id, exc_info=True)
+    return {'type': event_type, 'message': message}
+
+
+def _merge_key(message):
+    """
+    (сутність, слот) події для злиття або None, якщо подію зливати не можна.
+    Слот 'state' – повний стан сутності, 'moved' – лише новий ключ order,
+    'deleted' – видалення.
+    """
+    for kind in ('task', 'comment', 'column', 'project'):
+        entity = message.get(kind)
+        if isinstance(entity, dict) and 'id' in entity:
+            if message.get('columns'):
+                return None  # column_added разом з перенумерованими колонками
+            return (kind, str(entity['id'])), 'state'
+
+    action = message.get('action')
+    if action in ('task_deleted', 'comment_deleted'):
+        kind = action.split('_', 1)[0]
+        return (kind, str(message.get(f'{kind}_id'))), 'deleted'
+    if action == 'task_moved':
+        # Лише переміщення без перенумерації сусідів – інакше губилися б їхні ключі
+        targets = [str(t['id']) for t in message.get('target_tasks', ())]
+        if not message.get('source_tasks') and targets == [str(message.get('task_id'))]:
+            return ('task', targets[0]), 'moved'
+    if action == 'column_moved' and len(message.get('columns', ())) == 1:
+        return ('column', str(message['columns'][0]['id'])), 'moved'
+    return None
+
+
+class EventBatch:
+    """Події однієї групи за вікно злиття, у порядку останнього оновлення."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self._unmerged = 0
+
+    def add(self, event_type, message):
+        key = _merge_key(message)
+        if key is None:
+            self._unmerged += 1
+            self.entries[(None, self._unmerged)] = (event_type, message)
+            return
+
+        entity, slot = key
+        moved = self.entries.pop((entity, 'moved'), None)
+        if slot == 'moved' and moved is not None and 'from_column' in moved[1]:
+            # A→B, потім B→C – клієнти мають прибрати картку з A: from_column – з першого
+            # переміщення, to_column/order – з останнього
+            message = {**message, 'from_column': moved[1]['from_column']}
+        if slot != 'moved':
+            # Новий стан (чи видалення) заміняє і попередній стан, і переміщення
+            previous = self.entries.pop((entity, 'state'), None)
+            created = previous is not None and previous[1].get('action', '').endswith('_created')
+            if created and slot == 'deleted':
+                return  # створена й видалена в межах вікна – клієнтам нічого надсилати
+            if created:
+                message = {**message, 'action': previous[1]['action']}
+        self.entries[(entity, slot)] = (event_type, message)
+
+    def frame(self):
+        """Повідомлення для group_send: одна подія як є, кілька – events_batch; None, якщо порожньо."""
+        events = list(self.entries.values())
+        if not events:
+            return None
+        if len(events) == 1:
+            event_type, message = events[0]
+            return {'type': event_type, 'message': message}
+        return {
+            'type': 'events_batch',
+            'message': {'action': 'events_batch', 'events': [message for _, message in events]},
+        }
+
+
+class EventCoalescer:
+    """
+    Буфер подій на (event loop, група). Перша подія групи планує flush через
+    `window` секунд у тому ж loop; наступні до нього лише зливаються в пакет.
+    Синхронний код (в'юшки, Celery) використовує фоновий loop процесу в окремому
+    потоці, тож publish() не чекає на channel layer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._loop = None
+        self._pid = None
+
+    def add(self, group, event, window, loop=None):
+        loop = loop or self._background_loop()
+        with self._lock:
+            batch = self._batches.get((loop, group))
+            first = batch is None
+            if first:
+                batch = self._batches[(loop, group)] = EventBatch()
+            batch.add(event['type'], event['message'])
+        if first:
+            loop.call_soon_threadsafe(loop.call_later, window, self._flush, loop, group)
+
+    def _take(self, loop, group):
+        with self._lock:
+            batch = self._batches.pop((loop, group), None)
+        return batch.frame() if batch is not None else None
+
+    def _flush(self, loop, group):
+        frame = self._take(loop, group)
+        if frame is not None:
+            loop.create_task(_group_send(group, frame))
+
+    def _background_loop(self):
+        with self._lock:
+            # після fork (prefork Celery, gunicorn --preload) потоку з loop у дочірньому процесі немає
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop.run_forever, name='board-events', daemon=True).start()
+            return self._loop
+
+    def drain(self, timeout=5):
+        """Негайно розсилає все, що чекає у фоновому loop (при завершенні процесу)."""
+        loop = self._loop
+        if loop is None or self._pid != os.getpid() or not loop.is_running():
+            return
+        groups = [group for batch_loop, group in list(self._batches) if batch_loop is loop]
+
+        async def send_all():
+            for group in groups:
+                frame = self._take(loop, group)
+                if frame is not None:
+                    await _group_send(group, frame)
+
+        asyncio.run_coroutine_threadsafe(send_all(), loop).result(timeout)
+
+
+async def _group_send(group, event):
+    try:
+        await timed_group_send(get_channel_layer(), group, event)
+    except Exception:
+        logger.exception('Failed to broadcast board events to %s', group)
+
+
+coalescer = EventCoalescer()
+atexit.register(coalescer.drain)
+
+
+def _coalesce_window():
+    return settings.BOARD_EVENT_COALESCE_MS / 1000
+
+
+def publish(project_id, event_type, message):
+    """Синхронна публікація (в'юшки, Celery): журнал + group_send (через вікно злиття)."""
+    event = _sequenced(project_id, event_type, message)
+    window = _coalesce_window()
+    if window > 0:
+        coalescer.add(group_name(project_id), event, window)
+    else:
+        async_to_sync(timed_group_send)(get_channel_layer(), group_name(project_id), event)
+
+
+async def apublish(project_id, event_type, message):
+    """Те саме для асинхронного коду (ProjectConsumer); буфер – у поточному event loop."""
+    event = await sync_to_async(_sequenced, thread_sensitive=False)(project_id, event_type, message)
+    window = _coalesce_window()
+    if window > 0:
+        coalescer.add(group_name(project_id), event, window, loop=asyncio.get_running_loop())
+    else:
+        await timed_group_send(get_channel_layer(), group_name(project_id), event)
+
+
+def current_seq(project_id):
+    """Номер останньої події проєкту (None, якщо журнал недоступний)."""
+    try:
+        return int(get_redis().get(EVENT_SEQ_KEY.format(project_id=project_id)) or 0)
+    except redis.RedisError:
+        logger.warning('Board event log is unavailable for project %s', project_id, exc_info=True)
+        return None
+
+
+def replay(project_id, seq):
+    """events_since(), що при недоступному журналі просить повний знімок (None)."""
+    try:
+        return events_since(project_id, seq)
+    except redis.RedisError:
+        logger.warning('Board event log is unavailable for project %s', project_id, exc_info=True)
+        return None
+
+
+def events_since(project_id, seq):
+    """
+    Події з номером > seq у вигляді повідомлень для клієнта.
+    Повертає None, якщо частину з них уже обрізано з журналу (або seq
+    з "майбутнього") – тоді клієнту потрібен повний знімок.
+    """
+    log_key = EVENT_LOG_KEY.format(project_id=project_id)
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.get(EVENT_SEQ_KEY.format(project_id=project_id))
+    pipe.xrange(log_key, count=1)
+    pipe.xrange(log_key, min=f'{seq + 1}-0')
+    last, oldest, entries = pipe.execute()
+
+    last = int(last or 0)
+    if seq > last:
+        return None
+    if seq == last:
+        return []
+    if not oldest or _entry_seq(oldest[0]) > seq + 1:
+        return None
+
+    messages = []
+    for entry in entries:
+        event = json.loads(entry[1][b'event'])
+        message = event['message']
+        message['seq'] = _entry_seq(entry)
+        messages.append(message)
+    return messages
+
+
+def _entry_seq(entry):
+    entry_id = entry[0].decode() if isinstance(entry[0], bytes) else entry[0]
+    return int(entry_id.split('-', 1)[0])
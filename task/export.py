@@ -0,0 +1,199 @@
+# file: task/export.py
+"""
+Потоковий експорт задач проєкту (CSV або NDJSON).
+
+Задачі читаються server-side курсором (.iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+мітки й коментарі – prefetch-ем на кожен chunk, а відповідь віддається
+StreamingHttpResponse порціями, тож пам'ять не залежить від розміру проєкту.
+Під ASGI – асинхронним ітератором (astream), під WSGI – звичайним (stream).
+
+?since=<ISO datetime> – лише задачі, змінені з цього моменту (індекс
+(project, updated_at, id); зміни міток і коментарів теж оновлюють
+Task.updated_at – task.signals), плюс видалені з того ж моменту – з журналу
+переходів (task.transitions) рядком з deleted = true. Заголовок
+X-Export-Next-Since – значення since для наступного експорту: момент
+початку цього мінус EXPORT_SINCE_OVERLAP (транзакції, що комітяться під
+час експорту, потраплять у наступний; дублікати за id споживач ігнорує).
+"""
+
+import csv
+import datetime
+import io
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.duration import duration_string
+from rest_framework.renderers import BaseRenderer
+
+from .models import Comment, Task, TaskTransition
+
+
+EXPORT_CHUNK_SIZE = 2000
+# Скільки рядків збирати в одну порцію StreamingHttpResponse
+EXPORT_FLUSH_ROWS = 500
+EXPORT_SINCE_OVERLAP = datetime.timedelta(minutes=1)
+
+CSV_FIELDS = (
+    'id', 'title', 'description', 'column_id', 'column', 'is_complete', 'assignee_id', 'assignee',
+    'due_date', 'created_at', 'updated_at', 'estimated_time', 'time_spent', 'labels', 'comments', 'deleted',
+)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Лише для узгодження формату (?format=csv або Accept: text/csv) – дані експорту
+    йдуть StreamingHttpResponse. Помилки (403, 400) віддаються як JSON-текст.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+class NDJSONRenderer(CSVRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def export_queryset(project, since=None, comments=False):
+    tasks = (
+        Task.objects
+            .filter(project=project)
+            .select_related('column', 'assigned_to')
+            .only('id', 'title', 'description', 'is_complete', 'due_date', 'created_at', 'updated_at',
+                  'estimated_time', 'time_spent', 'project', 'column', 'column__name',
+                  'assigned_to', 'assigned_to__username')
+            .prefetch_related('labels')
+            .order_by('updated_at', 'id')
+    )
+    if since is not None:
+        tasks = tasks.filter(updated_at__gte=since)
+    if comments:
+        tasks = tasks.prefetch_related(Prefetch(
+            'comments', queryset=Comment.objects.select_related('user').only(
+                'id', 'task', 'text', 'created_at', 'user__username').order_by('created_at', 'id'),
+        ))
+    return tasks
+
+
+def task_record(task, comments=False):
+    record = {
+        'id': task.pk,
+        'title': task.title,
+        'description': task.description,
+        'column_id': task.column_id,
+        'column': task.column.name,
+        'is_complete': task.is_complete,
+        'assignee_id': task.assigned_to_id,
+        'assignee': task.assigned_to.username if task.assigned_to_id else None,
+        'due_date': task.due_date,
+        'created_at': task.created_at,
+        'updated_at': task.updated_at,
+        'estimated_time': duration_string(task.estimated_time) if task.estimated_time is not None else None,
+        'time_spent': duration_string(task.time_spent),
+        'labels': [label.name for label in task.labels.all()],
+        'deleted': False,
+    }
+    if comments:
+        record['comments'] = [
+            {'id': c.pk, 'user': c.user.username, 'text': c.text, 'created_at': c.created_at}
+            for c in task.comments.all()
+        ]
+    return record
+
+
+def deleted_records(project, since):
+    """Задачі проєкту, видалені з моменту since (range scan за (project, at))."""
+    task_ids = (
+        TaskTransition.objects
+            .filter(project=project, at__gte=since, to_column__isnull=True)
+            .order_by('at', 'id')
+            .values_list('task_id', flat=True)
+    )
+    return ({'id': task_id, 'deleted': True} for task_id in task_ids)
+
+
+def records(project, since=None, comments=False):
+    for task in export_queryset(project, since, comments).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield task_record(task, comments)
+    if since is not None:
+        yield from deleted_records(project, since)
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        row = dict(row)
+        for field in ('due_date', 'created_at', 'updated_at'):
+            if row.get(field) is not None:
+                row[field] = row[field].isoformat()
+        if 'labels' in row:
+            row['labels'] = ';'.join(row['labels'])
+        if 'comments' in row:
+            row['comments'] = json.dumps(row['comments'], cls=DjangoJSONEncoder, ensure_ascii=False)
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # лише заголовок, якщо рядків немає
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _batched(lines, size=EXPORT_FLUSH_ROWS):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream(project, output, since=None, comments=False):
+    """Ітератор порцій тексту для StreamingHttpResponse; output – 'csv' або 'ndjson'."""
+    lines = _csv_lines if output == 'csv' else _ndjson_lines
+    return _batched(lines(records(project, since, comments)))
+
+
+async def astream(project, output, since=None, comments=False):
+    """
+    Те саме для ASGI. Синхронний ітератор Django там збирає повністю
+    (sync_to_async(list)), тож кожну порцію читаємо окремим sync_to_async –
+    у пам'яті лише одна порція. thread_sensitive: курсор живе в з'єднанні
+    одного потоку, тож і всі next() – у ньому.
+    """
+    chunks = stream(project, output, since, comments)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # клієнт відключився – закриваємо server-side курсор у тому ж потоці
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def next_since(started):
+    return started - EXPORT_SINCE_OVERLAP
+
+
+def parse_since(value):
+    """datetime з ISO-рядка (наївний – у поточній часовій зоні) або None, якщо формат невірний."""
+    try:
+        since = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return timezone.make_aware(since) if timezone.is_naive(since) else since
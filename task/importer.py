@@ -0,0 +1,433 @@
+# file: task/importer.py
+"""
+Масовий імпорт задач (CSV/NDJSON) через staging-таблицю та COPY.
+
+1. load(): файл читається потоково, кожен рядок перевіряється й приводиться
+   до типів у Python і пачками по LOAD_CHUNK_ROWS іде в TaskImportRow одним
+   COPY FROM STDIN. TaskImport і staging-рядки створюються в одній транзакції –
+   імпорт або завантажено повністю, або його немає. Невалідні рядки
+   пропускаються (skipped_rows, перші MAX_ERRORS – у errors).
+2. run(): колонки, мітки й виконавці зіставляються set-based SQL (відсутні
+   колонки й мітки створюються; з members_only – виконавці й автори коментарів
+   лише серед учасників проєкту, решта – NULL / той, хто імпортує, з помилкою
+   в errors), потім рядки пакетами по IMPORT_BATCH_SIZE
+   переносяться в Task, Task.labels і Comment запитами INSERT ... SELECT.
+   id задач беруться з послідовності task_task і записуються в staging у тій
+   самій транзакції, що й вставка, – тож перерваний імпорт продовжується з
+   першого рядка без task_id, без дублікатів.
+
+Формат рядка – той самий, що віддає експорт (task.export): title, description,
+column, labels (список або "a;b" у CSV), assignee (username або email),
+due_date, created_at, is_complete, estimated_time, time_spent, comments
+(список {"user", "text", "created_at"} або JSON-рядок у CSV).
+
+Сигнали Task тут не спрацьовують, тож лічильники (task.counters, task.labels)
+збільшуються тими ж запитами, що й вставка, rollup-и аналітики
+перераховуються для проєкту, журнал переходів отримує переходи створення,
+а версія дошки й теги кешу відповідей (task.response_cache) піднімаються явно.
+"""
+
+import csv
+import io
+import json
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_duration
+
+from . import analytics, response_cache
+from .models import Column, TaskImport, TaskImportRow
+from .ordering import ORDER_GAP
+from .signals import bump_board_version_on_commit
+
+
+LOAD_CHUNK_ROWS = 20000
+IMPORT_BATCH_SIZE = 5000
+MAX_ERRORS = 100
+DEFAULT_COLUMN = 'To do'
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 'done'}
+
+# Ключ pg_try_advisory_lock: (клас, id імпорту) – один виконавець на імпорт
+ADVISORY_LOCK_CLASS = 7021
+
+# Користувач u – учасник проєкту (або імпорт не обмежено учасниками)
+MEMBER_SQL = """(NOT %(members_only)s OR EXISTS (
+    SELECT 1 FROM task_project_users pu WHERE pu.project_id = %(project)s AND pu.user_id = u.id))"""
+
+STAGING_COLUMNS = (
+    'task_import_id', 'line_no', 'title', 'description', 'column_name', 'labels', 'assignee',
+    'due_date', 'created_at', 'is_complete', 'estimated_time', 'time_spent', 'comments',
+)
+
+
+class RowError(ValueError):
+    pass
+
+
+# --- читання файлу ---
+
+def read_records(stream, fmt):
+    """(номер рядка, dict) з текстового потоку CSV або NDJSON."""
+    if fmt == 'csv':
+        for line_no, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_no, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, None
+            continue
+        yield line_no, record if isinstance(record, dict) else None
+
+
+def _text(record, field, max_length=None):
+    value = record.get(field)
+    value = '' if value is None else str(value).strip()
+    if max_length and len(value) > max_length:
+        raise RowError(f'{field}: довше за {max_length} символів')
+    return value
+
+
+def _datetime(record, field):
+    value = _text(record, field)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise RowError(f'{field}: очікується дата й час ISO 8601')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _duration(record, field):
+    value = _text(record, field)
+    if not value:
+        return None
+    parsed = parse_duration(value)
+    if parsed is None:
+        raise RowError(f'{field}: очікується тривалість ("HH:MM:SS", "1 02:00:00" або ISO 8601)')
+    return parsed
+
+
+def _list(record, field, separator=';'):
+    value = record.get(field)
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        if field == 'comments':
+            try:
+                value = json.loads(value)
+            except ValueError:
+                raise RowError(f'{field}: очікується JSON-список')
+        else:
+            value = value.split(separator)
+    if not isinstance(value, list):
+        raise RowError(f'{field}: очікується список')
+    return value
+
+
+def normalize(record, default_column):
+    """dict з файлу → значення staging-рядка (STAGING_COLUMNS[2:]) або RowError."""
+    if record is None:
+        raise RowError('рядок не є JSON-об\'єктом')
+    title = _text(record, 'title', 255)
+    if not title:
+        raise RowError('title: обов\'язкове поле')
+    labels = list(dict.fromkeys(str(name).strip()[:50] for name in _list(record, 'labels') if str(name).strip()))
+    comments = []
+    for comment in _list(record, 'comments'):
+        if not isinstance(comment, dict) or not str(comment.get('text') or '').strip():
+            raise RowError('comments: кожен коментар – об\'єкт з непорожнім text')
+        created_at = _datetime(comment, 'created_at')
+        comments.append({
+            'user': str(comment.get('user') or ''),
+            'text': str(comment['text']),
+            'created_at': created_at.isoformat() if created_at else None,
+        })
+    return (
+        title,
+        _text(record, 'description'),
+        _text(record, 'column', 100) or default_column,
+        labels,
+        _text(record, 'assignee', 254),
+        _datetime(record, 'due_date'),
+        _datetime(record, 'created_at'),
+        _text(record, 'is_complete').lower() in TRUE_VALUES,
+        _duration(record, 'estimated_time'),
+        _duration(record, 'time_spent'),
+        comments or None,
+    )
+
+
+# --- COPY ---
+
+def _copy_text(value):
+    """Значення в текстовому форматі COPY (NULL – \\N)."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif isinstance(value, list):
+        value = '{' + ','.join('"' + item.replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value) + '}'
+    elif hasattr(value, 'total_seconds'):
+        value = f'{value.total_seconds()} seconds'
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy_rows(cursor, lines):
+    if not lines:
+        return
+    buffer = io.StringIO(''.join(lines))
+    table = connection.ops.quote_name(TaskImportRow._meta.db_table)
+    cursor.copy_expert(f'COPY {table} ({", ".join(STAGING_COLUMNS)}) FROM STDIN', buffer)
+
+
+def load(project, stream, fmt, user=None, members_only=False):
+    """
+    Створює TaskImport і завантажує рядки файлу в staging (COPY пачками).
+    members_only – виконавці й автори коментарів лише з учасників проєкту
+    (імпорт через API: інакше учасник міг би призначати задачі стороннім
+    і писати коментарі від імені будь-якого користувача).
+    Повертає TaskImport зі статусом LOADED.
+    """
+    first_column = Column.objects.filter(project=project).order_by('order', 'id').values_list('name', flat=True).first()
+    default_column = first_column or DEFAULT_COLUMN
+    with transaction.atomic():
+        task_import = TaskImport.objects.create(project=project, created_by=user, format=fmt,
+                                                members_only=members_only)
+        total = skipped = 0
+        errors, lines = [], []
+        with connection.cursor() as cursor:
+            for line_no, record in read_records(stream, fmt):
+                total += 1
+                try:
+                    values = normalize(record, default_column)
+                except RowError as error:
+                    skipped += 1
+                    if len(errors) < MAX_ERRORS:
+                        errors.append({'line': line_no, 'error': str(error)})
+                    continue
+                values = (task_import.pk, line_no, *values[:10], json.dumps(values[10]) if values[10] else None)
+                lines.append('\t'.join(_copy_text(value) for value in values) + '\n')
+                if len(lines) >= LOAD_CHUNK_ROWS:
+                    _copy_rows(cursor, lines)
+                    lines = []
+            _copy_rows(cursor, lines)
+        task_import.total_rows, task_import.skipped_rows, task_import.errors = total, skipped, errors
+        task_import.save(update_fields=['total_rows', 'skipped_rows', 'errors'])
+    return task_import
+
+
+# --- перенесення в Task ---
+
+def _resolve(cursor, task_import):
+    """
+    Колонки, мітки й виконавці для всіх ще не перенесених рядків – set-based SQL.
+    Повертає помилки для errors: виконавці й автори коментарів поза проєктом (members_only).
+    """
+    params = {'import': task_import.pk, 'project': task_import.project_id, 'gap': ORDER_GAP,
+              'members_only': task_import.members_only}
+    # відсутні колонки – у кінець дошки, у порядку першої появи у файлі
+    cursor.execute("""
+        INSERT INTO task_column (name, project_id, "order", task_count)
+        SELECT s.column_name, %(project)s,
+               (SELECT COALESCE(MAX("order"), 0) FROM task_column WHERE project_id = %(project)s)
+                   + ROW_NUMBER() OVER (ORDER BY MIN(s.line_no)) * %(gap)s,
+               0
+          FROM task_taskimportrow s
+         WHERE s.task_import_id = %(import)s AND s.task_id IS NULL
+           AND NOT EXISTS (SELECT 1 FROM task_column c
+                            WHERE c.project_id = %(project)s AND c.name = s.column_name)
+         GROUP BY s.column_name
+    """, params)
+    cursor.execute("""
+        UPDATE task_taskimportrow s SET column_id = c.id
+          FROM (SELECT DISTINCT ON (name) id, name FROM task_column
+                 WHERE project_id = %(project)s ORDER BY name, id) c
+         WHERE s.task_import_id = %(import)s AND s.task_id IS NULL AND c.name = s.column_name
+    """, params)
+    cursor.execute("""
+        INSERT INTO task_label (project_id, name, task_count)
+        SELECT DISTINCT %(project)s, n.name, 0
+          FROM task_taskimportrow s CROSS JOIN LATERAL unnest(s.labels) AS n(name)
+         WHERE s.task_import_id = %(import)s AND s.task_id IS NULL
+        ON CONFLICT (project_id, name) DO NOTHING
+    """, params)
+    # виконавці: спершу за username, потім за email
+    cursor.execute(f"""
+        UPDATE task_taskimportrow s SET assignee_id = u.id
+          FROM auth_user u
+         WHERE s.task_import_id = %(import)s AND s.task_id IS NULL AND s.assignee <> ''
+           AND u.username = s.assignee AND {MEMBER_SQL}
+    """, params)
+    cursor.execute(f"""
+        UPDATE task_taskimportrow s SET assignee_id = u.id
+          FROM (SELECT DISTINCT ON (email) id, email FROM auth_user u
+                 WHERE email <> '' AND {MEMBER_SQL} ORDER BY email, id) u
+         WHERE s.task_import_id = %(import)s AND s.task_id IS NULL AND s.assignee_id IS NULL
+           AND s.assignee LIKE '%%@%%' AND u.email = s.assignee
+    """, params)
+    if not task_import.members_only:
+        return []
+    cursor.execute("""
+        SELECT line_no, 'assignee: ' || assignee || ' не є учасником проєкту – без виконавця'
+          FROM task_taskimportrow
+         WHERE task_import_id = %(import)s AND task_id IS NULL AND assignee <> '' AND assignee_id IS NULL
+        UNION ALL
+        SELECT s.line_no, 'comments: ' || (c->>'user') || ' не є учасником проєкту – автор той, хто імпортує'
+          FROM task_taskimportrow s
+         CROSS JOIN LATERAL jsonb_array_elements(s.comments) AS c
+         WHERE s.task_import_id = %(import)s AND s.task_id IS NULL AND s.comments IS NOT NULL
+           AND c->>'user' <> ''
+           AND NOT EXISTS (SELECT 1 FROM auth_user u
+                            JOIN task_project_users pu ON pu.user_id = u.id AND pu.project_id = %(project)s
+                           WHERE u.username = c->>'user')
+         ORDER BY 1, 2
+    """, params)
+    return [{'line': line_no, 'error': error} for line_no, error in cursor.fetchall()]
+
+
+def _import_batch(cursor, task_import):
+    """Переносить наступний пакет рядків; повертає кількість перенесених (0 – усе)."""
+    params = {
+        'import': task_import.pk, 'project': task_import.project_id, 'gap': ORDER_GAP,
+        'batch': IMPORT_BATCH_SIZE, 'user': task_import.created_by_id, 'members_only': task_import.members_only,
+    }
+    # id задач – з послідовності task_task, одразу в staging (маркер "перенесено")
+    cursor.execute("""
+        UPDATE task_taskimportrow s SET task_id = nextval(pg_get_serial_sequence('task_task', 'id'))
+          FROM (SELECT id FROM task_taskimportrow
+                 WHERE task_import_id = %(import)s AND task_id IS NULL
+                 ORDER BY line_no LIMIT %(batch)s) b
+         WHERE s.id = b.id
+     RETURNING s.id
+    """, params)
+    params['rows'] = [row[0] for row in cursor.fetchall()]
+    if not params['rows']:
+        return 0
+    # задачі, Column.task_count і Project.open_task_count (task.counters) – одним запитом
+    cursor.execute("""
+        WITH inserted AS (
+            INSERT INTO task_task (id, title, description, created_at, updated_at, due_date, is_complete,
+                                   assigned_to_id, project_id, column_id, "order", estimated_time, time_spent,
+                                   comment_count)
+            SELECT s.task_id, s.title, s.description, COALESCE(s.created_at, now()), now(), s.due_date,
+                   s.is_complete, s.assignee_id, %(project)s, s.column_id,
+                   COALESCE(m.last, 0) + ROW_NUMBER() OVER (PARTITION BY s.column_id ORDER BY s.line_no) * %(gap)s,
+                   s.estimated_time, COALESCE(s.time_spent, interval '0'), 0
+              FROM task_taskimportrow s
+              LEFT JOIN (SELECT column_id, MAX("order") AS last FROM task_task
+                          WHERE project_id = %(project)s GROUP BY column_id) m ON m.column_id = s.column_id
+             WHERE s.id = ANY(%(rows)s)
+            RETURNING column_id, is_complete
+        ), columns AS (
+            UPDATE task_column c SET task_count = c.task_count + n.count
+              FROM (SELECT column_id, COUNT(*) AS count FROM inserted GROUP BY column_id) n
+             WHERE c.id = n.column_id
+        )
+        UPDATE task_project SET open_task_count = open_task_count + (SELECT COUNT(*) FROM inserted WHERE NOT is_complete)
+         WHERE id = %(project)s
+    """, params)
+    # зв'язки з мітками й Label.task_count – одним запитом
+    cursor.execute("""
+        WITH linked AS (
+            INSERT INTO task_task_labels (task_id, label_id)
+            SELECT s.task_id, l.id
+              FROM task_taskimportrow s
+             CROSS JOIN LATERAL unnest(s.labels) AS n(name)
+              JOIN task_label l ON l.project_id = %(project)s AND l.name = n.name
+             WHERE s.id = ANY(%(rows)s)
+            RETURNING label_id
+        )
+        UPDATE task_label l SET task_count = l.task_count + c.n
+          FROM (SELECT label_id, COUNT(*) AS n FROM linked GROUP BY label_id) c
+         WHERE l.id = c.label_id
+    """, params)
+    # автор коментаря – за username (з members_only – лише учасник проєкту), інакше той,
+    # хто запустив імпорт (без нього – коментар пропускається)
+    cursor.execute(f"""
+        WITH inserted AS (
+            INSERT INTO task_comment (task_id, user_id, text, created_at)
+            SELECT s.task_id, COALESCE(u.id, %(user)s), c->>'text', COALESCE((c->>'created_at')::timestamptz, now())
+              FROM task_taskimportrow s
+             CROSS JOIN LATERAL jsonb_array_elements(s.comments) AS c
+              LEFT JOIN auth_user u ON u.username = c->>'user' AND {MEMBER_SQL}
+             WHERE s.id = ANY(%(rows)s) AND s.comments IS NOT NULL AND COALESCE(u.id, %(user)s) IS NOT NULL
+            RETURNING task_id
+        )
+        UPDATE task_task t SET comment_count = n.count
+          FROM (SELECT task_id, COUNT(*) AS count FROM inserted GROUP BY task_id) n
+         WHERE t.id = n.task_id
+    """, params)
+    # переходи створення для CFD / lead time (task.reports)
+    cursor.execute("""
+        INSERT INTO task_tasktransition (project_id, task_id, from_column, to_column,
+                                         from_complete, to_complete, at)
+        SELECT %(project)s, s.task_id, NULL, s.column_id, NULL, s.is_complete, now()
+          FROM task_taskimportrow s
+         WHERE s.id = ANY(%(rows)s)
+    """, params)
+    return len(params['rows'])
+
+
+def run(import_id, progress=None):
+    """
+    Переносить staging-рядки імпорту в задачі (або продовжує перерваний імпорт).
+    progress(task_import) викликається після кожного пакета. Повертає TaskImport.
+    """
+    task_import = TaskImport.objects.select_related('project').get(pk=import_id)
+    if task_import.status == TaskImport.DONE:
+        return task_import
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [ADVISORY_LOCK_CLASS, task_import.pk])
+        if not cursor.fetchone()[0]:
+            return task_import  # імпорт уже виконує інший процес
+        try:
+            TaskImport.objects.filter(pk=task_import.pk).update(status=TaskImport.IMPORTING)
+            task_import.status = TaskImport.IMPORTING
+            try:
+                with transaction.atomic():
+                    unresolved = _resolve(cursor, task_import)
+                    # продовження імпорту знову знаходить ті самі рядки – без дублікатів
+                    new_errors = [error for error in unresolved if error not in task_import.errors]
+                    if new_errors:
+                        task_import.errors = [*task_import.errors, *new_errors][:MAX_ERRORS]
+                        task_import.save(update_fields=['errors'])
+                while True:
+                    with transaction.atomic():
+                        imported = _import_batch(cursor, task_import)
+                        if imported:
+                            task_import.imported_rows += imported
+                            task_import.save(update_fields=['imported_rows'])
+                    if not imported:
+                        break
+                    if progress:
+                        progress(task_import)
+                with transaction.atomic():
+                    analytics.rebuild([task_import.project_id])
+                    bump_board_version_on_commit(task_import.project_id)
+                    response_cache.invalidate_on_commit([
+                        response_cache.columns_tag(task_import.project_id), response_cache.COLUMNS_TAG,
+                        response_cache.labels_tag(task_import.project_id),
+                    ])
+                    TaskImportRow.objects.filter(task_import=task_import).delete()
+                    task_import.status, task_import.finished_at = TaskImport.DONE, timezone.now()
+                    task_import.save(update_fields=['status', 'finished_at'])
+            except Exception as error:
+                # перенесені пакети лишаються; повторний run() продовжить з решти
+                task_import.status = TaskImport.FAILED
+                task_import.errors = [*task_import.errors, {'line': None, 'error': str(error)}][-MAX_ERRORS:]
+                task_import.save(update_fields=['status', 'errors'])
+                raise
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [ADVISORY_LOCK_CLASS, task_import.pk])
+    if progress:
+        progress(task_import)
+    return task_import
@@ -0,0 +1,42 @@
+# file: task/labels.py
+"""
+Лічильник задач міток (Label.task_count).
+
+Змінюється атомарно через F() (UPDATE ... SET task_count = task_count + n):
+сигнали Task.labels (m2m_changed) і видалення задач – у task.signals,
+bulk і імпорт, що обходять сигнали, – явно. refresh_task_counts()
+перераховує лічильники з task_task_labels (ремонт розбіжностей).
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Label, Task
+
+
+def adjust_task_counts(deltas):
+    """deltas – {label_id: зміна}; по одному UPDATE на кожне різне значення зміни."""
+    by_delta = defaultdict(list)
+    for label_id, delta in Counter(deltas).items():
+        if delta:
+            by_delta[delta].append(label_id)
+    for delta, label_ids in by_delta.items():
+        Label.objects.filter(pk__in=label_ids).update(task_count=F('task_count') + delta)
+
+
+def refresh_task_counts(project_ids=None):
+    """Перераховує task_count (усіх міток або міток проєктів); повертає кількість виправлених."""
+    counts = (
+        Task.labels.through.objects
+            .filter(label_id=OuterRef('pk'))
+            .values('label_id')
+            .annotate(count=Count('*'))
+            .values('count')
+    )
+    labels = Label.objects.all()
+    if project_ids is not None:
+        labels = labels.filter(project_id__in=project_ids)
+    live = Coalesce(Subquery(counts), Value(0))
+    return labels.exclude(task_count=live).update(task_count=live)
@@ -0,0 +1,97 @@
+# file: task/management/commands/bench_auth.py
+
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils.module_loading import import_string
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from task.authentication import ClaimsRefreshToken
+from task.models import Project, Column, Task
+
+
+MODES = {
+    # (клас автентифікації, клас токена)
+    'db': ('rest_framework_simplejwt.authentication.JWTAuthentication', RefreshToken),
+    'claims': ('task.authentication.ClaimsJWTAuthentication', ClaimsRefreshToken),
+}
+
+
+class Command(BaseCommand):
+    """
+    Мікробенчмарк автентифікованого GET /api/tasks/ в одному процесі.
+
+    Порівнює стандартний JWTAuthentication (SELECT користувача на кожен запит)
+    з ClaimsJWTAuthentication (користувач з claims токена):
+        python manage.py bench_auth --requests 2000
+    Прогін іде в тимчасовій БД test_<NAME> (як у manage.py test і bench_consumer):
+    користувач, проєкт і відкликання токенів (TokenRevocation) зникають разом з нею.
+    """
+    help = 'Benchmark authenticated GET /api/tasks/ with database and claims-based JWT authentication.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--tasks', type=int, default=20, help='Задач у проєкті (розмір сторінки відповіді).')
+        parser.add_argument('--mode', choices=['both', *MODES], default='both')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Не питати перед видаленням наявної тестової БД.')
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=not options['interactive'], serialize=False)
+        try:
+            user = User.objects.create_user(username='bench-auth', password='bench')
+            project = Project.objects.create(name='bench-auth', description='')
+            project.users.add(user)
+            column = Column.objects.create(project=project, name='To do', order=1 << 16)
+            Task.objects.bulk_create(
+                Task(title=f'bench-{i}', description='', project=project, column=column, order=(i + 1) << 16)
+                for i in range(options['tasks'])
+            )
+            modes = list(MODES) if options['mode'] == 'both' else [options['mode']]
+            for mode in modes:
+                self.report(mode, self.run(mode, user, options['requests']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, mode, user, requests):
+        authentication, token_class = MODES[mode]
+        token = str(token_class.for_user(user).access_token)
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        # authentication_classes читаються з налаштувань під час імпорту APIView,
+        # тож override_settings(REST_FRAMEWORK=...) їх не змінить – підміняємо атрибут
+        with override_settings(ALLOWED_HOSTS=['testserver']), \
+                mock.patch.object(APIView, 'authentication_classes', [import_string(authentication)]):
+            # прогрів: кеші членства/користувача, імпорти
+            for _ in range(10):
+                assert client.get('/api/tasks/').status_code == 200
+            # CaptureQueriesContext тут не підходить: request_started очищає connection.queries
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                client.get('/api/tasks/')
+
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get('/api/tasks/')
+            seconds = time.perf_counter() - started
+
+        return {
+            'requests': requests,
+            'seconds': seconds,
+            'rps': requests / seconds,
+            'queries': len(queries),
+            'user_queries': sum('FROM "auth_user"' in sql for sql in queries),
+        }
+
+    def report(self, mode, result):
+        self.stdout.write(
+            f"auth={mode}: {result['requests']} requests in {result['seconds']:.3f}s -> "
+            f"{result['rps']:.0f} req/s, {result['queries']} queries/request "
+            f"({result['user_queries']} on auth_user)"
+        )
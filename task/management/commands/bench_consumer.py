@@ -0,0 +1,147 @@
+# file: task/management/commands/bench_consumer.py
+
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.urls import re_path
+from django.utils.module_loading import import_string
+
+from task.models import Project, Column, Task
+
+
+class Command(BaseCommand):
+    """
+    Мікробенчмарк ProjectConsumer в одному процесі (тобто на один воркер).
+
+    Відкриває --connections WebSocket-з'єднань, розподілених між --projects
+    дошками, і кожне з'єднання надсилає --messages дій. Рахує, скільки
+    з'єднань/с встановлюється і скільки дій/с обробляється (дія вважається
+    обробленою, коли її кадр отримали всі учасники групи).
+    Використовується in-memory channel layer, тож вимірюється саме консюмер.
+    З --coalesce-ms > 0 дії групи зливаються в кадри events_batch; тоді час
+    дій включає очікування тиші наприкінці, а показовою є кількість кадрів.
+
+    Абсолютні числа залежать від машини, тож порівнюйте прогони на одній машині
+    з однаковими параметрами (--coalesce-ms, --action тощо):
+        python manage.py bench_consumer --action move_task
+    --consumer – шлях до іншої реалізації того самого протоколу, якщо її треба виміряти.
+
+    Прогін іде в тимчасовій БД test_<NAME> (як у manage.py test), яка
+    створюється на початку й видаляється наприкінці; робоча БД не змінюється.
+    """
+    help = 'Benchmark ProjectConsumer: connections and messages per second per worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', default='task.consumers.ProjectConsumer')
+        parser.add_argument('--connections', type=int, default=200)
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--messages', type=int, default=10, help='Дій на одне з\'єднання.')
+        parser.add_argument('--action', choices=['echo', 'move_task'], default='echo')
+        parser.add_argument('--coalesce-ms', type=int, default=0,
+                            help='BOARD_EVENT_COALESCE_MS під час прогону (0 – кадр на кожну дію).')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Не питати перед видаленням наявної тестової БД.')
+
+    def handle(self, *args, **options):
+        consumer = import_string(options['consumer'])
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=not options['interactive'], serialize=False)
+        try:
+            projects = self.create_projects(options['projects'], options['connections'])
+            layers = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer',
+                                  'CONFIG': {'capacity': 100_000}}}
+            with override_settings(CHANNEL_LAYERS=layers, BOARD_EVENT_COALESCE_MS=options['coalesce_ms']):
+                result = async_to_sync(self.run)(consumer, projects, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write(
+            f"consumer={options['consumer']} action={options['action']} "
+            f"connections={result['connections']} messages={result['messages']}\n"
+            f"  connect: {result['connect_seconds']:.3f}s -> {result['connections_per_second']:.0f} conn/s\n"
+            f"  actions: {result['message_seconds']:.3f}s -> {result['messages_per_second']:.0f} msg/s "
+            f"({result['frames']} frames delivered, {result['frames_per_second']:.0f} frames/s)"
+        )
+
+    def create_projects(self, count, connections):
+        projects = []
+        for i in range(count):
+            project = Project.objects.create(name=f'bench-{i}', description='')
+            column = Column.objects.create(project=project, name='To do', order=1 << 16)
+            # по задачі на кожне з'єднання проєкту, щоб move_task не конкурували за одну картку
+            tasks = Task.objects.bulk_create(
+                Task(title=f'bench-{j}', description='', project=project, column=column, order=(j + 1) << 16)
+                for j in range(connections // count + 1)
+            )
+            projects.append((project, column, [t.id for t in tasks]))
+        return projects
+
+    async def run(self, consumer, projects, options):
+        application = URLRouter([
+            re_path(r'^ws/projects/(?P<project_id>\d+)/$', consumer.as_asgi()),
+        ])
+        members = []
+        for i in range(options['connections']):
+            project, column, task_ids = projects[i % len(projects)]
+            members.append((project, column, task_ids[i // len(projects)]))
+
+        communicators = [
+            WebsocketCommunicator(application, f'/ws/projects/{project.id}/')
+            for project, _, _ in members
+        ]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(c.connect(timeout=60) for c in communicators))
+        connect_seconds = time.perf_counter() - started
+        assert all(connected for connected, _ in results), 'not all connections were accepted'
+
+        group_size = {}
+        for project, _, _ in members:
+            group_size[project.id] = group_size.get(project.id, 0) + 1
+
+        async def client(communicator, project, column, task_id):
+            for n in range(options['messages']):
+                if options['action'] == 'move_task':
+                    content = {'action': 'move_task', 'task_id': task_id,
+                               'new_column': column.id, 'new_order': n % 3 + 1}
+                else:
+                    content = {'action': 'ping', 'n': n}
+                await communicator.send_json_to(content)
+            # кожна дія будь-якого учасника групи приходить і нам
+            expected = group_size[project.id] * options['messages']
+            if not options['coalesce_ms']:
+                for _ in range(expected):
+                    await communicator.receive_json_from(timeout=120)
+                return expected
+            # зі злиттям кількість кадрів заздалегідь невідома – читаємо, доки група не затихне
+            frames = 0
+            while frames == 0 or not await communicator.receive_nothing(timeout=max(0.5, options['coalesce_ms'] / 100)):
+                await communicator.receive_json_from(timeout=120)
+                frames += 1
+            return frames
+
+        started = time.perf_counter()
+        frames = await asyncio.gather(*(
+            client(c, *member) for c, member in zip(communicators, members)
+        ))
+        message_seconds = time.perf_counter() - started
+
+        await asyncio.gather(*(c.disconnect() for c in communicators))
+
+        messages = options['connections'] * options['messages']
+        return {
+            'connections': options['connections'],
+            'messages': messages,
+            'connect_seconds': connect_seconds,
+            'connections_per_second': options['connections'] / connect_seconds,
+            'message_seconds': message_seconds,
+            'messages_per_second': messages / message_seconds,
+            'frames': sum(frames),
+            'frames_per_second': sum(frames) / message_seconds,
+        }
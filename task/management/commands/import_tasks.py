@@ -0,0 +1,72 @@
+# file: task/management/commands/import_tasks.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from task import importer
+from task.models import Project, TaskImport
+from task.tasks import run_task_import
+
+
+class Command(BaseCommand):
+    """
+    Масовий імпорт задач у проєкт з CSV/NDJSON (формат експорту, див. task.importer).
+
+        python manage.py import_tasks 7 tasks.ndjson                 # завантажити й імпортувати
+        python manage.py import_tasks 7 tasks.csv --user admin       # автор коментарів за замовчуванням
+        python manage.py import_tasks 7 tasks.csv --background       # перенесення – у Celery
+        python manage.py import_tasks 7 --resume 12                  # продовжити перерваний імпорт
+    """
+    help = 'Bulk import tasks into a project from a CSV or NDJSON file via a COPY staging table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', type=int)
+        parser.add_argument('path', nargs='?')
+        parser.add_argument('--format', choices=[fmt for fmt, _ in TaskImport.FORMAT_CHOICES],
+                            help='За замовчуванням – за розширенням файлу.')
+        parser.add_argument('--user', help='Username того, хто імпортує (автор коментарів без відомого автора).')
+        parser.add_argument('--resume', type=int, metavar='IMPORT_ID', help='Продовжити наявний імпорт.')
+        parser.add_argument('--background', action='store_true', help='Перенесення в задачі – через Celery.')
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options['project'])
+        except Project.DoesNotExist:
+            raise CommandError(f'Project {options["project"]} does not exist.')
+
+        if options['resume']:
+            try:
+                task_import = TaskImport.objects.get(pk=options['resume'], project=project)
+            except TaskImport.DoesNotExist:
+                raise CommandError(f'Import {options["resume"]} of project {project.pk} does not exist.')
+        else:
+            if not options['path']:
+                raise CommandError('Either a file path or --resume is required.')
+            user = None
+            if options['user']:
+                user = User.objects.filter(username=options['user']).first()
+                if user is None:
+                    raise CommandError(f'User {options["user"]} does not exist.')
+            path = options['path']
+            fmt = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                task_import = importer.load(project, stream, fmt, user)
+            self.stdout.write(
+                f'Import {task_import.pk}: loaded {task_import.total_rows - task_import.skipped_rows} rows, '
+                f'skipped {task_import.skipped_rows}.'
+            )
+            for error in task_import.errors:
+                self.stderr.write(f'line {error["line"]}: {error["error"]}')
+
+        if options['background']:
+            result = run_task_import.delay(task_import.pk)
+            self.stdout.write(f'Queued import {task_import.pk} as Celery task {result.id}.')
+            return
+
+        def progress(current):
+            self.stdout.write(f'Imported {current.imported_rows}/{current.total_rows - current.skipped_rows} rows.')
+
+        task_import = importer.run(task_import.pk, progress)
+        if task_import.status != TaskImport.DONE:
+            raise CommandError(f'Import {task_import.pk} is {task_import.status}; rerun with --resume {task_import.pk}.')
+        self.stdout.write(self.style.SUCCESS(f'Import {task_import.pk} done: {task_import.imported_rows} tasks.'))
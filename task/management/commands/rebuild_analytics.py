@@ -0,0 +1,36 @@
+# file: task/management/commands/rebuild_analytics.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task import analytics
+
+
+class Command(BaseCommand):
+    """
+    Перебудова rollup-ів аналітики (TaskRollup) з нуля та звірка з живими агрегатами Task.
+
+        python manage.py rebuild_analytics               # усі проєкти: перебудувати і звірити
+        python manage.py rebuild_analytics --project 7   # лише проєкт 7
+        python manage.py rebuild_analytics --check       # лише звірити, нічого не змінюючи
+
+    Розбіжності виводяться по кошиках; за їх наявності команда завершується з помилкою.
+    """
+    help = 'Rebuild task analytics rollups from scratch and verify them against live aggregates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help='Лише вказаний проєкт (можна повторювати).')
+        parser.add_argument('--check', action='store_true', help='Лише звірити, не перебудовуючи.')
+
+    def handle(self, *args, **options):
+        project_ids = options['projects']
+        if not options['check']:
+            buckets = analytics.rebuild(project_ids)
+            self.stdout.write(f'Rebuilt {buckets} rollup buckets.')
+
+        mismatches = analytics.check(project_ids)
+        for key, stored, live in mismatches:
+            self.stderr.write(f'bucket {key}: rollup={stored} live={live}')
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} rollup buckets differ from live aggregates.')
+        self.stdout.write(self.style.SUCCESS('Rollups match live aggregates.'))
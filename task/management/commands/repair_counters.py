@@ -0,0 +1,37 @@
+# file: task/management/commands/repair_counters.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task import counters
+
+
+class Command(BaseCommand):
+    """
+    Звірка денормалізованих лічильників (Column.task_count, Project.open_task_count,
+    Task.comment_count, Label.task_count) з живими COUNT(*) і їх ремонт.
+
+        python manage.py repair_counters               # усі проєкти: звірити й виправити
+        python manage.py repair_counters --project 7   # лише проєкт 7
+        python manage.py repair_counters --check       # лише звірити, нічого не змінюючи
+
+    Розбіжності виводяться по рядках; у режимі --check за їх наявності команда
+    завершується з помилкою.
+    """
+    help = 'Recompute denormalized counters in bulk and report drift from live counts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help='Лише вказаний проєкт (можна повторювати).')
+        parser.add_argument('--check', action='store_true', help='Лише звірити, не виправляючи.')
+
+    def handle(self, *args, **options):
+        project_ids = options['projects']
+        found = counters.drift(project_ids) if options['check'] else counters.repair(project_ids)
+        for model, pk, stored, live in found:
+            self.stderr.write(f'{model} {pk}: stored={stored} live={live}')
+        if found and options['check']:
+            raise CommandError(f'{len(found)} counters differ from live counts.')
+        if found:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(found)} counters.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Counters match live counts.'))
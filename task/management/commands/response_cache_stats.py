@@ -0,0 +1,29 @@
+# file: task/management/commands/response_cache_stats.py
+
+from django.core.management.base import BaseCommand
+
+from task import response_cache
+from task import urls  # noqa: F401 – реєструє ендпойнти з @cached_response
+
+
+class Command(BaseCommand):
+    """
+    Влучання, промахи та середній час відповіді кешованих ендпойнтів (task.response_cache).
+
+        python manage.py response_cache_stats           # показати
+        python manage.py response_cache_stats --reset   # показати й обнулити лічильники
+    """
+    help = 'Show per-endpoint hit ratio and latency of the response cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулити лічильники після виводу.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"endpoint":<16}{"hits":>10}{"misses":>10}{"ratio":>8}{"hit ms":>10}{"miss ms":>10}')
+        for endpoint, row in response_cache.stats().items():
+            ratio = '-' if row['hit_ratio'] is None else f'{row["hit_ratio"]:.1%}'
+            hit_ms = '-' if row['hit_ms'] is None else row['hit_ms']
+            miss_ms = '-' if row['miss_ms'] is None else row['miss_ms']
+            self.stdout.write(f'{endpoint:<16}{row["hits"]:>10}{row["misses"]:>10}{ratio:>8}{hit_ms:>10}{miss_ms:>10}')
+        if options['reset']:
+            response_cache.reset_stats()
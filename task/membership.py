@@ -0,0 +1,98 @@
+# file: task/membership.py
+"""
+Кеш членства в проєктах.
+
+Множина id проєктів користувача береться з Redis (кеш Django) і
+запам'ятовується на об'єкті запиту, тож усі перевірки доступу в межах
+одного запиту – це перевірка `project_id in set`, без запитів до БД.
+
+Ключ множини містить версію користувача (як board:version у task.board):
+m2m_changed на Project.users піднімає версію після коміту, а запис,
+обчислений за старою версією, просто лягає під старий ключ – гонки між
+читанням з БД і інвалідацією не дають застарілого доступу.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Project
+
+
+MEMO_ATTR = '_membership_memo'
+
+
+def _version_key(user_id):
+    return f'membership:version:{user_id}'
+
+
+def _ids_key(user_id, version):
+    return f'membership:projects:{user_id}:{version}'
+
+
+def get_membership_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_membership_version(user_id):
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def load_project_ids(user_id):
+    """frozenset id проєктів користувача (Redis → БД)."""
+    version = get_membership_version(user_id)
+    key = _ids_key(user_id, version)
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(Project.objects.filter(users=user_id).values_list('pk', flat=True))
+        cache.set(key, ids, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    return ids
+
+
+def project_ids(request, user=None):
+    """Те саме з пам'ятанням на запиті: повторні перевірки не звертаються навіть до Redis."""
+    user = user or request.user
+    memo = getattr(request, MEMO_ATTR, None)
+    if memo is None:
+        memo = {}
+        setattr(request, MEMO_ATTR, memo)
+    if user.pk not in memo:
+        memo[user.pk] = load_project_ids(user.pk)
+    return memo[user.pk]
+
+
+def is_member(request, project_id, user=None):
+    """Чи є користувач (за замовчуванням – автор запиту) учасником проєкту project_id."""
+    user = user or request.user
+    if not user.is_authenticated or project_id is None:
+        return False
+    return int(project_id) in project_ids(request, user)
+
+
+def forget(request):
+    """Скидає пам'ять запиту (після зміни членства в цьому ж запиті)."""
+    if hasattr(request, MEMO_ATTR):
+        delattr(request, MEMO_ATTR)
+
+
+def invalidate_on_commit(user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def bump():
+        for user_id in user_ids:
+            bump_membership_version(user_id)
+
+    transaction.on_commit(bump)
@@ -0,0 +1,283 @@
+# file: task/metrics.py
+"""
+Метрики продуктивності у форматі Prometheus (GET /metrics).
+
+Для кожної дії DRF-в'юшки (MetricsMiddleware) і кожної дії ProjectConsumer
+(move_task, move_column, add_column, resume) рахуються:
+
+  taskmaster_requests_total                  – кількість (з кодом відповіді / результатом)
+  taskmaster_request_duration_seconds        – гістограма латентності
+  taskmaster_db_queries_total                – кількість SQL-запитів
+  taskmaster_db_query_duration_seconds_total – сумарний час SQL-запитів
+  taskmaster_serializer_duration_seconds_total – сумарний час серіалізації (.data)
+  taskmaster_group_send_duration_seconds     – гістограма group_send (task.events)
+
+Запити й серіалізація рахуються в об'єкт Sample поточного запиту (contextvar –
+він переходить і в sync_to_async-потоки): execute_wrapper на кожному з'єднанні
+та обгортка BaseSerializer.data, що без активного Sample лише викликають
+оригінал. У реєстр процесу Sample потрапляє один раз наприкінці запиту, під
+одним блокуванням, тож накладні витрати – кілька perf_counter() на запит.
+
+Реєстр – у пам'яті процесу (як лічильники в Prometheus-клієнтах без
+multiprocess-режиму): кожен ASGI-процес віддає свої метрики, Prometheus
+скрейпить кожен процес окремо і підсумовує в запитах.
+"""
+
+import bisect
+import contextvars
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+
+# Межі кошиків гістограм (секунди)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Дії ProjectConsumer, що мають власну мітку; решта (ехо) – 'other',
+# щоб клієнт не міг роздути кількість часових рядів довільними назвами
+CONSUMER_ACTIONS = ('resume', 'move_task', 'move_column', 'add_column')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = contextvars.ContextVar('metrics_sample', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Sample:
+    """Те, що набирається за один HTTP-запит чи одне WebSocket-повідомлення."""
+    __slots__ = ('kind', 'handler', 'action', 'status', 'queries', 'query_time', 'serializer_time', 'serializing')
+
+    def __init__(self, kind, handler, action):
+        self.kind, self.handler, self.action = kind, handler, action
+        self.status = None
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+
+
+class HandlerStats:
+    __slots__ = ('statuses', 'latency', 'queries', 'query_time', 'serializer_time')
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = Histogram()
+        self.queries = 0
+        self.query_time = 0.0
+        self.serializer_time = 0.0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._handlers = {}
+            self._group_send = Histogram()
+
+    def record(self, sample, elapsed):
+        key = (sample.kind, sample.handler, sample.action)
+        with self._lock:
+            stats = self._handlers.get(key)
+            if stats is None:
+                stats = self._handlers[key] = HandlerStats()
+            stats.statuses[sample.status] = stats.statuses.get(sample.status, 0) + 1
+            stats.latency.observe(elapsed)
+            stats.queries += sample.queries
+            stats.query_time += sample.query_time
+            stats.serializer_time += sample.serializer_time
+
+    def record_group_send(self, elapsed):
+        with self._lock:
+            self._group_send.observe(elapsed)
+
+    def render(self):
+        """Текстовий формат експозиції Prometheus 0.0.4."""
+        with self._lock:
+            handlers = sorted(
+                (key, {status: count for status, count in stats.statuses.items()}, _copy(stats.latency),
+                 stats.queries, stats.query_time, stats.serializer_time)
+                for key, stats in self._handlers.items()
+            )
+            group_send = _copy(self._group_send)
+
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        family('taskmaster_requests_total', 'counter', 'Handled HTTP requests and WebSocket actions.')
+        for key, statuses, _, _, _, _ in handlers:
+            for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+                lines.append(f'taskmaster_requests_total{_labels(key, status=status)} {count}')
+        family('taskmaster_request_duration_seconds', 'histogram', 'Handler latency.')
+        for key, _, latency, _, _, _ in handlers:
+            _histogram(lines, 'taskmaster_request_duration_seconds', _labels(key), latency)
+        family('taskmaster_db_queries_total', 'counter', 'SQL queries executed by the handler.')
+        for key, _, _, queries, _, _ in handlers:
+            lines.append(f'taskmaster_db_queries_total{_labels(key)} {queries}')
+        family('taskmaster_db_query_duration_seconds_total', 'counter', 'Time spent in SQL queries.')
+        for key, _, _, _, query_time, _ in handlers:
+            lines.append(f'taskmaster_db_query_duration_seconds_total{_labels(key)} {query_time:.6f}')
+        family('taskmaster_serializer_duration_seconds_total', 'counter', 'Time spent building serializer data.')
+        for key, _, _, _, _, serializer_time in handlers:
+            lines.append(f'taskmaster_serializer_duration_seconds_total{_labels(key)} {serializer_time:.6f}')
+        family('taskmaster_group_send_duration_seconds', 'histogram', 'Channel layer group_send latency.')
+        _histogram(lines, 'taskmaster_group_send_duration_seconds', '', group_send)
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    copy = Histogram()
+    copy.buckets, copy.sum, copy.count = list(histogram.buckets), histogram.sum, histogram.count
+    return copy
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key, **extra):
+    kind, handler, action = key
+    pairs = [('kind', kind), ('handler', handler), ('action', action), *extra.items()]
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _histogram(lines, name, labels, histogram):
+    inner = labels[1:-1] + ',' if labels else ''
+    cumulative = 0
+    for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), histogram.buckets):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{inner}le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_sum{labels} {histogram.sum:.6f}')
+    lines.append(f'{name}_count{labels} {histogram.count}')
+
+
+registry = Registry()
+
+
+@contextmanager
+def measure(kind, handler, action, error_status):
+    """Один HTTP-запит чи WebSocket-повідомлення; при винятку статус – error_status."""
+    sample = Sample(kind, handler, action)
+    token = _current.set(sample)
+    started = time.perf_counter()
+    try:
+        yield sample
+    except BaseException:
+        sample.status = error_status
+        raise
+    finally:
+        _current.reset(token)
+        registry.record(sample, time.perf_counter() - started)
+
+
+def scrape_allowed(request):
+    """Bearer-токен METRICS_TOKEN, якщо його задано; інакше доступ обмежує мережа."""
+    if not settings.METRICS_TOKEN:
+        return True
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    return hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode())
+
+
+def consumer_action(action):
+    return action if action in CONSUMER_ACTIONS else 'other'
+
+
+async def timed_group_send(channel_layer, group, event):
+    started = time.perf_counter()
+    try:
+        await channel_layer.group_send(group, event)
+    finally:
+        registry.record_group_send(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """Перший у MIDDLEWARE: латентність включає решту middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with measure('http', 'unmatched', request.method.lower(), 500) as sample:
+            response = self.get_response(request)
+            sample.status = response.status_code
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sample = _current.get()
+        if sample is None:
+            return None
+        cls = getattr(view_func, 'cls', None)
+        sample.handler = cls.__name__ if cls is not None else getattr(view_func, '__name__', 'view')
+        # ViewSet: дія (list, retrieve, bulk ...) за HTTP-методом; APIView – сам метод
+        actions = getattr(view_func, 'actions', None) or {}
+        sample.action = actions.get(request.method.lower(), request.method.lower())
+        return None
+
+
+# --- збір SQL-запитів і часу серіалізації ---
+
+def _execute_wrapper(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.queries += 1
+        sample.query_time += time.perf_counter() - started
+
+
+def _connection_created(sender, connection, **kwargs):
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _timed_data(data):
+    def wrapper(serializer):
+        sample = _current.get()
+        # вкладені .data (серіалізатор усередині серіалізатора) вже враховані зовнішнім
+        if sample is None or sample.serializing:
+            return data(serializer)
+        sample.serializing = True
+        started = time.perf_counter()
+        try:
+            return data(serializer)
+        finally:
+            sample.serializer_time += time.perf_counter() - started
+            sample.serializing = False
+    return property(wrapper)
+
+
+def install():
+    """Підключає збір запитів і часу серіалізації (TaskConfig.ready)."""
+    connection_created.connect(_connection_created, dispatch_uid='task.metrics')
+    for connection in connections.all(initialized_only=True):
+        _connection_created(None, connection)
+    if not getattr(BaseSerializer.data.fget, '_metrics', False):
+        BaseSerializer.data = _timed_data(BaseSerializer.data.fget)
+        BaseSerializer.data.fget._metrics = True
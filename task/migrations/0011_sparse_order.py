@@ -0,0 +1,58 @@
+# Generated by Django 5.1.4 on 2026-10-18 02:19
+
+from django.db import migrations, models
+
+
+# Значення ordering.ORDER_GAP на момент міграції
+ORDER_GAP = 1 << 16
+
+
+def spread_order(apps, schema_editor):
+    """Перенумеровує наявні колонки та задачі з кроком ORDER_GAP, зберігаючи порядок."""
+    Column = apps.get_model('task', 'Column')
+    Task = apps.get_model('task', 'Task')
+
+    def spread(queryset, group_field, model):
+        rows, group, idx = [], object(), 0
+        ordered = queryset.order_by(group_field, 'order', 'id').only('id', group_field, 'order')
+        for row in ordered.iterator(chunk_size=2000):
+            if getattr(row, group_field) != group:
+                group, idx = getattr(row, group_field), 0
+            idx += 1
+            row.order = idx * ORDER_GAP
+            rows.append(row)
+            if len(rows) >= 2000:
+                model.objects.bulk_update(rows, ['order'])
+                rows = []
+        model.objects.bulk_update(rows, ['order'])
+
+    spread(Column.objects.all(), 'project_id', Column)
+    spread(Task.objects.all(), 'column_id', Task)
+
+
+def compact_order(apps, schema_editor):
+    Column = apps.get_model('task', 'Column')
+    Task = apps.get_model('task', 'Task')
+    for model in (Column, Task):
+        model.objects.update(order=models.F('order') / ORDER_GAP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0010_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='column',
+            name='order',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='order',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(spread_order, compact_order),
+    ]
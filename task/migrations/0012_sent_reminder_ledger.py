@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0011_sparse_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('due_tomorrow', 'Дедлайн завтра')], max_length=32)),
+                ('due_date', models.DateTimeField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sent_reminders', to='task.task')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('task', 'kind', 'due_date'), name='unique_sent_reminder')],
+            },
+        ),
+    ]
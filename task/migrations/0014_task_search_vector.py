@@ -0,0 +1,81 @@
+# Generated by Django 5.1.4 on 2026-10-18 02:46
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# Мова 'simple': тексти українською, а вбудованої української конфігурації в PostgreSQL немає.
+# Значення має збігатися з task.search.SEARCH_CONFIG.
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION task_search_vector(p_title text, p_description text, p_task_id bigint)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(p_title, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(p_description, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(
+               (SELECT string_agg(c.text, ' ') FROM task_comment c WHERE c.task_id = p_task_id), '')), 'C')
+$$ LANGUAGE sql STABLE;
+
+-- Задача: перераховуємо при вставці та зміні заголовка/опису
+CREATE OR REPLACE FUNCTION task_task_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := task_search_vector(NEW.title, NEW.description, NEW.id);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER task_task_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, description ON task_task
+    FOR EACH ROW EXECUTE FUNCTION task_task_search_vector_trigger();
+
+-- Коментар: перераховуємо вектор задачі (старої й нової, якщо коментар перенесли)
+CREATE OR REPLACE FUNCTION task_comment_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    UPDATE task_task t
+       SET search_vector = task_search_vector(t.title, t.description, t.id)
+     WHERE t.id IN (
+         CASE WHEN TG_OP <> 'DELETE' THEN NEW.task_id END,
+         CASE WHEN TG_OP <> 'INSERT' THEN OLD.task_id END
+     );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER task_comment_search_vector_update
+    AFTER INSERT OR DELETE OR UPDATE OF text, task_id ON task_comment
+    FOR EACH ROW EXECUTE FUNCTION task_comment_search_vector_trigger();
+
+UPDATE task_task SET search_vector = task_search_vector(title, description, id);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS task_comment_search_vector_update ON task_comment;
+DROP TRIGGER IF EXISTS task_task_search_vector_update ON task_task;
+DROP FUNCTION IF EXISTS task_comment_search_vector_trigger();
+DROP FUNCTION IF EXISTS task_task_search_vector_trigger();
+DROP FUNCTION IF EXISTS task_search_vector(text, text, bigint);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0013_claims_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # Тригери підтримують колонку і для bulk_create/update(), і для змін поза Django
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        # Індекс будуємо вже після заповнення колонки
+        migrations.AddIndex(
+            model_name='task',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='task_task_search__53175c_gin'),
+        ),
+    ]
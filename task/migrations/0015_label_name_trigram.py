@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 02:47
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0014_task_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='label',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='task_label_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
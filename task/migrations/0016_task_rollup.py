@@ -0,0 +1,63 @@
+# Generated by Django 5.1.4 on 2026-10-18 02:54
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DurationField, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Task = apps.get_model('task', 'Task')
+    TaskRollup = apps.get_model('task', 'TaskRollup')
+    zero = datetime.timedelta(0)
+    rows = (
+        Task.objects
+            .annotate(due_day=TruncDate('due_date'))
+            .values_list('project_id', 'column_id', 'assigned_to_id', 'is_complete', 'due_day')
+            .annotate(
+                count=Count('id'),
+                estimated=Sum(Coalesce('estimated_time', Value(zero, output_field=DurationField()))),
+                spent=Sum('time_spent'),
+            )
+            .order_by()
+    )
+    TaskRollup.objects.bulk_create(
+        (
+            TaskRollup(project_id=project_id, column_id=column_id, assignee_id=assignee_id,
+                       is_complete=is_complete, due_day=due_day,
+                       task_count=count, estimated_time=estimated or zero, time_spent=spent or zero)
+            for project_id, column_id, assignee_id, is_complete, due_day, count, estimated, spent in rows
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0015_label_name_trigram'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_complete', models.BooleanField()),
+                ('due_day', models.DateField(null=True)),
+                ('task_count', models.IntegerField(default=0)),
+                ('estimated_time', models.DurationField(default=datetime.timedelta(0))),
+                ('time_spent', models.DurationField(default=datetime.timedelta(0))),
+                ('assignee', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('column', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task.column')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task.project')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('project', 'column', 'assignee', 'is_complete', 'due_day'), name='unique_task_rollup_bucket', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 02:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0016_task_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('from_column', models.BigIntegerField(null=True)),
+                ('to_column', models.BigIntegerField(null=True)),
+                ('from_complete', models.BooleanField(null=True)),
+                ('to_complete', models.BooleanField(null=True)),
+                ('at', models.DateTimeField()),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='task.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'at'], name='task_tasktr_project_98c3fd_idx'), models.Index(fields=['task_id', 'at'], name='task_tasktr_task_id_38d293_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0017_task_transition_log'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        # Наявні задачі: момент зміни невідомий – беремо момент створення
+        migrations.RunSQL('UPDATE task_task SET updated_at = created_at', migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['project', 'updated_at', 'id'], name='task_task_project_65e076_idx'),
+        ),
+    ]
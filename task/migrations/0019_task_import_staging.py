@@ -0,0 +1,58 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:07
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0018_task_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON')], max_length=10)),
+                ('status', models.CharField(choices=[('loaded', 'Завантажено'), ('importing', 'Імпортується'), ('done', 'Готово'), ('failed', 'Помилка')], default='loaded', max_length=20)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('imported_rows', models.PositiveIntegerField(default=0)),
+                ('skipped_rows', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imports', to='task.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_no', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('column_name', models.CharField(max_length=100)),
+                ('labels', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), default=list, size=None)),
+                ('assignee', models.CharField(blank=True, max_length=254)),
+                ('due_date', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('is_complete', models.BooleanField(default=False)),
+                ('estimated_time', models.DurationField(null=True)),
+                ('time_spent', models.DurationField(null=True)),
+                ('comments', models.JSONField(null=True)),
+                ('column_id', models.BigIntegerField(null=True)),
+                ('assignee_id', models.IntegerField(null=True)),
+                ('task_id', models.BigIntegerField(null=True)),
+                ('task_import', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='task.taskimport')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('task_import', 'line_no'), name='unique_task_import_line')],
+            },
+        ),
+    ]
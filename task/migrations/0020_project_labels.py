@@ -0,0 +1,83 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Глобальні мітки → мітки проєктів. Вихідна мітка дістається проєкту з
+# найменшим id серед задач, що її використовують; для інших проєктів
+# створюються копії (однойменні мітки одного проєкту зливаються в одну).
+# Мітки, не використані жодною задачею, проєкту не мають і видаляються.
+SPLIT_LABELS = """
+UPDATE task_label l SET project_id = m.project_id
+  FROM (SELECT tl.label_id, MIN(t.project_id) AS project_id
+          FROM task_task_labels tl JOIN task_task t ON t.id = tl.task_id
+         GROUP BY tl.label_id) m
+ WHERE l.id = m.label_id;
+
+INSERT INTO task_label (project_id, name, task_count)
+SELECT DISTINCT t.project_id, l.name, 0
+  FROM task_task_labels tl
+  JOIN task_task t ON t.id = tl.task_id
+  JOIN task_label l ON l.id = tl.label_id
+ WHERE NOT EXISTS (SELECT 1 FROM task_label x WHERE x.project_id = t.project_id AND x.name = l.name);
+
+-- зв'язки задач – на мітку свого проєкту з тією ж назвою (найменший id)
+INSERT INTO task_task_labels (task_id, label_id)
+SELECT tl.task_id, x.id
+  FROM task_task_labels tl
+  JOIN task_task t ON t.id = tl.task_id
+  JOIN task_label l ON l.id = tl.label_id
+  JOIN LATERAL (SELECT id FROM task_label x
+                 WHERE x.project_id = t.project_id AND x.name = l.name
+                 ORDER BY id LIMIT 1) x ON true
+ WHERE x.id <> tl.label_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM task_task_labels tl
+ USING task_task t, task_label l
+ WHERE t.id = tl.task_id AND l.id = tl.label_id
+   AND (l.project_id IS DISTINCT FROM t.project_id
+        OR EXISTS (SELECT 1 FROM task_label x
+                    WHERE x.project_id = l.project_id AND x.name = l.name AND x.id < l.id));
+
+DELETE FROM task_label l
+ WHERE l.project_id IS NULL
+    OR EXISTS (SELECT 1 FROM task_label x
+                WHERE x.project_id = l.project_id AND x.name = l.name AND x.id < l.id);
+
+UPDATE task_label l SET task_count = c.n
+  FROM (SELECT label_id, COUNT(*) AS n FROM task_task_labels GROUP BY label_id) c
+ WHERE l.id = c.label_id;
+
+-- відкладені перевірки FK – до ALTER TABLE у цій же транзакції
+SET CONSTRAINTS ALL IMMEDIATE;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0019_task_import_staging'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='label',
+            name='project',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='labels', to='task.project'),
+        ),
+        migrations.AddField(
+            model_name='label',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(SPLIT_LABELS, reverse_sql=migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='label',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='labels', to='task.project'),
+        ),
+        migrations.AddConstraint(
+            model_name='label',
+            constraint=models.UniqueConstraint(fields=('project', 'name'), include=('id', 'task_count'), name='unique_label_project_name'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 03:21
+
+from django.db import migrations, models
+
+
+# Початкові значення лічильників – по одному set-based UPDATE на лічильник
+BACKFILL_COUNTERS = """
+UPDATE task_column c SET task_count = n.count
+  FROM (SELECT column_id, COUNT(*) AS count FROM task_task GROUP BY column_id) n
+ WHERE c.id = n.column_id;
+
+UPDATE task_project p SET open_task_count = n.count
+  FROM (SELECT project_id, COUNT(*) AS count FROM task_task WHERE NOT is_complete GROUP BY project_id) n
+ WHERE p.id = n.project_id;
+
+UPDATE task_task t SET comment_count = n.count
+  FROM (SELECT task_id, COUNT(*) AS count FROM task_comment GROUP BY task_id) n
+ WHERE t.id = n.task_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0020_project_labels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='column',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_task_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(BACKFILL_COUNTERS, reverse_sql=migrations.RunSQL.noop),
+    ]
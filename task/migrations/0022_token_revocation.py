@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Відкликання токенів пишеться в БД тим самим записом, що змінює користувача, –
+# і для save(), і для QuerySet.update()/delete() та змін поза Django.
+# clock_timestamp(), а не now(): токени, видані раніше в тій самій транзакції, теж відкликаються.
+# Має збігатися з USER_CLAIMS (task.models): зміна username чи is_staff робить claims застарілими.
+REVOKE_TOKENS_SQL = """
+CREATE OR REPLACE FUNCTION task_revoke_user_tokens_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NOT ((OLD.is_active AND NOT NEW.is_active)
+                                 OR OLD.is_staff <> NEW.is_staff OR OLD.username <> NEW.username) THEN
+        RETURN NULL;
+    END IF;
+    INSERT INTO task_tokenrevocation (user_id, revoked_at) VALUES (OLD.id, clock_timestamp())
+    ON CONFLICT (user_id) DO UPDATE SET revoked_at = EXCLUDED.revoked_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER task_revoke_user_tokens
+    AFTER UPDATE OR DELETE ON auth_user
+    FOR EACH ROW EXECUTE FUNCTION task_revoke_user_tokens_trigger();
+"""
+
+DROP_REVOKE_TOKENS_SQL = """
+DROP TRIGGER IF EXISTS task_revoke_user_tokens ON auth_user;
+DROP FUNCTION IF EXISTS task_revoke_user_tokens_trigger();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0021_denormalized_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('revoked_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunSQL(REVOKE_TOKENS_SQL, DROP_REVOKE_TOKENS_SQL),
+    ]
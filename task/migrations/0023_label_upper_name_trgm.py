@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0022_token_revocation'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='label',
+            name='task_label_name_trgm',
+        ),
+        migrations.AddIndex(
+            model_name='label',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='task_label_upper_name_trgm'),
+        ),
+    ]
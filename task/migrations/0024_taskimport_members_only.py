@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0023_label_upper_name_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskimport',
+            name='members_only',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,40 +1,129 @@
 import uuid
 from datetime import timedelta
 
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 from django.utils import timezone
 
 
+# Поля користувача, які несе JWT (див. task.authentication)
+USER_CLAIMS = ('username', 'is_staff')
+
+
+class ClaimsUser(User):
+    """
+    Користувач, відновлений з токена: лише id, username та is_staff.
+    Придатний для фільтрів ORM і FK (це User), але не для збереження.
+    """
+
+    class Meta:
+        proxy = True
+
+    def save(self, *args, **kwargs):
+        raise NotImplementedError('Token users cannot be saved; load User from the database instead.')
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        user = cls(id=user_id, is_active=True, **{claim: claims[claim] for claim in USER_CLAIMS})
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
+
+
+class TokenRevocation(models.Model):
+    """
+    Момент, до якого (включно) видані токени користувача недійсні (task.authentication).
+    Рядки пише тригер на auth_user (міграція 0022_token_revocation): деактивація,
+    зміна is_staff чи username, видалення – зокрема через QuerySet.update() і
+    bulk-дії адмінки, що обходять сигнали. Без FK: рядок має пережити видалення користувача.
+    """
+    user_id = models.IntegerField(primary_key=True)
+    revoked_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'tokens of user {self.user_id} revoked at {self.revoked_at}'
+
+
+class CounterFieldsMixin:
+    """
+    Денормалізовані лічильники змінюються лише F()-виразами (task.counters, task.labels).
+    Звичайний save() наявного рядка їх не записує – інакше значення, прочитане
+    разом з об'єктом, затерло б паралельні інкременти.
+    """
+    counter_fields = ()
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None and not self._state.adding and self.pk is not None:
+            skipped = set(self.counter_fields) | self.get_deferred_fields()
+            update_fields = [field.name for field in self._meta.concrete_fields
+                             if not field.primary_key and field.name not in skipped and field.attname not in skipped]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
 # Model for labels
-class Label(models.Model):
+class Label(CounterFieldsMixin, models.Model):
+    project = models.ForeignKey('Project', on_delete=models.CASCADE, related_name='labels')
     name = models.CharField(max_length=50)
+    # Кількість задач з міткою; підтримують сигнали Task.labels (F()-оновлення), bulk та імпорт
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ('task_count',)
+
+    class Meta:
+        constraints = [
+            # Мітки проєкту за назвою – range scan лише за цим індексом (INCLUDE – без звернення до таблиці)
+            models.UniqueConstraint(fields=['project', 'name'], include=['id', 'task_count'],
+                                    name='unique_label_project_name'),
+        ]
+        indexes = [
+            # Автодоповнення та фільтр label_name: icontains/istartswith Django компілює в
+            # UPPER(name::text) LIKE UPPER(...), тож індексуємо сам вираз (потрібне розширення pg_trgm)
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='task_label_upper_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
 # Models for Projects
-class Project(models.Model):
+class Project(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     users = models.ManyToManyField(User, related_name='projects')
+    # Незавершені задачі проєкту (task.counters)
+    open_task_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ('open_task_count',)
 
     def __str__(self):
         return self.name
 
 
+# Поля задачі, від яких залежить її внесок у TaskRollup
+TASK_ROLLUP_FIELDS = (
+    'project_id', 'column_id', 'assigned_to_id', 'is_complete', 'due_date', 'estimated_time', 'time_spent',
+)
+
+
 #Model for Tasks
-class Task(models.Model):
+class Task(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Інкрементальний експорт (?since=, task.export); bulk_update і save(update_fields=...)
+    # мають передавати його явно
+    updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateTimeField(null=True, blank=True)
     is_complete = models.BooleanField(default=False)
     assigned_to = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     labels = models.ManyToManyField('Label', related_name='tasks', blank=True)
     project = models.ForeignKey('Project', related_name='tasks', on_delete=models.CASCADE)
     column = models.ForeignKey("task.Column", on_delete=models.CASCADE, related_name='tasks')
-    order = models.PositiveIntegerField(default=0)
+    # Розріджений ключ з кроком ordering.ORDER_GAP – переміщення пише лише один рядок
+    order = models.PositiveBigIntegerField(default=0)
 
     estimated_time = models.DurationField(
         null=True,
@@ -45,22 +134,57 @@ class Task(models.Model):
         default=timedelta(0),
         help_text="Фактично витрачений час"
     )
+    # Повнотекстовий індекс (title, description, текст коментарів); підтримує тригер БД,
+    # див. міграцію 0014_task_search_vector і task.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Кількість коментарів (task.counters) – картки дошки без COUNT(*)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ('comment_count',)
 
     class Meta:
         ordering = ['order']
         indexes = [
         models.Index(fields=['due_date', 'assigned_to']),
         models.Index(fields=['column', 'order']),
+        # keyset-пагінація: ORDER BY <поле>, id
+        models.Index(fields=['created_at', 'id']),
+        models.Index(fields=['due_date', 'id']),
+        models.Index(fields=['assigned_to', 'created_at', 'id']),
+        # експорт змінених задач проєкту: WHERE project_id = ... AND updated_at >= ... ORDER BY updated_at, id
+        models.Index(fields=['project', 'updated_at', 'id']),
+        GinIndex(fields=['search_vector']),
     ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Знімок полів, від яких залежать rollup-и аналітики (task.analytics):
+        # save()/delete() знають старий кошик задачі без додаткового SELECT
+        if all(field in field_names for field in TASK_ROLLUP_FIELDS):
+            instance._rollup_state = tuple(getattr(instance, field) for field in TASK_ROLLUP_FIELDS)
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Після повного перечитування знімок має відповідати новим значенням
+        # (довантаження окремих відкладених полів його не чіпає)
+        if fields is None and not self.get_deferred_fields() & set(TASK_ROLLUP_FIELDS):
+            self._rollup_state = tuple(getattr(self, field) for field in TASK_ROLLUP_FIELDS)
+
     def __str__(self):
         return self.title
 
 # Model for Columns
-class Column(models.Model):
+class Column(CounterFieldsMixin, models.Model):
     name = models.CharField(max_length=100)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='columns')
-    order = models.PositiveIntegerField(default=0)
+    # Розріджений ключ з кроком ordering.ORDER_GAP
+    order = models.PositiveBigIntegerField(default=0)
+    # Кількість задач у колонці (task.counters)
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+
+    counter_fields = ('task_count',)
 
     class Meta:
         ordering = ['order']
@@ -74,10 +198,161 @@ class Comment(models.Model):
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset-пагінація: ORDER BY created_at, id (усі коментарі та коментарі задачі)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['task', 'created_at', 'id']),
+        ]
+
     def __str__(self):
         return f'{self.user.username} on {self.task.title}'
 
 
+class SentReminder(models.Model):
+    """
+    Журнал відправлених нагадувань. Унікальність (task, kind, due_date) робить
+    відправку ідемпотентною: повторний запуск beat чи retry не надішле лист удруге,
+    а новий дедлайн тієї ж задачі отримає власне нагадування.
+    """
+    DUE_TOMORROW = 'due_tomorrow'
+    KIND_CHOICES = [(DUE_TOMORROW, 'Дедлайн завтра')]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='sent_reminders')
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    due_date = models.DateTimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'kind', 'due_date'], name='unique_sent_reminder'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} for task {self.task_id} ({self.due_date})'
+
+
+class TaskRollup(models.Model):
+    """
+    Агрегати задач проєкту в кошику (column, assignee, is_complete, due_day).
+    Підтримуються інкрементально сигналами Task (task.analytics), перебудовуються
+    командою rebuild_analytics. assignee – без FK-обмеження: видалений користувач
+    перераховується окремо (SET_NULL у задачах не надсилає сигналів).
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    column = models.ForeignKey(Column, on_delete=models.CASCADE, related_name='+')
+    assignee = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    is_complete = models.BooleanField()
+    # Локальна дата дедлайну (TIME_ZONE); NULL – без дедлайну
+    due_day = models.DateField(null=True)
+    task_count = models.IntegerField(default=0)
+    estimated_time = models.DurationField(default=timedelta(0))
+    time_spent = models.DurationField(default=timedelta(0))
+
+    class Meta:
+        constraints = [
+            # NULLS NOT DISTINCT (PostgreSQL 15+): ON CONFLICT знаходить і кошики з NULL
+            models.UniqueConstraint(
+                fields=['project', 'column', 'assignee', 'is_complete', 'due_day'],
+                name='unique_task_rollup_bucket',
+                nulls_distinct=False,
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task_count} tasks in project {self.project_id}, column {self.column_id}'
+
+
+class TaskTransition(models.Model):
+    """
+    Append-only журнал переходів задачі між колонками та станами is_complete
+    (task.transitions). from_* = NULL – задачу створено, to_* = NULL – видалено.
+    Задачі й колонки – просто id без FK: історія переживає їх видалення.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', db_index=False)
+    task_id = models.BigIntegerField()
+    from_column = models.BigIntegerField(null=True)
+    to_column = models.BigIntegerField(null=True)
+    from_complete = models.BooleanField(null=True)
+    to_complete = models.BooleanField(null=True)
+    at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # звіти за діапазоном дат: WHERE project_id = ... AND at >= ... (range scan)
+            models.Index(fields=['project', 'at']),
+            # історія конкретних задач (cycle time)
+            models.Index(fields=['task_id', 'at']),
+        ]
+
+    def __str__(self):
+        return f'task {self.task_id}: {self.from_column} -> {self.to_column} at {self.at}'
+
+
+class TaskImport(models.Model):
+    """
+    Масовий імпорт задач у проєкт (task.importer). Рядки файлу спершу потрапляють
+    у staging-таблицю TaskImportRow (COPY), потім пакетами переносяться в Task.
+    Повторний запуск продовжує з першого не перенесеного рядка.
+    """
+    LOADED = 'loaded'
+    IMPORTING = 'importing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(LOADED, 'Завантажено'), (IMPORTING, 'Імпортується'), (DONE, 'Готово'), (FAILED, 'Помилка')]
+    FORMAT_CHOICES = [('csv', 'CSV'), ('ndjson', 'NDJSON')]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='imports')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    # Виконавці й автори коментарів – лише серед учасників проєкту (імпорт через API)
+    members_only = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=LOADED)
+    total_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    skipped_rows = models.PositiveIntegerField(default=0)
+    # Перші помилки: [{"line": N, "error": "..."}]
+    errors = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'Import {self.pk} into project {self.project_id} ({self.status})'
+
+
+class TaskImportRow(models.Model):
+    """
+    Staging-рядок імпорту: значення вже приведені до типів (task.importer.load),
+    column_id/assignee_id заповнює set-based SQL, task_id – вставка в Task
+    (NULL – рядок ще не перенесено; на цьому тримається відновлення імпорту).
+    """
+    task_import = models.ForeignKey(TaskImport, on_delete=models.CASCADE, related_name='rows', db_index=False)
+    line_no = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    column_name = models.CharField(max_length=100)
+    labels = ArrayField(models.CharField(max_length=50), default=list)
+    assignee = models.CharField(max_length=254, blank=True)
+    due_date = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(null=True)
+    is_complete = models.BooleanField(default=False)
+    estimated_time = models.DurationField(null=True)
+    time_spent = models.DurationField(null=True)
+    # [{"user": username, "text": ..., "created_at": ISO}]
+    comments = models.JSONField(null=True)
+    column_id = models.BigIntegerField(null=True)
+    assignee_id = models.IntegerField(null=True)
+    task_id = models.BigIntegerField(null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task_import', 'line_no'], name='unique_task_import_line'),
+        ]
+
+    def __str__(self):
+        return f'Import {self.task_import_id}, line {self.line_no}'
+
+
 class Invitation(models.Model):
     email = models.EmailField()
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='invitations')
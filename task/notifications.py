@@ -0,0 +1,211 @@
+# file: task/notifications.py
+"""
+Email-сповіщення.
+
+В'юшки лише формують листи й ставлять їх у чергу через queue_emails():
+Celery-завдання send_emails запускається після коміту поточної транзакції,
+тож повільний чи недоступний SMTP не впливає ні на латентність, ні на
+статус відповіді API, а лист про зміну, яку відкотили, не піде.
+Воркер тримає одне SMTP-з'єднання на процес і відправляє ним листи по одному
+(retry повторює лише ті, що ще не пішли).
+"""
+
+import logging
+import smtplib
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+
+def email(subject, body, to, html=None):
+    """Лист у вигляді, придатному для серіалізації в аргументи Celery-завдання."""
+    return {'subject': subject, 'body': body, 'to': [to] if isinstance(to, str) else list(to), 'html': html}
+
+
+def queue_emails(*messages):
+    """Відправляє листи у фоні після коміту транзакції (листи без адресатів пропускаються)."""
+    messages = [message for message in messages if any(message['to'])]
+    if not messages:
+        return
+    from .tasks import send_emails
+    transaction.on_commit(partial(send_emails.delay, messages))
+
+
+def build_message(message, connection=None):
+    mail = EmailMultiAlternatives(
+        subject=message['subject'],
+        body=message['body'],
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[address for address in message['to'] if address],
+        connection=connection,
+    )
+    if message.get('html'):
+        mail.attach_alternative(message['html'], 'text/html')
+    return mail
+
+
+class PooledConnection:
+    """
+    Одне SMTP-з'єднання на процес воркера: відкривається при першому листі
+    й перевикористовується наступними. Листи йдуть по одному: on_sent(message)
+    викликається після кожного прийнятого сервером, тож при збої посередині
+    викликач знає, що вже доставлено, і повторює лише решту. Якщо сервер
+    закрив з'єднання за простоєм, перевідкриваємо його один раз і повторюємо
+    лише поточний лист (сервер його не прийняв).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def _open(self):
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+        self._connection.open()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+    def _send_one(self, message):
+        try:
+            connection = self._open()
+            return connection.send_messages([build_message(message, connection)])
+        except smtplib.SMTPServerDisconnected:
+            logger.info('SMTP connection was closed by the server, reconnecting')
+            self.close()
+            connection = self._open()
+            return connection.send_messages([build_message(message, connection)])
+
+    def send(self, messages, on_sent=None):
+        sent = 0
+        with self._lock:
+            try:
+                for message in messages:
+                    sent += self._send_one(message)
+                    if on_sent is not None:
+                        on_sent(message)
+            except Exception:
+                # з'єднання могло лишитися в невизначеному стані – наступний лист відкриє нове
+                self.close()
+                raise
+        return sent
+
+
+smtp = PooledConnection()
+
+
+def board_url(request, project):
+    return f"{request.scheme}://{request.get_host()}/project/{project.id}/full/"
+
+
+def task_assigned(task, user, url):
+    text = (
+        f"Привіт, {user.username}!\n\n"
+        f"Вас щойно призначили на задачу «{task.title}» у проекті «{task.project.name}».\n"
+        f"Подивіться всі деталі тут:\n"
+        f"{url}\n\n"
+        "Успіхів у виконанні! 🚀"
+    )
+    html = f"""
+        <html>
+          <body style="font-family: sans-serif; line-height:1.5;">
+            <h2 style="color:#2F4F4F;">Привіт, {user.username}!</h2>
+            <p>🎉 <strong>Вас призначили</strong> на задачу
+               <em>«{task.title}»</em> у проекті
+               <strong>«{task.project.name}»</strong>.</p>
+            <p>Деталі задачі можна побачити за посиланням:</p>
+            <p>
+              <a href="{url}"
+                 style="color:#1E90FF; text-decoration:none;">
+                Перейти до проекту
+              </a>
+            </p>
+            <hr>
+            <p>Бажаємо продуктивної роботи!</p>
+          </body>
+        </html>
+    """
+    return email(f"🎉 Ви призначені на задачу «{task.title}»", text, user.email, html)
+
+
+def task_unassigned(task, user):
+    text = (
+        f"Привіт, {user.username}!\n\n"
+        f"Вас щойно зняли з задачі «{task.title}» у проекті «{task.project.name}».\n\n"
+        "Якщо це помилка — зверніться до менеджера проекту."
+    )
+    html = f"""
+        <html>
+          <body style="font-family: sans-serif; line-height:1.5;">
+            <h2 style="color:#2F4F4F;">Привіт, {user.username}!</h2>
+            <p>❌ Вас зняли з задачі
+               <strong>«{task.title}»</strong> у проекті
+               <em>«{task.project.name}»</em>.</p>
+            <p>Якщо ви вважаєте це помилкою — <a href="mailto:{settings.DEFAULT_FROM_EMAIL}"
+               style="color:#1E90FF;">напишіть нам</a>.</p>
+            <hr>
+            <p>Дякуємо, що ви з нами!</p>
+          </body>
+        </html>
+    """
+    return email(f"❌ Вас зняли із задачі «{task.title}»", text, user.email, html)
+
+
+def project_member_added(project, user, url):
+    return email(
+        f"Вас додано до проєкту «{project.name}»",
+        f"Привіт, {user.username}!\n\n"
+        f"Вас щойно додали до проєкту «{project.name}».\n"
+        f"Переглянути можна за посиланням:\n{url}",
+        user.email,
+    )
+
+
+def project_member_removed(project, user):
+    return email(
+        f"Вас видалено з проєкту «{project.name}»",
+        f"Привіт, {user.username}!\n\n"
+        f"Вас щойно видалили з проєкту «{project.name}».\n"
+        "Якщо це сталося помилково, зверніться до власника проєкту.",
+        user.email,
+    )
+
+
+def project_invitation(project, invitation, accept_url):
+    return email(
+        f"Запрошення до проекту {project.name}",
+        f"Вас запрошують приєднатися до проекту {project.name}.\n Прийміть запрошення за посиланням: {accept_url}.",
+        invitation.email,
+    )
+
+
+def deadline_digest(user, tasks, due):
+    """Один лист з усіма задачами користувача, дедлайн яких – `due`."""
+    lines = "\n".join(
+        f"  • «{task.title}» (проект «{task.project.name}»): "
+        f"http://127.0.0.1:8000/project/{task.project_id}/full/"
+        for task in tasks
+    )
+    subject = (
+        f"Нагадування: дедлайн «{tasks[0].title}» завтра" if len(tasks) == 1
+        else f"Нагадування: {len(tasks)} задач з дедлайном завтра"
+    )
+    return email(
+        subject,
+        f"Привіт, {user.username}!\n\n"
+        f"Нагадуємо, що {due} – дедлайн ваших задач:\n{lines}\n\n"
+        "Перевірте статус задач у системі.\n\n"
+        "Успіхів!",
+        user.email,
+    )
@@ -0,0 +1,149 @@
+# file: task/ordering.py
+"""
+Розріджене впорядкування Task.order / Column.order.
+
+Ключі йдуть з великим кроком (ORDER_GAP), тож переміщення картки чи колонки
+записує лише один рядок – новий ключ посередині між сусідами. Перенумерація
+(rebalance) потрібна лише тоді, коли між сусідами не лишилося вільних ключів;
+її заздалегідь запускає фонове завдання Celery, щойно проміжок стає вузьким.
+"""
+
+from django.db import connection
+from django.db.models import Max
+
+from . import response_cache
+from .models import Task, Column, Project
+from .signals import bump_board_version_on_commit
+
+
+ORDER_GAP = 1 << 16
+# Якщо після вставки проміжок до сусіда менший за це значення – плануємо rebalance
+REBALANCE_THRESHOLD = 16
+
+
+def key_between(before, after):
+    """
+    Ключ строго між `before` і `after` (None – сусіда з цього боку немає).
+    Повертає None, якщо вільних ключів не лишилося.
+    """
+    if before is None and after is None:
+        return ORDER_GAP
+    if after is None:
+        return before + ORDER_GAP
+    if before is None:
+        if after > ORDER_GAP:
+            return after - ORDER_GAP
+        before = 0
+    if after - before > 1:
+        return (before + after) // 2
+    return None
+
+
+def neighbours_at(siblings, position):
+    """
+    Ключі сусідів для вставки на позицію `position` (1-based) серед `siblings`
+    (queryset без самого переміщуваного рядка). Читає щонайбільше два рядки
+    через індекс (column, order) / (project, order).
+    """
+    index = max(position, 1) - 1
+    siblings = siblings.order_by('order', 'id')
+    if index == 0:
+        first = siblings.values_list('order', flat=True).first()
+        return None, first
+
+    rows = list(siblings.values_list('order', flat=True)[index - 1:index + 1])
+    if not rows:
+        # позиція за межами списку – додаємо в кінець
+        return siblings.aggregate(last=Max('order'))['last'], None
+    before = rows[0]
+    after = rows[1] if len(rows) > 1 else None
+    return before, after
+
+
+def needs_rebalance(before, key, after):
+    gaps = [key - before if before is not None else key]
+    if after is not None:
+        gaps.append(after - key)
+    return min(gaps) < REBALANCE_THRESHOLD
+
+
+def task_siblings(column_id, exclude_id=None):
+    qs = Task.objects.filter(column_id=column_id)
+    return qs.exclude(pk=exclude_id) if exclude_id is not None else qs
+
+
+def column_siblings(project_id, exclude_id=None):
+    qs = Column.objects.filter(project_id=project_id)
+    return qs.exclude(pk=exclude_id) if exclude_id is not None else qs
+
+
+def next_task_order(column_id):
+    """Ключ для нової задачі в кінці колонки."""
+    last = Task.objects.filter(column_id=column_id).aggregate(last=Max('order'))['last']
+    return key_between(last, None)
+
+
+def lock_column(project_id, column_id):
+    """
+    SELECT ... FOR UPDATE на рядок колонки: паралельні переміщення в ту саму
+    колонку (і фоновий rebalance) виконуються по черзі. Викликати в transaction.atomic().
+    """
+    return Column.objects.select_for_update().get(pk=column_id, project_id=project_id)
+
+
+def lock_columns(project_id, column_ids):
+    """
+    Те саме для кількох колонок (переміщення між колонками змінює task_count обох) –
+    у порядку id, щоб зустрічні переміщення не взаємоблокувалися. Повертає {id: колонка};
+    Column.DoesNotExist, якщо якоїсь колонки в проєкті немає.
+    """
+    columns = {
+        column.pk: column
+        for column in Column.objects.select_for_update().filter(pk__in=sorted(column_ids), project_id=project_id)
+            .order_by('pk')
+    }
+    if len(columns) != len(set(column_ids)):
+        raise Column.DoesNotExist
+    return columns
+
+
+def lock_project(project_id):
+    """Те саме для переміщень колонок – блокуємо рядок проєкту."""
+    return Project.objects.select_for_update().get(pk=project_id)
+
+
+def _rebalance(model, group_field, group_id, returning):
+    """
+    Перенумеровує групу рядків з кроком ORDER_GAP одним запитом
+    (UPDATE ... FROM (ROW_NUMBER() ...) RETURNING) – один round-trip
+    незалежно від кількості карток. Повертає лише змінені рядки.
+    bulk-оновлення не надсилає post_save, тож версію дошки піднімаємо явно.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    group_column = qn(model._meta.get_field(group_field).column)
+    sql = f"""
+        UPDATE {table} AS t
+           SET "order" = s.rn * %s
+          FROM (SELECT id, ROW_NUMBER() OVER (ORDER BY "order", id) AS rn
+                  FROM {table}
+                 WHERE {group_column} = %s) AS s
+         WHERE t.id = s.id AND t."order" <> s.rn * %s
+     RETURNING {', '.join('t.' + qn(column) for column in returning)}
+    """
+    changed = sorted(model.objects.raw(sql, [ORDER_GAP, group_id, ORDER_GAP]), key=lambda row: row.order)
+    if changed:
+        bump_board_version_on_commit(changed[0].project_id)
+    return changed
+
+
+def rebalance_tasks(column_id):
+    return _rebalance(Task, 'column', column_id, ['id', 'project_id', 'column_id', 'order'])
+
+
+def rebalance_columns(project_id):
+    # усі поля ColumnSerializer, зокрема лічильник, – інакше запит на кожну колонку (deferred)
+    changed = _rebalance(Column, 'project', project_id, ['id', 'name', 'project_id', 'order', 'task_count'])
+    if changed:
+        response_cache.invalidate_on_commit([response_cache.columns_tag(project_id), response_cache.COLUMNS_TAG])
+    return changed
@@ -0,0 +1,220 @@
+# file: task/pagination.py
+
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _parse_field(field):
+    return (field[1:], True) if field.startswith('-') else (field, False)
+
+
+def _json_default(value):
+    # Повна точність (з мікросекундами), інакше курсор "з'їдатиме" рядки на межі сторінки
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+
+def encode_cursor(values):
+    """Кодує значення полів сортування останнього рядка у непрозорий рядок."""
+    raw = json.dumps(values, default=_json_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Зворотна до encode_cursor(); None, якщо курсор пошкоджений."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (TypeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def cursor_values(instance, ordering):
+    """Значення полів сортування (без '-') для конкретного об'єкта."""
+    values = []
+    for field in ordering:
+        name, _ = _parse_field(field)
+        try:
+            attname = instance._meta.get_field(name).attname
+        except FieldDoesNotExist:
+            attname = name  # анотація, наприклад rank
+        values.append(getattr(instance, attname))
+    return values
+
+
+def cursor_for(instance, ordering):
+    return encode_cursor(cursor_values(instance, ordering))
+
+
+def _is_nullable(model, name):
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        return False
+
+
+def keyset_filter(model, ordering, values):
+    """
+    Q для рядків, що йдуть строго після позиції `values` у порядку `ordering`:
+        a > x OR (a = x AND (b > y OR (b = y AND ...)))
+    Для першого (NOT NULL) поля додаємо ще й межу a >= x, щоб PostgreSQL почав
+    сканування композитного індексу одразу з потрібного місця – тоді глибока
+    сторінка коштує стільки ж, скільки перша.
+    NULL-и впорядковуються як у PostgreSQL: останні для ASC, перші для DESC.
+    """
+    q = None
+    for field, value in reversed(list(zip(ordering, values))):
+        name, desc = _parse_field(field)
+        nullable = _is_nullable(model, name)
+        if value is None:
+            equal = Q(**{f'{name}__isnull': True})
+            # ASC: після NULL нічого немає; DESC: після NULL ідуть усі не-NULL значення
+            after = Q(**{f'{name}__isnull': False}) if desc else None
+        else:
+            equal = Q(**{name: value})
+            after = Q(**{f'{name}__lt' if desc else f'{name}__gt': value})
+            if nullable and not desc:
+                after |= Q(**{f'{name}__isnull': True})
+        if q is None:
+            q = after if after is not None else Q(pk__in=[])
+        else:
+            q = (equal & q) if after is None else (after | (equal & q))
+
+    name, desc = _parse_field(ordering[0])
+    if values[0] is not None and not _is_nullable(model, name):
+        q &= Q(**{f'{name}__lte' if desc else f'{name}__gte': values[0]})
+    return q
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) пагінація лише вперед.
+
+    Замість OFFSET курсор містить значення полів сортування останнього рядка
+    попередньої сторінки, тож вставки нових рядків не зсувають сторінки,
+    а вартість будь-якої сторінки однакова за наявності відповідного індексу.
+    Порядок обов'язково має бути унікальним – останнім полем іде 'id'.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = decode_cursor(cursor)
+            if values is None or len(values) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(keyset_filter(queryset.model, self.ordering, values))
+
+        # Беремо на один рядок більше, щоб знати, чи є наступна сторінка (без COUNT(*))
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_next_cursor(self):
+        if not self.has_next:
+            return None
+        return cursor_for(self.page[-1], self.ordering)
+
+    def get_next_link(self):
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.get_next_cursor(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class OrderingKeysetPagination(KeysetPagination):
+    """
+    Keyset пагінація, що поважає OrderingFilter в'юшки (?ordering=-due_date).
+    До обраного порядку додається 'id' у тому ж напрямку, що й перше поле,
+    щоб порядок був унікальним і збігався з композитним індексом (field, id).
+    """
+    ordering = ('created_at', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        if view is not None and OrderingFilter in getattr(view, 'filter_backends', ()):
+            ordering = OrderingFilter().get_ordering(request, queryset, view)
+        if not ordering:
+            return tuple(self.ordering)
+        ordering = list(ordering)
+        if not any(_parse_field(field)[0] in ('id', 'pk') for field in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return tuple(ordering)
+
+
+class TaskPagination(OrderingKeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class ColumnTaskPagination(KeysetPagination):
+    """Сторінки задач однієї колонки – у тому ж порядку, що й на дошці."""
+    page_size = 20
+    ordering = ('order', 'id')
+
+
+class TaskCommentPagination(CommentPagination):
+    page_size = 20
+
+
+class TaskSearchPagination(KeysetPagination):
+    """Результати пошуку: за спаданням релевантності (rank – анотація search_tasks)."""
+    page_size = 20
+    max_page_size = 100
+    ordering = ('-rank', '-id')
@@ -2,15 +2,17 @@
 
 from rest_framework import permissions
 from rest_framework.permissions import SAFE_METHODS
-from .models import Task, Project, Comment
+from .membership import is_member
+from .models import Task, Project, Comment, Label
 
 class IsMemberOfProject(permissions.BasePermission):
     """
     Дозволяє доступ, якщо:
       1) користувач - staff (адмін), або
-      2) користувач є учасником того проекту, до якого належить об’єкт Task/Project/Comment.
+      2) користувач є учасником того проекту, до якого належить об’єкт Task/Project/Comment/Label.
     При цьому перевірка відбувається як на рівні списку (has_permission),
     так і на рівні конкретного об’єкта (has_object_permission).
+    Членство перевіряється за кешем task.membership – без запитів до БД.
     """
 
     def has_permission(self, request, view):
@@ -40,16 +42,20 @@ class IsMemberOfProject(permissions.BasePermission):
 
         # 2) Якщо об’єкт - це Task, перевірити, чи користувач у project.users
         if isinstance(obj, Task):
-            return obj.project.users.filter(id=request.user.id).exists()
+            return is_member(request, obj.project_id)
 
         # 3) Якщо об’єкт - це Project, перевірити, чи користувач у цьому .users
         elif isinstance(obj, Project):
-            return obj.users.filter(id=request.user.id).exists()
+            return is_member(request, obj.pk)
 
         # 4) Якщо об’єкт - це Comment, перевірити, чи користувач у project.users
         elif isinstance(obj, Comment):
-            # Коментар належить завданню, а те – проекту
-            return obj.task.project.users.filter(id=request.user.id).exists()
+            # Коментар належить завданню, а те – проекту (task – через select_related у viewset)
+            return is_member(request, obj.task.project_id)
+
+        # 5) Мітка належить проєкту
+        elif isinstance(obj, Label):
+            return is_member(request, obj.project_id)
 
         # Якщо якийсь інший об’єкт — на всяк випадок заборонити
         return False
@@ -0,0 +1,90 @@
+# file: task/reminders.py
+"""
+Планування нагадувань про дедлайни.
+
+Задачі "на завтра" вибираються діапазоном due_date >= початок дня AND
+due_date < початок наступного дня – такий запит використовує індекс
+(due_date, assigned_to), на відміну від due_date__date=... (каст у SQL).
+Кожне нагадування фіксується в SentReminder перед відправкою, окремою
+короткою транзакцією на лист; вставка ON CONFLICT DO NOTHING повертає лише
+ті задачі, які ще ніхто не "застовпив", тож повторний beat чи retry завдання
+листів не дублює. Лист, який не пішов, знімає свій запис (release).
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task, SentReminder
+
+
+def due_window(day):
+    """[початок дня, початок наступного дня) у поточній часовій зоні."""
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return start, start + datetime.timedelta(days=1)
+
+
+def tasks_due_on(day):
+    """Незавершені задачі з виконавцем (з email), дедлайн яких припадає на `day`."""
+    start, end = due_window(day)
+    return (
+        Task.objects
+            .filter(due_date__gte=start, due_date__lt=end, is_complete=False, assigned_to__isnull=False)
+            .exclude(assigned_to__email='')
+    )
+
+
+def claim(tasks, kind):
+    """
+    Записує нагадування `kind` для задач у журнал і повертає множину id задач,
+    для яких запис створено саме цим викликом. Запис комітиться до відправки
+    (паралельний запуск ці задачі пропустить); якщо лист не відправлено –
+    release() повертає задачі для retry.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return set()
+    qn = connection.ops.quote_name
+    now = timezone.now()
+    rows, params = [], []
+    for task in tasks:
+        rows.append('(%s, %s, %s, %s)')
+        params += [task.pk, kind, task.due_date, now]
+    sql = f"""
+        INSERT INTO {qn(SentReminder._meta.db_table)} (task_id, kind, due_date, sent_at)
+        VALUES {', '.join(rows)}
+        ON CONFLICT (task_id, kind, due_date) DO NOTHING
+        RETURNING task_id
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return {row[0] for row in cursor.fetchall()}
+
+
+def replan(task):
+    """
+    Після зміни дедлайну. Якщо новий дедлайн – завтра, а сьогоднішній щоденний
+    запуск уже відбувся, нагадування ставимо в чергу одразу (після коміту);
+    в інших випадках його підхопить щоденний запуск. Старі дедлайни нічого
+    скасовувати не потребують – журнал ведеться за (task, kind, due_date).
+    """
+    if task.due_date is None or task.is_complete:
+        return
+    now = timezone.localtime()
+    start, end = due_window(now.date() + datetime.timedelta(days=1))
+    if start <= task.due_date < end and now.hour >= settings.DEADLINE_REMINDER_HOUR:
+        from .tasks import send_task_reminder
+        task_id, due = task.pk, task.due_date.isoformat()
+        transaction.on_commit(lambda: send_task_reminder.delay(task_id, due))
+
+
+def release(tasks, kind):
+    """Видаляє записи claim() для задач, лист про які так і не пішов."""
+    condition = Q()
+    for task in tasks:
+        condition |= Q(task_id=task.pk, due_date=task.due_date)
+    if condition:
+        SentReminder.objects.filter(condition, kind=kind).delete()
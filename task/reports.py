@@ -0,0 +1,125 @@
+# file: task/reports.py
+"""
+Звіти за журналом переходів (TaskTransition): cumulative flow і cycle time.
+
+Обидва звіти читають лише переходи потрібного проміжку – range scan за
+індексом (project, at) чи (task_id, at), без сканування всієї історії.
+
+CFD рахується назад від поточного стану: кількість задач у колонках зараз
+береться з rollup-ів task.analytics, а переходи від початку діапазону до
+сьогодні "відмотуються" від найновішого. Тож історія до появи журналу не
+потрібна, а дні до його появи показують поточний розподіл.
+"""
+
+import datetime
+import math
+from collections import Counter
+
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.duration import duration_string
+
+from .models import Column, Task, TaskRollup, TaskTransition
+from .reminders import due_window
+
+
+PERCENTILES = (50, 85, 95)
+
+
+def day_start(day):
+    return due_window(day)[0]
+
+
+def cumulative_flow(project, start, end):
+    """Кількість задач у кожній колонці на кінець кожного дня [start, end]."""
+    columns = list(Column.objects.filter(project=project).only('pk', 'name', 'order'))
+    counts = Counter(dict(
+        TaskRollup.objects
+            .filter(project=project)
+            .values_list('column_id')
+            .annotate(count=Sum('task_count'))
+            .order_by()
+    ))
+    # найновіші переходи першими; межа дня d – початок дня d + 1
+    history = (
+        TaskTransition.objects
+            .filter(project=project, at__gte=day_start(start + datetime.timedelta(days=1)))
+            .order_by('-at', '-id')
+            .values_list('at', 'from_column', 'to_column')
+            .iterator(chunk_size=2000)
+    )
+    pending = next(history, None)
+    days = []
+    day = end
+    while day >= start:
+        boundary = day_start(day + datetime.timedelta(days=1))
+        while pending is not None and pending[0] >= boundary:
+            _, from_column, to_column = pending
+            counts[to_column] -= 1
+            counts[from_column] += 1
+            pending = next(history, None)
+        days.append({'date': day, 'counts': [counts[column.pk] for column in columns]})
+        day -= datetime.timedelta(days=1)
+    days.reverse()
+    return {
+        'project': project.pk,
+        'columns': [{'id': column.pk, 'name': column.name} for column in columns],
+        'days': days,
+    }
+
+
+def _percentiles(durations):
+    """Персентилі за методом найближчого рангу (duration_string) або None."""
+    if not durations:
+        return {f'p{p}': None for p in PERCENTILES}
+    durations = sorted(durations)
+    return {
+        f'p{p}': duration_string(durations[max(0, math.ceil(p / 100 * len(durations)) - 1)])
+        for p in PERCENTILES
+    }
+
+
+def cycle_time(project, start, end):
+    """
+    Lead time (створення → завершення) і cycle time (перший перехід з початкової
+    колонки → завершення) задач, завершених у [start, end]. Для задачі,
+    завершеної кілька разів, береться останнє завершення в діапазоні.
+    """
+    since, until = day_start(start), day_start(end + datetime.timedelta(days=1))
+    completions = dict(
+        TaskTransition.objects
+            .filter(project=project, at__gte=since, at__lt=until, from_complete=False, to_complete=True)
+            .order_by('at', 'id')
+            .values_list('task_id', 'at')
+    )
+    created = dict(Task.objects.filter(pk__in=list(completions)).values_list('pk', 'created_at'))
+    started = {}
+    history = (
+        TaskTransition.objects
+            .filter(task_id__in=list(completions), at__lt=until)
+            .order_by('task_id', 'at', 'id')
+            .values_list('task_id', 'at', 'from_column', 'to_column')
+    )
+    for task_id, at, from_column, to_column in history:
+        if from_column is None:
+            # перехід створення – на випадок, якщо задачу вже видалено
+            created.setdefault(task_id, at)
+        elif from_column != to_column and task_id not in started:
+            started[task_id] = at
+
+    lead_times = [done - created[task_id] for task_id, done in completions.items() if task_id in created]
+    cycle_times = [done - started[task_id] for task_id, done in completions.items()
+                   if task_id in started and started[task_id] <= done]
+    return {
+        'project': project.pk,
+        'start': start,
+        'end': end,
+        'completed': len(completions),
+        'lead_time': _percentiles(lead_times),
+        'cycle_time': _percentiles(cycle_times),
+    }
+
+
+def default_range(days=30):
+    end = timezone.localdate()
+    return end - datetime.timedelta(days=days - 1), end
@@ -0,0 +1,165 @@
+# file: task/response_cache.py
+"""
+Кеш відповідей GET-ендпойнтів, що майже не змінюються (списки міток,
+проєктів, колонок, учасників проєкту).
+
+Ключ відповіді – ендпойнт, користувач, шлях і query-параметри та версії
+її тегів (tag:<назва>, як board:version у task.board). Сигнали (task.signals)
+і шляхи без сигналів (bulk, importer, rebalance) піднімають версії лише
+зачеплених тегів після коміту – старі записи просто перестають читатися і
+витісняються за RESPONSE_CACHE_TIMEOUT. Запис, обчислений паралельно з
+інвалідацією, лягає під стару версію, тож застарілих даних ніхто не побачить.
+
+Теги:
+  project:<id>          – поля проєкту (список проєктів)
+  project:<id>:columns  – колонки проєкту
+  project:<id>:labels   – мітки проєкту (назви й task_count)
+  project:<id>:members  – склад учасників
+  columns, users        – записи, що зачіпають усі проєкти (нефільтрований
+                          список колонок, профіль користувача – лише для списку учасників)
+
+Списки колонок і проєктів кешуються без лічильників Column.task_count і
+Project.open_task_count (task.counters): ті змінюються з кожною задачею.
+
+Для кожного ендпойнта рахуються влучання/промахи й сумарний час відповіді
+(stats(), команда response_cache_stats); відповідь має заголовок X-Cache.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+
+RESPONSE_KEY = 'response:{endpoint}:{user_id}:{digest}'
+TAG_KEY = 'tag:{tag}'
+STATS_KEY = 'response:stats:{endpoint}:{field}'
+STATS_FIELDS = ('hits', 'misses', 'hit_us', 'miss_us')
+
+# Ендпойнти, для яких stats() збирає лічильники
+ENDPOINTS = set()
+
+COLUMNS_TAG = 'columns'
+USERS_TAG = 'users'
+
+
+def project_tag(project_id):
+    return f'project:{project_id}'
+
+
+def columns_tag(project_id):
+    return f'project:{project_id}:columns'
+
+
+def labels_tag(project_id):
+    return f'project:{project_id}:labels'
+
+
+def members_tag(project_id):
+    return f'project:{project_id}:members'
+
+
+def tag_versions(tags):
+    """Версії тегів одним get_many; відсутні ініціалізуються часом у наносекундах."""
+    keys = [TAG_KEY.format(tag=tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def invalidate(tags):
+    for tag in set(tags):
+        key = TAG_KEY.format(tag=tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(tags):
+    """Піднімає версії тегів після коміту (інакше паралельний запит закешував би старі дані під новою)."""
+    tags = {tag for tag in tags if tag is not None}
+    if tags:
+        transaction.on_commit(lambda: invalidate(tags))
+
+
+def response_key(endpoint, request, tags, view_kwargs):
+    tags = sorted(set(tags))
+    parts = [
+        request.path,
+        sorted(request.query_params.lists()),
+        sorted(view_kwargs.items()),
+        list(zip(tags, tag_versions(tags))),
+    ]
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return RESPONSE_KEY.format(endpoint=endpoint, user_id=request.user.pk, digest=digest)
+
+
+def _count(endpoint, hit, elapsed):
+    for field, amount in (('hits' if hit else 'misses', 1), ('hit_us' if hit else 'miss_us', elapsed)):
+        key = STATS_KEY.format(endpoint=endpoint, field=field)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            if not cache.add(key, amount, timeout=None):
+                cache.incr(key, amount)
+
+
+def cached_response(endpoint, tags):
+    """
+    Декоратор GET-методу view: відповідь 200 кешується під ключем response_key().
+    tags(view, request, **kwargs) – теги, від яких залежить відповідь (не робить
+    запитів до БД, окрім уже закешованого членства).
+    """
+    ENDPOINTS.add(endpoint)
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            started = time.perf_counter()
+            key = response_key(endpoint, request, tags(view, request, **kwargs), kwargs)
+            data = cache.get(key)
+            hit = data is not None
+            if hit:
+                response = Response(data)
+            else:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'HIT' if hit else 'MISS'
+            _count(endpoint, hit, int((time.perf_counter() - started) * 1_000_000))
+            return response
+        return wrapper
+    return decorator
+
+
+def stats():
+    """{ендпойнт: {hits, misses, hit_ratio, hit_ms, miss_ms}} – середній час влучання/промаху в мс."""
+    keys = {
+        (endpoint, field): STATS_KEY.format(endpoint=endpoint, field=field)
+        for endpoint in sorted(ENDPOINTS) for field in STATS_FIELDS
+    }
+    values = cache.get_many(keys.values())
+    result = {}
+    for endpoint in sorted(ENDPOINTS):
+        hits, misses, hit_us, miss_us = (values.get(keys[endpoint, field], 0) for field in STATS_FIELDS)
+        result[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 4) if hits + misses else None,
+            'hit_ms': round(hit_us / hits / 1000, 3) if hits else None,
+            'miss_ms': round(miss_us / misses / 1000, 3) if misses else None,
+        }
+    return result
+
+
+def reset_stats():
+    cache.delete_many([STATS_KEY.format(endpoint=e, field=f) for e in ENDPOINTS for f in STATS_FIELDS])
@@ -0,0 +1,47 @@
+# file: task/search.py
+"""
+Повнотекстовий пошук задач.
+
+Task.search_vector (title – вага A, description – B, коментарі – C) підтримують
+тригери PostgreSQL (міграція 0014_task_search_vector), тож він актуальний і після
+bulk-операцій. Запит фільтрується через GIN-індекс (search_vector @@ tsquery)
+і лише в проєктах користувача; кожне слово запиту шукається як префікс.
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from .models import Task
+
+
+SEARCH_CONFIG = 'simple'
+MAX_TERMS = 8
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def prefix_query(text):
+    """
+    tsquery "слово1:* & слово2:*" з довільного тексту користувача або None.
+    До raw-запиту потрапляють лише літери/цифри, тож синтаксис tsquery зламати не можна.
+    """
+    terms = _WORD.findall(text.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_tasks(query, project_ids):
+    """
+    Задачі з проєктів project_ids, що відповідають запиту, з анотацією rank.
+    rank приводимо до double precision: ts_rank повертає real, і без цього
+    значення в курсорі не збігалося б точно зі значенням у БД.
+    """
+    return (
+        Task.objects
+            .filter(project_id__in=project_ids, search_vector=query)
+            .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+    )
@@ -1,14 +1,15 @@
 from django.contrib.auth import authenticate
 from rest_framework import serializers
-from .models import Task, Label, Project, Comment, Column, Invitation
+from .models import Task, Label, Project, Comment, Column, Invitation, TaskImport
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import ClaimsRefreshToken
 
 
 class ColumnSerializer(serializers.ModelSerializer):
     class Meta:
         model = Column
-        fields = ['id', 'name', 'project', 'order']
+        fields = ['id', 'name', 'project', 'order', 'task_count']
+        read_only_fields = ['task_count']
         extra_kwargs = {
             'name': {'required': True},
             'project': {'required': True},
@@ -16,6 +17,16 @@ class ColumnSerializer(serializers.ModelSerializer):
         }
 
 
+class ColumnListSerializer(ColumnSerializer):
+    """
+    Список колонок (кешується, task.response_cache) – без task_count: лічильник
+    змінюється з кожною задачею і робив би кеш марним. Він є на дошці й у колонці.
+    """
+    class Meta(ColumnSerializer.Meta):
+        fields = ['id', 'name', 'project', 'order']
+        read_only_fields = []
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model=User
@@ -40,7 +51,7 @@ class TokenObtainPairSerializer(serializers.Serializer):
         # Зберігаємо інстанс користувача в self.user
         self.user = user
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token)
@@ -58,6 +69,19 @@ class TaskSerializer(serializers.ModelSerializer):
             'description': {'required': True},
         }
 
+    def validate(self, attrs):
+        # Мітки належать проєкту – задача може мати лише мітки свого проєкту
+        project = attrs.get('project') or getattr(self.instance, 'project', None)
+        if project is not None and any(label.project_id != project.pk for label in attrs.get('labels', ())):
+            raise serializers.ValidationError({'labels': 'Мітки мають належати проєкту задачі.'})
+        return attrs
+
+class TaskSearchResultSerializer(TaskSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ['rank']
+
 class TaskOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
@@ -67,18 +91,31 @@ class TaskOrderSerializer(serializers.ModelSerializer):
 class LabelSerializer(serializers.ModelSerializer):
     class Meta:
         model = Label
-        fields = '__all__'
+        fields = ['id', 'project', 'name', 'task_count']
+        read_only_fields = ['task_count']
+
+    def validate_project(self, project):
+        if self.instance is not None and self.instance.project_id != project.pk:
+            raise serializers.ValidationError('Мітку не можна перенести в інший проєкт.')
+        return project
 
 # Serializer for Projects
 class ProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
-        fields = ['id', 'name', 'description', 'users']
+        fields = ['id', 'name', 'description', 'users', 'open_task_count']
+        read_only_fields = ['open_task_count']
         extra_kwargs = {
             'name': {'required': True},
             'description': {'required': True},
         }
 
+class ProjectListSerializer(ProjectSerializer):
+    """Список проєктів (кешується) – без open_task_count, як ColumnListSerializer."""
+    class Meta(ProjectSerializer.Meta):
+        fields = ['id', 'name', 'description', 'users']
+        read_only_fields = []
+
 # Serializer for Comments
 class CommentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -104,10 +141,14 @@ class TaskNestedSerializer(serializers.ModelSerializer):
                   'assigned_to', 'labels', 'project', 'column', 'comments','estimated_time', 'time_spent','order')
 
 
-class TaskOrderSerializer(serializers.ModelSerializer):
+class TaskCardSerializer(serializers.ModelSerializer):
+    """Картка задачі для посторінкової дошки: замість коментарів – лише їх кількість."""
+
     class Meta:
-        model  = Task
-        fields = ('id', 'order')
+        model = Task
+        fields = ('id', 'title', 'description', 'created_at', 'due_date', 'is_complete',
+                  'assigned_to', 'labels', 'project', 'column', 'comment_count', 'estimated_time',
+                  'time_spent', 'order')
 
 
 
@@ -136,3 +177,11 @@ class InvitationSerializer(serializers.ModelSerializer):
         model = Invitation
         fields = ['id', 'email', 'project', 'token', 'expires_at', 'accepted']
         read_only_fields = ['token', 'expires_at', 'accepted']
+
+
+class TaskImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TaskImport
+        fields = ('id', 'project', 'format', 'status', 'total_rows', 'imported_rows', 'skipped_rows',
+                  'errors', 'created_at', 'finished_at')
+        read_only_fields = fields
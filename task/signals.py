@@ -0,0 +1,278 @@
+# file: task/signals.py
+
+from django.db import transaction
+from django.contrib.auth.models import User
+from django.db.models import F, QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import analytics, counters, labels, response_cache, transitions
+from .authentication import forget_user
+from .board import bump_board_version
+from .membership import invalidate_on_commit as invalidate_membership_on_commit
+from .models import Task, Column, Comment, Label, Project
+
+
+def bump_board_version_on_commit(project_id):
+    """
+    Версію піднімаємо лише після коміту транзакції: інакше паралельний запит
+    міг би закешувати ще старі дані під уже новою версією.
+    """
+    if project_id is not None:
+        transaction.on_commit(lambda: bump_board_version(project_id))
+
+
+def _comment_project_id(comment):
+    # Якщо задача вже завантажена (viewset, адмінка) – жодних додаткових запитів
+    if Comment.task.is_cached(comment):
+        return comment.task.project_id
+    return Task.objects.filter(pk=comment.task_id).values_list('project_id', flat=True).first()
+
+
+# Будь-який запис у Task/Column/Comment/Project (API, ProjectConsumer, адмінка)
+# робить закешований знімок дошки недійсним.
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Column)
+def board_item_changed(sender, instance, **kwargs):
+    bump_board_version_on_commit(instance.project_id)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def board_comment_changed(sender, instance, **kwargs):
+    bump_board_version_on_commit(_comment_project_id(instance))
+
+
+@receiver([post_save, post_delete], sender=Project)
+def board_project_changed(sender, instance, **kwargs):
+    bump_board_version_on_commit(instance.pk)
+
+
+@receiver(m2m_changed, sender=Task.labels.through)
+def board_task_labels_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith('post_'):
+            bump_board_version_on_commit(instance.project_id)
+            response_cache.invalidate_on_commit([response_cache.labels_tag(instance.project_id)])
+        return
+    # label.tasks.add/remove/clear – змінюються задачі з pk_set (або всі задачі мітки при clear)
+    if action in ('post_add', 'post_remove'):
+        tasks = Task.objects.filter(pk__in=pk_set)
+    elif action == 'pre_clear':
+        tasks = instance.tasks.all()
+    else:
+        return
+    project_ids = set(tasks.values_list('project_id', flat=True))
+    for project_id in project_ids:
+        bump_board_version_on_commit(project_id)
+    response_cache.invalidate_on_commit(response_cache.labels_tag(project_id) for project_id in project_ids)
+
+
+# Rollup-и аналітики (task.analytics) і лічильники (task.counters) – у тій самій транзакції,
+# що й запис задачі; журнал переходів (task.transitions) – зі старого й нового знімків, після коміту
+@receiver(pre_save, sender=Task)
+def task_rollup_saving(sender, instance, update_fields=None, **kwargs):
+    analytics.task_saving(instance, update_fields)
+
+
+@receiver(post_save, sender=Task)
+def task_rollup_saved(sender, instance, created, update_fields=None, **kwargs):
+    states = analytics.task_saved(instance, created, update_fields)
+    if states is not None:
+        counters.tasks_changed([states])
+        transitions.record([transitions.transition(instance.pk, *states)])
+        old, new = states
+        if old is not None and new is not None and old[0] != new[0]:
+            # задача з мітками перейшла в інший проєкт
+            response_cache.invalidate_on_commit(response_cache.labels_tag(state[0]) for state in states)
+
+
+@receiver(post_delete, sender=Task)
+def task_rollup_deleted(sender, instance, **kwargs):
+    old = analytics.task_deleted(instance)
+    counters.tasks_changed([(old, None)])
+    transitions.record([transitions.transition(instance.pk, old, None)])
+    # рядки Task.labels видаляються каскадом, без m2m_changed
+    response_cache.invalidate_on_commit([response_cache.labels_tag(instance.project_id)])
+
+
+# Task.comment_count (task.counters)
+@receiver(pre_save, sender=Comment)
+def comment_count_saving(sender, instance, update_fields=None, **kwargs):
+    # коментар можуть перенести в іншу задачу (CommentSerializer) – запам'ятовуємо стару
+    if instance.pk is None or (update_fields is not None and 'task' not in update_fields):
+        instance._task_id_before = None
+        return
+    instance._task_id_before = Comment.objects.filter(pk=instance.pk).values_list('task_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def comment_count_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.comments_changed({instance.task_id: 1})
+    elif getattr(instance, '_task_id_before', None) not in (None, instance.task_id):
+        counters.comments_changed({instance._task_id_before: -1, instance.task_id: 1})
+
+
+@receiver(post_delete, sender=Comment)
+def comment_count_deleted(sender, instance, origin=None, **kwargs):
+    # каскад від задачі, колонки чи проєкту – задача видаляється разом з коментарем
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (Task, Column, Project):
+        return
+    counters.comments_changed({instance.task_id: -1})
+
+
+# Зміна міток – теж зміна задачі для інкрементального експорту (Task.updated_at)
+@receiver(m2m_changed, sender=Task.labels.through)
+def task_labels_touched(sender, instance, action, reverse, pk_set, **kwargs):
+    now = timezone.now()
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Task.objects.filter(pk=instance.pk).update(updated_at=now)
+    elif action in ('post_add', 'post_remove'):
+        Task.objects.filter(pk__in=pk_set).update(updated_at=now)
+    elif action == 'pre_clear':
+        instance.tasks.update(updated_at=now)
+
+
+# Коментарі теж експортуються (?comments=1) – їх зміна оновлює Task.updated_at
+@receiver(post_save, sender=Comment)
+def task_comment_saved_touch(sender, instance, **kwargs):
+    # коментар перенесли в іншу задачу – змінилися обидві (comment_count_saving)
+    task_ids = {instance.task_id, getattr(instance, '_task_id_before', None)} - {None}
+    Task.objects.filter(pk__in=task_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Comment)
+def task_comment_deleted_touch(sender, instance, origin=None, **kwargs):
+    # каскад від задачі, колонки чи проєкту – задачі вже немає
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (Task, Column, Project):
+        return
+    Task.objects.filter(pk=instance.task_id).update(updated_at=timezone.now())
+
+
+# Label.task_count (task.labels) – F()-оновлення в тій самій транзакції
+@receiver(m2m_changed, sender=Task.labels.through)
+def label_task_counts_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # task.labels.add/remove/clear – по одиниці кожній мітці з pk_set (при clear – усім міткам задачі)
+        if action in ('post_add', 'post_remove'):
+            labels.adjust_task_counts({label_id: 1 if action == 'post_add' else -1 for label_id in pk_set})
+        elif action == 'pre_clear':
+            labels.adjust_task_counts({label_id: -1 for label_id in instance.labels.values_list('pk', flat=True)})
+        return
+    # label.tasks.add/remove/clear – змінюється лічильник однієї мітки
+    if action == 'post_add':
+        labels.adjust_task_counts({instance.pk: len(pk_set)})
+    elif action == 'post_remove':
+        labels.adjust_task_counts({instance.pk: -len(pk_set)})
+    elif action == 'pre_clear':
+        labels.adjust_task_counts({instance.pk: -instance.tasks.count()})
+
+
+@receiver(pre_delete, sender=Task)
+def task_label_counts_deleting(sender, instance, **kwargs):
+    # рядки Task.labels видаляються каскадом, без m2m_changed
+    Label.objects.filter(tasks=instance).update(task_count=F('task_count') - 1)
+
+
+# Кеш відповідей списків (task.response_cache) – теги лише зачеплених проєктів
+@receiver([post_save, post_delete], sender=Column)
+def column_list_changed(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit([response_cache.columns_tag(instance.project_id), response_cache.COLUMNS_TAG])
+
+
+@receiver([post_save, post_delete], sender=Project)
+def project_list_changed(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit([response_cache.project_tag(instance.pk)])
+
+
+@receiver([post_save, post_delete], sender=Label)
+def label_list_changed(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit([response_cache.labels_tag(instance.project_id)])
+
+
+@receiver(m2m_changed, sender=Project.users.through)
+def project_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            response_cache.invalidate_on_commit([response_cache.members_tag(instance.pk)])
+        return
+    # user.projects.add/remove/clear – pk_set містить id проєктів
+    if action in ('post_add', 'post_remove'):
+        project_ids = pk_set
+    elif action == 'pre_clear':
+        project_ids = instance.projects.values_list('pk', flat=True)
+    else:
+        return
+    response_cache.invalidate_on_commit(response_cache.members_tag(project_id) for project_id in project_ids)
+
+
+@receiver(pre_delete, sender=User)
+def user_memberships_deleting(sender, instance, **kwargs):
+    # рядки Project.users видаляються каскадом, без m2m_changed
+    project_ids = instance.projects.values_list('pk', flat=True)
+    response_cache.invalidate_on_commit(response_cache.members_tag(project_id) for project_id in project_ids)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_list_changed(sender, instance, update_fields=None, **kwargs):
+    # вхід (update_last_login) не змінює полів UserSerializer
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    response_cache.invalidate_on_commit([response_cache.USERS_TAG])
+
+
+# Кеш членства (task.membership): будь-яка зміна Project.users – з обох боків
+@receiver(m2m_changed, sender=Project.users.through)
+def project_users_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # user.projects.add/remove/clear – змінюється членство одного користувача
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_membership_on_commit([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        invalidate_membership_on_commit(pk_set)
+    elif action == 'pre_clear':
+        invalidate_membership_on_commit(instance.users.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    # рядки Project.users видаляються каскадом, без m2m_changed
+    invalidate_membership_on_commit(instance.users.values_list('pk', flat=True))
+
+
+# JWT без БД (task.authentication): токен несе is_staff і не перевіряє is_active,
+# тож деактивація, видалення чи зміна is_staff відкликають видані токени.
+@receiver(pre_save, sender=User)
+def user_changing(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=['last_login']) тощо – claims не змінюються, зайвий запит не робимо
+    if update_fields is not None and not {'is_active', 'is_staff', 'username'} & set(update_fields):
+        instance._claims_before = None
+        return
+    instance._claims_before = (
+        User.objects.filter(pk=instance.pk).values_list('is_active', 'is_staff', 'username').first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    before = getattr(instance, '_claims_before', None)
+    if created or before is None:
+        return
+    user_id = instance.pk
+    was_active, was_staff, username = before
+    # TokenRevocation уже записав тригер на auth_user – лише скидаємо кеш після коміту
+    if (was_active and not instance.is_active) or was_staff != instance.is_staff or username != instance.username:
+        transaction.on_commit(lambda: forget_user(user_id))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_id = instance.pk
+    # задачі користувача вже отримали assigned_to = NULL (SET_NULL, без сигналів)
+    analytics.rebuild_for_assignee(user_id)
+    transaction.on_commit(lambda: forget_user(user_id))
@@ -1,44 +1,176 @@
 # task/tasks.py
 
+import smtplib
+
 from celery import shared_task
+from celery.signals import worker_process_shutdown
+from django.db import transaction
+from django.db.models.functions import Mod
 from django.utils import timezone
-from datetime import timedelta
-from django.core.mail import send_mail
+from datetime import date, datetime, timedelta
+from itertools import groupby
 from django.conf import settings
-from .models import Task
+from . import importer, notifications, reminders, transitions
+from .events import publish
+from .notifications import smtp
+from .models import Column, Project, SentReminder
+from .ordering import rebalance_tasks, rebalance_columns, lock_project
+
+# Скільки рядків тягнути з курсора за раз
+REMINDER_CHUNK_SIZE = 2000
+
 
 @shared_task
 def send_deadline_reminders():
     """
-    Знаходимо всі незавершені завдання, дедлайн яких – завтра,
-    і висилаємо кожному відповідному користувачу email‑нагадування.
+    Щоденне нагадування про задачі, дедлайн яких – завтра.
+    Лише розподіляє роботу: по підзавданню на шард користувачів
+    (assigned_to_id % DEADLINE_REMINDER_SHARDS), тож велику ніч
+    можуть розібрати кілька воркерів паралельно. Повторний запуск
+    безпечний – вже відправлене відсіє журнал SentReminder.
+    """
+    tomorrow = timezone.localdate() + timedelta(days=1)
+    shards = settings.DEADLINE_REMINDER_SHARDS
+    for shard in range(shards):
+        send_deadline_reminder_shard.delay(shard, shards, tomorrow.isoformat())
+
+
+@shared_task(autoretry_for=(smtplib.SMTPException, OSError), retry_backoff=True, max_retries=5)
+def send_deadline_reminder_shard(shard, shards, due):
+    """
+    Один лист-дайджест на користувача шарда з усіма його задачами на `due`.
+    Задачі читаються потоком (iterator) у порядку виконавця, тож у пам'яті
+    лише задачі поточного користувача; листи йдуть по одному через спільне
+    SMTP-з'єднання воркера.
+    """
+    due = date.fromisoformat(due)
+    tasks = reminders.tasks_due_on(due).annotate(shard=Mod('assigned_to_id', shards)).filter(shard=shard)
+    return _send_digests(tasks, due)
+
+
+@shared_task(autoretry_for=(smtplib.SMTPException, OSError), retry_backoff=True, max_retries=5)
+def send_task_reminder(task_id, due_date):
     """
-    tomorrow = timezone.now().date() + timedelta(days=1)
+    Нагадування для однієї задачі, чий дедлайн змінили вже після щоденного
+    запуску (див. reminders.replan). Якщо дедлайн відтоді знову змінився –
+    нічого не робимо.
+    """
+    due_date = datetime.fromisoformat(due_date)
+    tasks = reminders.tasks_due_on(timezone.localtime(due_date).date()).filter(pk=task_id, due_date=due_date)
+    return _send_digests(tasks, timezone.localtime(due_date).date())
+
+
+def _send_digests(tasks, due):
     tasks = (
-        Task.objects
-            .filter(is_complete=False, due_date__date=tomorrow)
+        tasks
             .select_related('assigned_to', 'project')
+            .only('title', 'due_date', 'project', 'assigned_to', 'assigned_to__username', 'assigned_to__email', 'project__name')
+            .order_by('assigned_to_id', 'due_date', 'id')
     )
+    sent = 0
+    for user, user_tasks in groupby(tasks.iterator(chunk_size=REMINDER_CHUNK_SIZE), key=lambda t: t.assigned_to):
+        sent += _send_claimed(user, list(user_tasks), due)
+    return sent
+
+
+def _send_claimed(user, tasks, due):
+    """
+    Дайджест користувача лише з тими задачами, які вдалося записати в журнал.
+    Запис – окрема коротка транзакція до відправки (мережевий I/O поза
+    транзакцією); якщо SMTP впаде, записи цього листа знімаються і retry
+    відправить лише його та ще не відправлені, а вже доставлені – ні.
+    """
+    with transaction.atomic():
+        claimed = reminders.claim(tasks, SentReminder.DUE_TOMORROW)
+    tasks = [task for task in tasks if task.pk in claimed]
+    if not tasks:
+        return 0
+    try:
+        smtp.send([notifications.deadline_digest(user, tasks, due)])
+    except Exception:
+        reminders.release(tasks, SentReminder.DUE_TOMORROW)
+        raise
+    return 1
+
+
+@shared_task(bind=True, max_retries=5)
+def send_emails(self, messages):
+    """
+    Відправляє листи (див. task.notifications) через спільне SMTP-з'єднання
+    воркера. Тимчасові збої SMTP – повтор з backoff лише тих листів, які ще
+    не відправлено.
+    """
+    sent = []
+    try:
+        return smtp.send(messages, on_sent=sent.append)
+    except (smtplib.SMTPException, OSError) as exc:
+        raise self.retry(args=[messages[len(sent):]], exc=exc, countdown=2 ** self.request.retries)
+
+
+@worker_process_shutdown.connect
+def close_smtp_connection(**kwargs):
+    smtp.close()
+
+
+@shared_task
+def rebalance_task_order(column_id):
+    """
+    Фонова перенумерація задач колонки з кроком ORDER_GAP.
+    Запускається ProjectConsumer, коли між сусідніми ключами стає тісно;
+    клієнтам розсилаємо нові ключі лише змінених задач.
+    """
+    with transaction.atomic():
+        try:
+            column = Column.objects.select_for_update().get(pk=column_id)
+        except Column.DoesNotExist:
+            return
+        changed = rebalance_tasks(column.id)
+    if not changed:
+        return
+    publish(changed[0].project_id, 'task_update', {
+        'action': 'tasks_reordered',
+        'column_id': column_id,
+        'tasks': [{'id': t.id, 'order': t.order} for t in changed],
+    })
+
+
+@shared_task
+def rebalance_column_order(project_id):
+    """Фонова перенумерація колонок проєкту з кроком ORDER_GAP."""
+    with transaction.atomic():
+        try:
+            lock_project(project_id)
+        except Project.DoesNotExist:
+            return
+        changed = rebalance_columns(project_id)
+    if not changed:
+        return
+    publish(project_id, 'column_update', {
+        'action': 'columns_reordered',
+        'columns': [{'id': c.id, 'order': c.order} for c in changed],
+    })
+
+
+@shared_task
+def flush_task_transitions():
+    """Переносить буфер переходів задач з Redis у TaskTransition пакетами (див. task.transitions)."""
+    return transitions.flush()
+
+
+@shared_task(bind=True)
+def run_task_import(self, import_id):
+    """
+    Переносить staging-рядки імпорту в задачі (task.importer.run). Прогрес –
+    стан PROGRESS з лічильниками (і поля TaskImport); повторний запуск
+    перерваного імпорту продовжує з першого не перенесеного рядка.
+    """
+    def progress(task_import):
+        if not self.request.called_directly and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={
+                'import': task_import.pk,
+                'total': task_import.total_rows - task_import.skipped_rows,
+                'imported': task_import.imported_rows,
+            })
 
-    for task in tasks:
-        user = task.assigned_to
-        if not user or not user.email:
-            continue
-
-        subject = f"Нагадування: дедлайн «{task.title}» завтра"
-        message = (
-            f"Привіт, {user.username}!\n\n"
-            f"Нагадуємо, що дедлайн вашої задачі «{task.title}»\n"
-            f"у проекті «{task.project.name}» – {tomorrow}.\n\n"
-            "Перевірте статус задачі в системі: http://127.0.0.1:8000/project/"
-            f"{task.project.id}/full/\n\n"
-            "Успіхів!"
-        )
-
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
+    task_import = importer.run(import_id, progress)
+    return {'import': task_import.pk, 'status': task_import.status, 'imported': task_import.imported_rows}
@@ -1,3 +1,1501 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import smtplib
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from TaskMaster.celery import app as celery_app
+from . import analytics, counters, export, importer, labels, membership, metrics, response_cache, transitions
+from .consumers import ProjectConsumer
+from .events import EventBatch
+from .models import Project, Column, Task, Comment, Label, SentReminder, TaskImport, TaskImportRow, TaskRollup, \
+    TaskTransition, TokenRevocation
+from .ordering import ORDER_GAP, REBALANCE_THRESHOLD, rebalance_columns
+from .routing import websocket_urlpatterns
+from .notifications import email, smtp
+from .serializers import ColumnSerializer
+from .tasks import send_deadline_reminders, send_emails
+from .views import TaskFilter
+
+
+TEST_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, CACHES=TEST_CACHES, BOARD_EVENT_COALESCE_MS=0)
+class BaseAPITestCase(TestCase):
+    """Спільні фікстури: користувач-учасник проєкту та автентифікований APIClient."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='pass')
+        self.project = Project.objects.create(name='Board', description='')
+        self.project.users.add(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def make_board(self, columns, tasks_per_column, comments_per_task):
+        # Версія дошки піднімається в on_commit – виконуємо ці колбеки й у тестах
+        with self.captureOnCommitCallbacks(execute=True):
+            self._make_board(columns, tasks_per_column, comments_per_task)
+
+    def _make_board(self, columns, tasks_per_column, comments_per_task):
+        labels = [Label.objects.get_or_create(project=self.project, name=f'label-{i}')[0] for i in range(3)]
+        for c in range(columns):
+            column = Column.objects.create(project=self.project, name=f'Column {c}', order=c + 1)
+            for t in range(tasks_per_column):
+                task = Task.objects.create(
+                    title=f'Task {c}-{t}', description='', project=self.project,
+                    column=column, order=t + 1,
+                )
+                task.labels.set(labels[:t % 3 + 1])
+                for _ in range(comments_per_task):
+                    Comment.objects.create(task=task, user=self.user, text='comment')
+
+
+class NotificationTestCase(BaseAPITestCase):
+    """Celery-завдання виконуються одразу, листи – у mail.outbox (locmem)."""
+
+    def setUp(self):
+        super().setUp()
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', eager)
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='pass')
+        self.project.users.add(self.member)
+        column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.task = Task.objects.create(title='Write docs', description='', project=self.project,
+                                        column=column, order=ORDER_GAP)
+
+
+class EmailNotificationTests(NotificationTestCase):
+    def test_email_is_sent_only_after_commit(self):
+        url = reverse('task-assign-user', args=[self.task.id])
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.patch(url, {'user_id': self.member.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['member@example.com'])
+        self.assertIn('Write docs', mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+    def test_member_notifications(self):
+        outsider = User.objects.create_user(username='outsider', email='outsider@example.com', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            added = self.client.post(reverse('project-add-user', args=[self.project.id]),
+                                     {'user_id': outsider.id}, format='json')
+            removed = self.client.delete(reverse('project-remove-user', args=[self.project.id, outsider.id]))
+        self.assertEqual((added.status_code, removed.status_code), (200, 200))
+        self.assertEqual([m.to for m in mail.outbox], [['outsider@example.com'], ['outsider@example.com']])
+
+
+class FlakySMTPMixin:
+    def flaky_smtp(self, fail_on):
+        """Підміняє відправку одного листа: виклик №fail_on падає тимчасовою помилкою SMTP."""
+        send_one, calls = smtp._send_one, []
+
+        def flaky(message):
+            calls.append(message['to'][0])
+            if len(calls) == fail_on:
+                raise smtplib.SMTPDataError(451, 'try again later')
+            return send_one(message)
+        return mock.patch.object(smtp, '_send_one', flaky), calls
+
+
+class EmailRetryTests(FlakySMTPMixin, NotificationTestCase):
+    def test_retry_sends_only_undelivered_messages(self):
+        messages = [email('Hi', 'body', f'user{i}@example.com') for i in range(3)]
+        patch, calls = self.flaky_smtp(fail_on=2)
+        with patch:
+            send_emails.delay(messages)
+        self.assertEqual(calls, ['user0@example.com', 'user1@example.com', 'user1@example.com', 'user2@example.com'])
+        self.assertEqual([m.to[0] for m in mail.outbox], ['user0@example.com', 'user1@example.com', 'user2@example.com'])
+
+
+class DeadlineReminderTests(FlakySMTPMixin, NotificationTestCase):
+    def test_failed_digest_does_not_resend_delivered_ones(self):
+        due = timezone.now() + datetime.timedelta(days=1)
+        column = self.task.column
+        for user in (self.member, self.user):
+            Task.objects.create(title=f'Due {user.username}', description='', project=self.project, column=column,
+                                order=2 * ORDER_GAP, assigned_to=user, due_date=due)
+
+        patch, calls = self.flaky_smtp(fail_on=2)
+        with patch, self.settings(DEADLINE_REMINDER_SHARDS=1):
+            send_deadline_reminders.delay()
+        # другий лист упав і пішов з retry, перший не повторювався
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['member@example.com', 'owner@example.com'])
+        self.assertEqual(SentReminder.objects.count(), 2)
+
+    def test_one_digest_per_user(self):
+        due = timezone.now() + datetime.timedelta(days=1)
+        column = self.task.column
+        for i in range(3):
+            Task.objects.create(title=f'Due {i}', description='', project=self.project, column=column,
+                                order=(i + 2) * ORDER_GAP, assigned_to=self.member, due_date=due)
+        Task.objects.create(title='Owner task', description='', project=self.project, column=column,
+                            order=10 * ORDER_GAP, assigned_to=self.user, due_date=due)
+        Task.objects.create(title='Done', description='', project=self.project, column=column,
+                            order=11 * ORDER_GAP, assigned_to=self.user, due_date=due, is_complete=True)
+
+        send_deadline_reminders.delay()
+
+        digests = {m.to[0]: m for m in mail.outbox}
+        self.assertEqual(sorted(digests), ['member@example.com', 'owner@example.com'])
+        self.assertEqual(digests['member@example.com'].body.count('•'), 3)
+        self.assertNotIn('Done', digests['owner@example.com'].body)
+
+    def test_reminders_are_sent_once_per_deadline(self):
+        due = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        self.task.assigned_to = self.member
+        self.task.due_date = due
+        self.task.save()
+
+        send_deadline_reminders.delay()
+        send_deadline_reminders.delay()  # повторний beat
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(SentReminder.objects.filter(task=self.task, due_date=due).count(), 1)
+
+        # Новий дедлайн після щоденного запуску – нагадування одразу, рівно одне
+        new_due = due + datetime.timedelta(hours=1)
+        url = reverse('task-set-deadline', args=[self.task.id])
+        with self.settings(DEADLINE_REMINDER_HOUR=0), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'due_date': new_due.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 200)
+        send_deadline_reminders.delay()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(SentReminder.objects.filter(task=self.task).count(), 2)
+
+
+class MembershipCacheTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.task = Task.objects.create(title='T', description='', project=self.project, column=column, order=ORDER_GAP)
+        self.comment = Comment.objects.create(task=self.task, user=self.user, text='hi')
+
+    def test_permission_check_needs_no_queries_once_cached(self):
+        url = reverse('comment-detail', args=[self.comment.id])
+        self.client.get(url)
+        # лише сам коментар (разом із задачею) – членство з кешу
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_membership_change_invalidates_cache(self):
+        other = Project.objects.create(name='Other', description='')
+        column = Column.objects.create(project=other, name='To do', order=ORDER_GAP)
+        url = reverse('task-list')
+        payload = {'title': 'New', 'description': 'New task', 'project': other.id, 'column': column.id}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.users.add(self.user)
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, 201)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.projects.remove(other)
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, 403)
+
+
+class ClaimsAuthenticationTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post(reverse('login'), {'username': 'owner', 'password': 'pass'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['access']
+
+    def get_tasks(self, token):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('task-list'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        return response, [q['sql'] for q in queries]
+
+    def test_user_is_built_from_token_claims(self):
+        token = self.login()
+        response, queries = self.get_tasks(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in queries if 'FROM "auth_user"' in sql])
+
+    def test_tokens_without_claims_use_the_user_cache(self):
+        token = str(RefreshToken.for_user(self.user).access_token)
+        self.assertEqual(self.get_tasks(token)[0].status_code, 200)
+        response, queries = self.get_tasks(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([sql for sql in queries if 'FROM "auth_user"' in sql])
+
+    def test_deactivated_user_is_locked_out(self):
+        token = self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.get_tasks(token)[0].status_code, 401)
+
+    def test_revocation_survives_bulk_updates_and_cache_flush(self):
+        token = self.login()
+        self.assertEqual(self.get_tasks(token)[0].status_code, 200)
+        # update() обходить сигнали, а "не відкликано" ще в кеші – скидаємо кеш, як після рестарту
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.clear()
+        self.assertEqual(self.get_tasks(token)[0].status_code, 401)
+        User.objects.filter(pk=self.user.pk).update(is_active=True)
+        cache.clear()
+        self.assertEqual(self.get_tasks(token)[0].status_code, 401)
+
+    def test_rename_invalidates_username_claim(self):
+        token = self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = 'renamed'
+            self.user.save()
+        self.assertEqual(self.get_tasks(token)[0].status_code, 401)
+        self.assertTrue(TokenRevocation.objects.filter(user_id=self.user.pk).exists())
+
+
+class TaskSearchTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+
+        def task(title, description, project=self.project, column=column):
+            return Task.objects.create(title=title, description=description, project=project,
+                                       column=column, order=ORDER_GAP)
+
+        self.in_title = task('Deploy release', 'routine')
+        self.in_description = task('Routine', 'prepare the deployment checklist')
+        self.in_comment = task('Misc', 'nothing here')
+        Comment.objects.create(task=self.in_comment, user=self.user, text='blocked by deploy freeze')
+        task('Unrelated', 'nothing')
+
+        other = Project.objects.create(name='Other', description='')
+        task('Deploy elsewhere', '', project=other,
+             column=Column.objects.create(project=other, name='To do', order=ORDER_GAP))
+
+    def search(self, **params):
+        response = self.client.get(reverse('task-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_prefix_match_ranked_and_scoped_to_membership(self):
+        ids = [t['id'] for t in self.search(q='depl')['results']]
+        self.assertEqual(ids[0], self.in_title.id)
+        self.assertEqual(set(ids), {self.in_title.id, self.in_description.id, self.in_comment.id})
+
+    def test_comment_changes_update_the_index(self):
+        Comment.objects.filter(task=self.in_comment).delete()
+        self.assertNotIn(self.in_comment.id, [t['id'] for t in self.search(q='freeze')['results']])
+        self.in_title.title = 'Ship it'
+        self.in_title.save()
+        self.assertEqual(self.search(q='ship')['results'][0]['id'], self.in_title.id)
+
+    def test_cursor_pagination(self):
+        seen, cursor = [], None
+        while True:
+            params = {'q': 'deploy', 'page_size': 1}
+            if cursor:
+                params['cursor'] = cursor
+            page = self.search(**params)
+            seen += [t['id'] for t in page['results']]
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [t['id'] for t in self.search(q='deploy')['results']])
+        self.assertEqual(len(seen), 3)
+
+
+class LabelFilterTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.bug, self.urgent, self.docs = (Label.objects.create(project=self.project, name=n)
+                                              for n in ('bug', 'urgent', 'documentation'))
+        self.both = Task.objects.create(title='Both', description='-', project=self.project, column=column, order=1)
+        self.both.labels.set([self.bug, self.urgent])
+        self.bug_only = Task.objects.create(title='Bug', description='-', project=self.project, column=column, order=2)
+        self.bug_only.labels.set([self.bug])
+        self.docs_only = Task.objects.create(title='Docs', description='-', project=self.project, column=column, order=3)
+        self.docs_only.labels.set([self.docs])
+
+    def task_ids(self, **params):
+        response = self.client.get(reverse('task-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [t['id'] for t in response.data['results']]
+
+    def test_any_and_all(self):
+        labels = f'{self.bug.id},{self.urgent.id}'
+        self.assertEqual(self.task_ids(labels=labels), [self.both.id, self.bug_only.id])
+        self.assertEqual(self.task_ids(labels=labels, labels_match='all'), [self.both.id])
+        self.assertEqual(self.task_ids(label_name='DOC'), [self.docs_only.id])
+
+    def test_too_many_labels_are_rejected(self):
+        labels = ','.join(str(i) for i in range(1, TaskFilter.MAX_LABELS + 2))
+        response = self.client.get(reverse('task-list'), {'labels': labels, 'labels_match': 'all'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('labels', response.data)
+
+    def test_autocomplete(self):
+        other = Project.objects.create(name='Other', description='')
+        Label.objects.create(project=other, name='unused-bugfix')  # мітка чужого проєкту
+        response = self.client.get(reverse('label-autocomplete'), {'q': 'u'})
+        self.assertEqual([l['name'] for l in response.data], ['urgent', 'bug', 'documentation'])
+
+
+class ProjectLabelTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.bug = Label.objects.create(project=self.project, name='bug')
+        self.ui = Label.objects.create(project=self.project, name='ui')
+        self.tasks = [
+            Task.objects.create(title=f'T{i}', description='-', project=self.project, column=self.column, order=i + 1)
+            for i in range(3)
+        ]
+        self.other = Project.objects.create(name='Other', description='')
+
+    def counts(self):
+        return dict(Label.objects.filter(project=self.project).values_list('name', 'task_count'))
+
+    def test_task_count_follows_every_write_path(self):
+        self.tasks[0].labels.add(self.bug, self.ui)
+        self.tasks[1].labels.set([self.bug])
+        self.ui.tasks.add(self.tasks[2])
+        self.assertEqual(self.counts(), {'bug': 2, 'ui': 2})
+        self.tasks[0].labels.remove(self.ui)
+        self.tasks[1].labels.clear()
+        self.assertEqual(self.counts(), {'bug': 1, 'ui': 1})
+        self.tasks[0].delete()
+        self.ui.tasks.clear()
+        self.assertEqual(self.counts(), {'bug': 0, 'ui': 0})
+
+        response = self.client.post(reverse('task-bulk'), {
+            'create': [{'title': 'N', 'description': '-', 'project': self.project.id, 'column': self.column.id,
+                        'labels': [self.bug.id, self.ui.id]}],
+            'update': [{'id': self.tasks[1].id, 'labels': [self.ui.id]}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.counts(), {'bug': 1, 'ui': 2})
+        self.assertEqual(labels.refresh_task_counts(), 0)
+
+        Label.objects.filter(pk=self.bug.pk).update(task_count=7)
+        self.assertEqual(labels.refresh_task_counts([self.project.id]), 1)
+        self.assertEqual(self.counts(), {'bug': 1, 'ui': 2})
+
+    def test_labels_belong_to_one_project(self):
+        url = reverse('label-list')
+        response = self.client.post(url, {'project': self.project.id, 'name': 'bug'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {'project': self.other.id, 'name': 'bug'})
+        self.assertEqual(response.status_code, 403)
+        foreign = Label.objects.create(project=self.other, name='bug')
+        response = self.client.patch(reverse('task-detail', args=[self.tasks[0].id]), {'labels': [foreign.id]})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(reverse('label-detail', args=[self.bug.id]), {'name': 'defect'})
+        self.assertEqual(response.status_code, 200, response.data)
+
+        membership.load_project_ids(self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'project': self.project.id})
+        self.assertEqual([l['name'] for l in response.data], ['defect', 'ui'])
+        self.assertEqual(len(queries), 1)
+
+
+class DenormalizedCounterTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.todo = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.done = Column.objects.create(project=self.project, name='Done', order=2 * ORDER_GAP)
+
+    def counts(self):
+        self.project.refresh_from_db()
+        columns = dict(Column.objects.filter(project=self.project).values_list('name', 'task_count'))
+        return columns, self.project.open_task_count
+
+    def test_counters_follow_writes(self):
+        response = self.client.post(reverse('task-list'), {
+            'title': 'A', 'description': '-', 'project': self.project.id, 'column': self.todo.id,
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        task = Task.objects.get(pk=response.data['id'])
+        Task.objects.create(title='B', description='-', project=self.project, column=self.todo, order=2)
+        self.assertEqual(self.counts(), ({'To do': 2, 'Done': 0}, 2))
+
+        for text in ('one', 'two'):
+            response = self.client.post(reverse('comment-list'), {'task': task.id, 'text': text})
+            self.assertEqual(response.status_code, 201, response.data)
+        # повне збереження задачі не перезаписує лічильник застарілим значенням
+        task.refresh_from_db()
+        self.assertEqual(task.comment_count, 2)
+        response = self.client.patch(reverse('task-detail', args=[task.id]),
+                                     {'column': self.done.id, 'is_complete': True})
+        self.assertEqual(response.status_code, 200, response.data)
+        Comment.objects.filter(task=task).first().delete()
+        task.refresh_from_db()
+        self.assertEqual(task.comment_count, 1)
+        self.assertEqual(self.counts(), ({'To do': 1, 'Done': 1}, 1))
+
+        response = self.client.get(reverse('column-detail', args=[self.done.id]))
+        self.assertEqual(response.data['task_count'], 1)
+        response = self.client.get(reverse('project-board', args=[self.project.id]))
+        self.assertEqual(response.data['columns'][1]['tasks'][0]['comment_count'], 1)
+
+        task.delete()
+        self.assertEqual(self.counts(), ({'To do': 1, 'Done': 0}, 1))
+        self.assertEqual(counters.drift(), [])
+
+    def test_repair_reports_and_fixes_drift(self):
+        task = Task.objects.create(title='A', description='-', project=self.project, column=self.todo, order=1)
+        Comment.objects.create(task=task, user=self.user, text='hi')
+        Column.objects.filter(pk=self.done.pk).update(task_count=5)
+        Task.objects.filter(pk=task.pk).update(comment_count=0)
+
+        with self.assertRaises(CommandError):
+            call_command('repair_counters', check=True, stdout=io.StringIO(), stderr=io.StringIO())
+        out, err = io.StringIO(), io.StringIO()
+        call_command('repair_counters', projects=[self.project.id], stdout=out, stderr=err)
+        self.assertIn(f'Column {self.done.id}: stored=5 live=0', err.getvalue())
+        self.assertIn(f'Task {task.id}: stored=0 live=1', err.getvalue())
+        self.assertIn('Repaired 2 counters', out.getvalue())
+        self.assertEqual(counters.drift(), [])
+
+
+class ProjectAnalyticsTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.todo = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.done = Column.objects.create(project=self.project, name='Done', order=2 * ORDER_GAP)
+        self.other = User.objects.create_user(username='other', password='pass')
+        now = timezone.now()
+
+        def task(title, column=self.todo, **fields):
+            return Task.objects.create(title=title, description='-', project=self.project, column=column,
+                                       order=ORDER_GAP, **fields)
+
+        self.late = task('Late', assigned_to=self.user, due_date=now - datetime.timedelta(days=2),
+                         estimated_time=datetime.timedelta(hours=3), time_spent=datetime.timedelta(hours=1))
+        self.open = task('Open', assigned_to=self.other, due_date=now + datetime.timedelta(days=2))
+        self.finished = task('Finished', column=self.done, is_complete=True, assigned_to=self.user,
+                             due_date=now - datetime.timedelta(days=1), estimated_time=datetime.timedelta(hours=2),
+                             time_spent=datetime.timedelta(hours=2))
+
+    def stats(self):
+        response = self.client.get(reverse('project-analytics', args=[self.project.id]))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_stats_per_project_column_and_assignee(self):
+        # project + членство + rollup-и по колонках і виконавцях + прострочені сьогодні + колонки
+        with self.assertNumQueries(6):
+            stats = self.stats()
+        self.assertEqual(stats['totals'], {'open': 2, 'done': 1, 'overdue': 1,
+                                           'estimated_time': '05:00:00', 'time_spent': '03:00:00'})
+        todo, done = stats['columns']
+        self.assertEqual((todo['name'], todo['open'], todo['overdue'], todo['estimated_time']), ('To do', 2, 1, '03:00:00'))
+        self.assertEqual((done['open'], done['done'], done['overdue']), (0, 1, 0))
+        self.assertEqual(
+            [(a['username'], a['open'], a['done']) for a in stats['assignees']],
+            [('owner', 1, 1), ('other', 1, 0)],
+        )
+
+    def test_rollups_follow_task_changes(self):
+        self.open.is_complete = True
+        self.open.time_spent = datetime.timedelta(minutes=30)
+        self.open.save()
+        # частково завантажена задача: старий стан – з pre_save
+        late = Task.objects.only('id', 'title').get(pk=self.late.pk)
+        late.column = self.done
+        late.assigned_to = None
+        late.save()
+        self.finished.delete()
+        Task.objects.get(pk=self.open.pk).save(update_fields=['title'])
+        self.assertEqual(analytics.check(), [])
+
+        stats = self.stats()
+        self.assertEqual((stats['totals']['open'], stats['totals']['done']), (1, 1))
+        self.assertEqual([a['username'] for a in stats['assignees']], ['other', None])
+
+    def test_deleted_assignee_and_rebuild(self):
+        self.other.delete()
+        self.assertEqual(analytics.check(), [])
+        TaskRollup.objects.all().delete()
+        self.assertEqual(len(analytics.check()), 3)
+        self.assertEqual(analytics.rebuild([self.project.id]), 3)
+        self.assertEqual(analytics.check(), [])
+
+    def test_requires_membership(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get(reverse('project-analytics', args=[self.project.id]))
+        self.assertEqual(response.status_code, 403)
+
+
+class TransitionReportTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.todo = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.doing = Column.objects.create(project=self.project, name='Doing', order=2 * ORDER_GAP)
+        self.today = timezone.localdate()
+
+    def at(self, days_ago, hour=12):
+        return timezone.make_aware(datetime.datetime.combine(
+            self.today - datetime.timedelta(days=days_ago), datetime.time(hour)))
+
+    def log(self, task, old, new, days_ago):
+        # знімки у форматі TASK_ROLLUP_FIELDS: (project, column, assignee, is_complete, ...)
+        def state(value):
+            return value and (self.project.id, value[0], None, value[1])
+        transitions.write([transitions.transition(task.id, state(old), state(new), self.at(days_ago))])
+
+    def report(self, name, **params):
+        response = self.client.get(reverse(name, args=[self.project.id]), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_changes_are_logged_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='T', description='-', project=self.project, column=self.todo, order=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('task-detail', args=[task.id]), {'column': self.doing.id, 'title': 'T2'})
+            self.client.patch(reverse('task-detail', args=[task.id]), {'title': 'T3'})
+            task.refresh_from_db()
+            task_id = task.id
+            task.delete()
+        self.assertEqual(
+            list(TaskTransition.objects.filter(task_id=task_id).order_by('id')
+                 .values_list('from_column', 'to_column', 'from_complete', 'to_complete')),
+            [(None, self.todo.id, None, False), (self.todo.id, self.doing.id, False, False),
+             (self.doing.id, None, False, None)],
+        )
+
+    def test_cumulative_flow_rewinds_from_current_state(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = Task.objects.create(title='A', description='-', project=self.project, column=self.doing, order=1)
+            Task.objects.create(title='B', description='-', project=self.project, column=self.todo, order=2)
+        TaskTransition.objects.all().delete()
+        self.log(first, None, (self.todo.id, False), days_ago=3)
+        self.log(first, (self.todo.id, False), (self.doing.id, False), days_ago=1)
+
+        with self.assertNumQueries(5):
+            cfd = self.report('project-report-cfd', start=(self.today - datetime.timedelta(days=3)).isoformat(),
+                              end=self.today.isoformat())
+        self.assertEqual([c['name'] for c in cfd['columns']], ['To do', 'Doing'])
+        self.assertEqual([d['counts'] for d in cfd['days']], [[2, 0], [2, 0], [1, 1], [1, 1]])
+
+    def test_cycle_time_percentiles(self):
+        for i in range(4):
+            task = Task(id=1000 + i)
+            self.log(task, None, (self.todo.id, False), days_ago=10)
+            self.log(task, (self.todo.id, False), (self.doing.id, False), days_ago=5 + i)
+            self.log(task, (self.doing.id, False), (self.doing.id, True), days_ago=2)
+        self.log(Task(id=2000), (self.doing.id, False), (self.doing.id, True), days_ago=40)
+
+        report = self.report('project-report-cycle-time')
+        self.assertEqual(report['completed'], 4)
+        self.assertEqual(report['lead_time']['p50'], '8 00:00:00')
+        self.assertEqual(report['cycle_time'], {'p50': '4 00:00:00', 'p85': '6 00:00:00', 'p95': '6 00:00:00'})
+
+    def test_invalid_range(self):
+        response = self.client.get(reverse('project-report-cfd', args=[self.project.id]), {'start': '2026-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkTaskTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.todo = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.done = Column.objects.create(project=self.project, name='Done', order=2 * ORDER_GAP)
+        self.label = Label.objects.create(project=self.project, name='bug')
+        self.tasks = [
+            Task.objects.create(title=f'T{i}', description='-', project=self.project, column=self.todo, order=i + 1)
+            for i in range(4)
+        ]
+
+    def bulk(self, payload):
+        with mock.patch('task.views.publish') as publish:
+            response = self.client.post(reverse('task-bulk'), payload, format='json')
+        return response, publish
+
+    def payload(self, size, update=0, move=1):
+        return {
+            'create': [{'title': f'New {i}', 'description': '-', 'project': self.project.id,
+                        'column': self.todo.id, 'labels': [self.label.id], 'assigned_to': self.user.id}
+                       for i in range(size)],
+            'update': [{'id': self.tasks[update].id, 'title': 'Renamed', 'is_complete': True, 'labels': []}],
+            'move': [{'id': self.tasks[move].id, 'column': self.done.id}],
+        }
+
+    def test_one_transaction_and_one_event_per_project(self):
+        membership.load_project_ids(self.user.pk)
+        with CaptureQueriesContext(connection) as small:
+            response, publish = self.bulk(self.payload(2))
+        self.assertEqual(response.status_code, 200, response.data)
+        with CaptureQueriesContext(connection) as large:
+            self.bulk(self.payload(40, update=2, move=3))
+        # кількість запитів не залежить від розміру пакета
+        self.assertEqual(len(small), len(large))
+
+        publish.assert_called_once()
+        project_id, event_type, message = publish.call_args.args
+        self.assertEqual((project_id, event_type, message['action']), (self.project.id, 'task_update', 'tasks_bulk_changed'))
+        self.assertEqual([t['title'] for t in message['created']], ['New 0', 'New 1'])
+        self.assertEqual(message['moved'], [{'id': self.tasks[1].id, 'column': self.done.id,
+                                             'order': response.data['moved'][0]['order']}])
+
+        first, second = (Task.objects.get(pk=t['id']) for t in response.data['created'])
+        self.assertEqual(list(second.labels.all()), [self.label])
+        self.assertGreater(second.order, first.order)
+        self.assertEqual(self.column_ids(), {self.todo.id: 44, self.done.id: 2})
+        self.assertEqual(analytics.check(), [])
+        self.assertEqual(counters.drift(), [])
+
+    def column_ids(self):
+        return dict(Task.objects.values_list('column_id').annotate(n=Count('id')).order_by())
+
+    def test_foreign_project_rolls_back_everything(self):
+        other = Project.objects.create(name='Other', description='')
+        column = Column.objects.create(project=other, name='To do', order=ORDER_GAP)
+        payload = self.payload(1)
+        payload['create'].append({'title': 'X', 'description': '-', 'project': other.id, 'column': column.id})
+        response, publish = self.bulk(payload)
+        self.assertEqual(response.status_code, 403)
+        publish.assert_not_called()
+        self.assertFalse(Task.objects.filter(title__in=['New 0', 'X', 'Renamed']).exists())
+
+        response, _ = self.bulk({'move': [{'id': self.tasks[0].id, 'column': column.id}]})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProjectExportTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        label = Label.objects.create(project=self.project, name='bug')
+        self.tasks = []
+        for i in range(3):
+            task = Task.objects.create(title=f'T{i}', description='-', project=self.project, column=self.column,
+                                       order=i + 1, assigned_to=self.user, estimated_time=datetime.timedelta(hours=i))
+            task.labels.set([label])
+            self.tasks.append(task)
+        # коментар оновлює updated_at задачі – на останній, щоб порядок експорту лишився T0, T1, T2
+        Comment.objects.create(task=self.tasks[2], user=self.user, text='first')
+
+    def export(self, **params):
+        response = self.client.get(reverse('project-export', args=[self.project.id]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson_with_comments(self):
+        response, body = self.export(format='ndjson', comments='1')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r['title'] for r in rows], ['T0', 'T1', 'T2'])
+        self.assertEqual((rows[0]['column'], rows[0]['assignee'], rows[0]['labels']), ('To do', 'owner', ['bug']))
+        self.assertEqual([c['text'] for c in rows[2]['comments']], ['first'])
+        self.assertEqual(rows[2]['estimated_time'], '02:00:00')
+
+    def test_csv(self):
+        _, body = self.export(format='csv')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([r['title'] for r in rows], ['T0', 'T1', 'T2'])
+        self.assertEqual(rows[0]['labels'], 'bug')
+
+    def test_since_returns_changed_and_deleted_tasks(self):
+        response, _ = self.export(format='ndjson')
+        since = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse('task-detail', args=[self.tasks[1].id]), {'title': 'Changed'})
+            deleted_id = self.tasks[2].id
+            self.tasks[2].delete()
+        _, body = self.export(format='ndjson', since=since.isoformat())
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(r['id'], r.get('title'), r['deleted']) for r in rows],
+                         [(self.tasks[1].id, 'Changed', False), (deleted_id, None, True)])
+        self.assertLess(datetime.datetime.fromisoformat(response['X-Export-Next-Since']), since)
+
+        response = self.client.get(reverse('project-export', args=[self.project.id]), {'format': 'csv', 'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_since_includes_comment_changes(self):
+        since = timezone.now()
+        Comment.objects.create(task=self.tasks[1], user=self.user, text='later')
+        self.tasks[2].comments.get().delete()
+        _, body = self.export(format='ndjson', comments='1', since=since.isoformat())
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual({r['id']: [c['text'] for c in r['comments']] for r in rows},
+                         {self.tasks[1].id: ['later'], self.tasks[2].id: []})
+
+    def test_asgi_export_is_an_async_stream(self):
+        token = str(RefreshToken.for_user(self.user).access_token)
+
+        async def fetch():
+            response = await AsyncClient().get(reverse('project-export', args=[self.project.id]), {'format': 'ndjson'},
+                                               headers={'Authorization': f'Bearer {token}'})
+            return response, b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+        response, body = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200)
+        # асинхронний ітератор – Django не збирає відповідь у пам'ять (sync_to_async(list))
+        self.assertTrue(response.is_async)
+        self.assertEqual([json.loads(line)['title'] for line in body.splitlines()], ['T0', 'T1', 'T2'])
+
+
+class TaskImportTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, 'task_always_eager', eager)
+        self.column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        Task.objects.create(title='Existing', description='', project=self.project, column=self.column, order=ORDER_GAP)
+        self.assignee = User.objects.create_user(username='dev', email='dev@example.com', password='pass')
+
+    def ndjson(self, rows):
+        return ''.join(json.dumps(row) + '\n' for row in rows)
+
+    def test_api_imports_ndjson(self):
+        self.project.users.add(self.assignee)
+        body = self.ndjson([
+            {'title': 'A', 'column': 'To do', 'labels': ['bug', 'ui'], 'assignee': 'dev@example.com',
+             'estimated_time': '01:30:00', 'comments': [{'user': 'dev', 'text': 'hi'}, {'user': 'ghost', 'text': 'yo'}]},
+            {'title': 'B', 'column': 'Done', 'is_complete': True, 'labels': ['bug']},
+            {'title': '', 'column': 'Done'},
+        ]) + 'not json\n'
+        upload = SimpleUploadedFile('tasks.ndjson', body.encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('project-import', args=[self.project.id]), {'file': upload},
+                                        format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual((response.data['total_rows'], response.data['skipped_rows']), (4, 2))
+        self.assertEqual([e['line'] for e in response.data['errors']], [3, 4])
+
+        response = self.client.get(reverse('project-import-detail', args=[self.project.id, response.data['id']]))
+        self.assertEqual((response.data['status'], response.data['imported_rows']), (TaskImport.DONE, 2))
+        # автор коментаря 'ghost' не учасник – коментар від імені того, хто імпортує, з помилкою
+        self.assertEqual([e['line'] for e in response.data['errors']], [3, 4, 1])
+        self.assertFalse(TaskImportRow.objects.exists())
+
+        a, b = Task.objects.filter(project=self.project, title__in=['A', 'B']).order_by('title')
+        self.assertEqual((a.column_id, a.assigned_to_id, a.estimated_time), (self.column.id, self.assignee.id,
+                                                                            datetime.timedelta(hours=1, minutes=30)))
+        self.assertGreater(a.order, ORDER_GAP)
+        self.assertEqual(sorted(a.labels.values_list('name', flat=True)), ['bug', 'ui'])
+        self.assertEqual(Label.objects.filter(project=self.project, name='bug').count(), 1)
+        self.assertEqual([(c.user_id, c.text) for c in a.comments.order_by('id')],
+                         [(self.assignee.id, 'hi'), (self.user.id, 'yo')])
+        self.assertEqual((b.column.name, b.is_complete), ('Done', True))
+        self.assertGreater(b.column.order, self.column.order)
+        self.assertEqual(analytics.check([self.project.id]), [])
+        self.assertEqual(TaskTransition.objects.filter(task_id__in=[a.id, b.id], from_column__isnull=True).count(), 2)
+        self.assertEqual((a.comment_count, b.column.task_count), (2, 1))
+        self.assertEqual(counters.drift(), [])
+
+    def test_api_import_does_not_reach_outside_the_project(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pass')
+        body = self.ndjson([
+            {'title': 'A', 'assignee': 'dev', 'comments': [{'user': 'admin', 'text': 'approved'}]},
+            {'title': 'B', 'assignee': 'admin@example.com', 'comments': [{'user': 'owner', 'text': 'mine'}]},
+        ])
+        upload = SimpleUploadedFile('tasks.ndjson', body.encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('project-import', args=[self.project.id]), {'file': upload},
+                                        format='multipart')
+        task_import = TaskImport.objects.get(pk=response.data['id'])
+        self.assertEqual(task_import.status, TaskImport.DONE)
+        self.assertEqual([(e['line'], e['error'].split(':')[0]) for e in task_import.errors],
+                         [(1, 'assignee'), (1, 'comments'), (2, 'assignee')])
+
+        a, b = Task.objects.filter(project=self.project, title__in=['A', 'B']).order_by('title')
+        self.assertEqual((a.assigned_to_id, b.assigned_to_id), (None, None))
+        self.assertEqual(list(Comment.objects.filter(task__in=[a, b]).order_by('task__title').values_list('user_id', flat=True)),
+                         [self.user.id, self.user.id])
+        self.assertFalse(Comment.objects.filter(user=admin).exists())
+
+    def test_resume_after_failure_does_not_duplicate(self):
+        rows = [{'title': f'T{i}', 'labels': ['x']} for i in range(5)]
+        task_import = importer.load(self.project, io.StringIO(self.ndjson(rows)), 'ndjson', self.user)
+        self.assertEqual(task_import.total_rows, 5)
+
+        batch = importer._import_batch
+        calls = []
+
+        def failing_batch(cursor, current):
+            calls.append(current)
+            if len(calls) == 2:
+                raise RuntimeError('worker died')
+            return batch(cursor, current)
+
+        with mock.patch.object(importer, 'IMPORT_BATCH_SIZE', 2), \
+                mock.patch.object(importer, '_import_batch', failing_batch), self.assertRaises(RuntimeError):
+            importer.run(task_import.pk)
+        task_import.refresh_from_db()
+        self.assertEqual((task_import.status, task_import.imported_rows), (TaskImport.FAILED, 2))
+
+        out = io.StringIO()
+        with mock.patch.object(importer, 'IMPORT_BATCH_SIZE', 2):
+            call_command('import_tasks', self.project.id, resume=task_import.pk, stdout=out)
+        self.assertIn('done: 5 tasks', out.getvalue())
+        titles = list(Task.objects.filter(project=self.project).exclude(title='Existing')
+                      .order_by('order').values_list('title', flat=True))
+        self.assertEqual(titles, [f'T{i}' for i in range(5)])
+        self.assertEqual(Task.labels.through.objects.filter(label__name='x').count(), 5)
+
+    def test_command_imports_export_csv(self):
+        task = Task.objects.get(title='Existing')
+        task.labels.set([Label.objects.create(project=self.project, name='bug')])
+        Comment.objects.create(task=task, user=self.user, text='note')
+        exported = ''.join(export.stream(self.project, 'csv', comments=True))
+        other = Project.objects.create(name='Copy', description='')
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as handle:
+            handle.write(exported)
+        self.addCleanup(os.remove, handle.name)
+        out = io.StringIO()
+        call_command('import_tasks', other.id, handle.name, user='owner', stdout=out)
+        copied = Task.objects.get(project=other)
+        self.assertEqual((copied.title, copied.column.name), ('Existing', 'To do'))
+        self.assertEqual(list(copied.labels.values_list('name', flat=True)), ['bug'])
+        self.assertEqual(list(copied.comments.values_list('text', flat=True)), ['note'])
+
+
+class ResponseCacheTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.task = Task.objects.create(title='T', description='', project=self.project, column=self.column)
+        self.other = Project.objects.create(name='Other', description='')
+        self.other_column = Column.objects.create(project=self.other, name='Other', order=ORDER_GAP)
+        self.other_task = Task.objects.create(title='O', description='', project=self.other, column=self.other_column)
+        response_cache.reset_stats()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_label_list_invalidated_only_by_member_projects(self):
+        url = reverse('label-list')
+        bug = Label.objects.create(project=self.project, name='bug')
+        ui = Label.objects.create(project=self.other, name='ui')
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.get(url)
+        self.assertEqual((response['X-Cache'], [l['name'] for l in response.data]), ('HIT', ['bug']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_task.labels.add(ui)
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.labels.add(bug)
+        response = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data[0]['task_count']), ('MISS', 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bug.name = 'defect'
+            bug.save()
+        self.assertIn('defect', [l['name'] for l in self.get(url).data])
+
+        stats = response_cache.stats()['labels']
+        self.assertEqual((stats['hits'], stats['misses']), (2, 3))
+        self.assertEqual(stats['hit_ratio'], 0.4)
+        self.assertIsNotNone(stats['hit_ms'])
+
+    def test_column_and_member_lists(self):
+        columns = reverse('column-list')
+        self.assertEqual(self.get(columns, project=self.project.id)['X-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks(execute=True):
+            Column.objects.create(project=self.other, name='Done', order=2 * ORDER_GAP)
+        self.assertEqual(self.get(columns, project=self.project.id)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(columns, {'project': self.project.id, 'name': 'Done', 'order': 2 * ORDER_GAP})
+        response = self.get(columns, project=self.project.id)
+        self.assertEqual((response['X-Cache'], len(response.data)), ('MISS', 2))
+
+        users = reverse('project-list-users', args=[self.project.id])
+        self.assertEqual(self.get(users)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(users)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.users.add(User.objects.create_user(username='new', password='pass'))
+        response = self.get(users)
+        self.assertEqual((response['X-Cache'], len(response.data)), ('MISS', 2))
+
+        projects = reverse('project-list')
+        self.get(projects)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.users.add(self.user)
+        response = self.get(projects)
+        self.assertEqual((response['X-Cache'], len(response.data)), ('MISS', 2))
+
+
+    def test_task_and_user_writes_keep_project_and_column_lists(self):
+        column = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        columns, projects = reverse('column-list'), reverse('project-list')
+        self.get(columns, project=self.project.id)
+        self.get(projects)
+        # лічильники (task.counters) і вхід користувача – кешовані списки не змінюються
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='T', description='', project=self.project, column=column)
+            task.is_complete = True
+            task.save()
+            self.client.post(reverse('login'), {'username': 'owner', 'password': 'pass'}, format='json')
+            self.user.first_name = 'Owner'
+            self.user.save()
+        response = self.get(columns, project=self.project.id)
+        self.assertEqual((response['X-Cache'], sorted(response.data[0])), ('HIT', ['id', 'name', 'order', 'project']))
+        response = self.get(projects)
+        self.assertEqual((response['X-Cache'], sorted(response.data[0])), ('HIT', ['description', 'id', 'name', 'users']))
+
+        # видалення учасника – каскад без m2m_changed, але склад проєкту змінився
+        member = User.objects.create_user(username='member', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.users.add(member)
+        self.assertEqual(self.get(projects).data[0]['users'], [self.user.id, member.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            member.delete()
+        response = self.get(projects)
+        self.assertEqual((response['X-Cache'], response.data[0]['users']), ('MISS', [self.user.id]))
+
+class MetricsTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+
+    def scrape(self, **headers):
+        response = self.client.get(reverse('metrics'), **headers)
+        return response, response.content.decode()
+
+    def value(self, text, series):
+        line = next(line for line in text.splitlines() if line.startswith(series + ' '))
+        return float(line.rsplit(' ', 1)[1])
+
+    def test_view_actions_are_measured(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get(reverse('column-list')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('task-detail', args=[999999])).status_code, 404)
+
+        response, text = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        labels = 'kind="http",handler="ColumnViewSet",action="list"'
+        self.assertEqual(self.value(text, f'taskmaster_requests_total{{{labels},status="200"}}'), 2)
+        self.assertEqual(self.value(text, f'taskmaster_request_duration_seconds_bucket{{{labels},le="+Inf"}}'), 2)
+        self.assertGreater(self.value(text, f'taskmaster_db_queries_total{{{labels}}}'), 0)
+        self.assertGreater(self.value(text, f'taskmaster_serializer_duration_seconds_total{{{labels}}}'), 0)
+        self.assertEqual(self.value(
+            text, 'taskmaster_requests_total{kind="http",handler="TaskViewSet",action="retrieve",status="404"}'), 1)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_is_required_when_configured(self):
+        response, _ = self.scrape()
+        self.assertEqual(response.status_code, 403)
+        response, text = self.scrape(HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE taskmaster_group_send_duration_seconds histogram', text)
+
+
+class BoardQueryBudgetTests(BaseAPITestCase):
+    # project + columns + tasks + labels + comments(з user)
+    BOARD_QUERY_BUDGET = 5
+
+    def fetch_board(self):
+        url = reverse('project-detail-nested', args=[self.project.id])
+        membership.load_project_ids(self.user.pk)
+        with self.assertNumQueries(self.BOARD_QUERY_BUDGET):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_query_count_does_not_grow_with_board_size(self):
+        self.make_board(columns=2, tasks_per_column=2, comments_per_task=1)
+        small = self.fetch_board()
+        self.make_board(columns=5, tasks_per_column=10, comments_per_task=3)
+        large = self.fetch_board()
+
+        self.assertEqual(len(small['columns']), 2)
+        self.assertEqual(len(large['columns']), 7)
+        self.assertEqual(sum(len(c['tasks']) for c in large['columns']), 54)
+
+    def test_nested_payload_is_ordered(self):
+        self.make_board(columns=2, tasks_per_column=3, comments_per_task=2)
+        board = self.fetch_board()
+        for column in board['columns']:
+            orders = [t['order'] for t in column['tasks']]
+            self.assertEqual(orders, sorted(orders))
+            for task in column['tasks']:
+                self.assertEqual(len(task['comments']), 2)
+                self.assertEqual(task['comments'][0]['user'], 'owner')
+
+
+class BoardCacheTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_board(columns=2, tasks_per_column=2, comments_per_task=1)
+        self.url = reverse('project-detail-nested', args=[self.project.id])
+
+    def test_matching_etag_returns_304_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_write_changes_etag_and_payload(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json(), first.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.filter(project=self.project).first().delete()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(sum(len(c['tasks']) for c in response.json()['columns']), 3)
+
+
+class PagedBoardTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_board(columns=2, tasks_per_column=5, comments_per_task=2)
+
+    def test_board_returns_first_page_per_column_and_cursor(self):
+        url = reverse('project-board', args=[self.project.id])
+        board = self.client.get(url, {'tasks_per_column': 2}).json()
+        self.assertEqual(len(board['columns']), 2)
+        column = board['columns'][0]
+        self.assertEqual([t['title'] for t in column['tasks']], ['Task 0-0', 'Task 0-1'])
+        self.assertEqual(column['tasks'][0]['comment_count'], 2)
+        self.assertNotIn('comments', column['tasks'][0])
+
+        # Дочитуємо колонку курсорами до кінця
+        titles = [t['title'] for t in column['tasks']]
+        cursor = column['next_cursor']
+        tasks_url = reverse('project-column-tasks', args=[self.project.id, column['id']])
+        while cursor:
+            page = self.client.get(tasks_url, {'cursor': cursor, 'page_size': 2}).json()
+            titles += [t['title'] for t in page['results']]
+            cursor = page['next_cursor']
+        self.assertEqual(titles, [f'Task 0-{i}' for i in range(5)])
+
+    def test_board_and_columns_require_membership(self):
+        column = Column.objects.filter(project=self.project).first()
+        other = Project.objects.create(name='Other', description='')
+        foreign = Column.objects.create(project=other, name='To do', order=ORDER_GAP)
+        response = self.client.get(reverse('project-column-tasks', args=[self.project.id, foreign.id]))
+        self.assertEqual(response.status_code, 404)
+
+        outsider = User.objects.create_user(username='outsider', password='pass')
+        self.client.force_authenticate(outsider)
+        for url in (reverse('project-board', args=[self.project.id]),
+                    reverse('project-detail-nested', args=[self.project.id]),
+                    reverse('project-column-tasks', args=[self.project.id, column.id])):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 403, url)
+            self.assertNotIn('ETag', response)
+
+    def test_task_comments_on_demand(self):
+        task = Task.objects.filter(project=self.project).first()
+        response = self.client.get(reverse('task-comments', args=[task.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+
+class TaskKeysetPaginationTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_board(columns=1, tasks_per_column=7, comments_per_task=0)
+        # Кілька однакових і порожніх дедлайнів – перевіряємо тайбрейкер id та NULL-и
+        due = timezone.now() + datetime.timedelta(days=1)
+        for i, task in enumerate(Task.objects.order_by('id')):
+            task.due_date = None if i % 3 == 0 else due + datetime.timedelta(days=i % 2)
+            task.save()
+
+    def walk(self, ordering):
+        ids, url, params = [], reverse('task-list'), {'ordering': ordering, 'page_size': 2}
+        while url:
+            page = self.client.get(url, params).json()
+            ids += [t['id'] for t in page['results']]
+            url, params = page['next'], None
+        return ids
+
+    def test_pages_cover_every_task_once_in_order(self):
+        for ordering in ('created_at', '-created_at', 'due_date', '-due_date'):
+            with self.subTest(ordering=ordering):
+                direction = '-' if ordering.startswith('-') else ''
+                expected = list(
+                    Task.objects.order_by(ordering, f'{direction}id').values_list('id', flat=True)
+                )
+                self.assertEqual(self.walk(ordering), expected)
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, CACHES=TEST_CACHES)
+class MoveQueryBudgetTests(BaseAPITestCase):
+    """Кількість запитів переміщення не залежить від розміру колонки (sync-частина ProjectConsumer)."""
+
+    def setUp(self):
+        super().setUp()
+        self.consumer = ProjectConsumer()
+        self.consumer.project_id = self.project.id
+
+    def column(self, name, size, gap=ORDER_GAP):
+        column = Column.objects.create(project=self.project, name=name, order=ORDER_GAP)
+        Task.objects.bulk_create(
+            Task(title=f'{name}-{i}', description='', project=self.project, column=column, order=(i + 1) * gap)
+            for i in range(size)
+        )
+        return column, list(Task.objects.filter(column=column).order_by('order').values_list('id', flat=True))
+
+    def move_queries(self, column, task_id, position):
+        # move_task – database_sync_to_async (дескриптор); .func – сама sync-функція, у потоці тесту
+        move_task = ProjectConsumer.__dict__['move_task'].func
+        with mock.patch('task.consumers.rebalance_task_order') as rebalance, \
+                self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            result = move_task(self.consumer, {
+                'action': 'move_task', 'task_id': task_id, 'new_column': column.id, 'new_order': position,
+            })
+        self.assertIsNotNone(result)
+        return len(queries), rebalance
+
+    def test_move_cost_is_constant(self):
+        small, small_ids = self.column('small', 3)
+        large, large_ids = self.column('large', 300)
+        small_count, rebalance = self.move_queries(small, small_ids[-1], 1)
+        rebalance.delay.assert_not_called()
+        large_count, _ = self.move_queries(large, large_ids[-1], 150)
+        self.assertEqual(small_count, large_count)
+
+    def test_narrow_gap_schedules_background_rebalance(self):
+        plain, plain_ids = self.column('plain', 3)
+        narrow, narrow_ids = self.column('narrow', 300, gap=REBALANCE_THRESHOLD)
+        plain_count, _ = self.move_queries(plain, plain_ids[-1], 2)
+        narrow_count, rebalance = self.move_queries(narrow, narrow_ids[-1], 2)
+        rebalance.delay.assert_called_once_with(narrow.id)
+        self.assertEqual(plain_count, narrow_count)
+
+    def test_rebalanced_columns_serialize_without_queries(self):
+        for i in range(3):
+            Column.objects.create(project=self.project, name=f'C{i}', order=i + 1)
+        changed = rebalance_columns(self.project.id)
+        self.assertEqual(len(changed), 3)
+        with self.assertNumQueries(0):
+            data = ColumnSerializer(changed, many=True).data
+        self.assertEqual([c['order'] for c in data], [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP])
+
+    def test_inline_rebalance_cost_is_constant(self):
+        # ключі вичерпано (сусіди поспіль) – перенумерація одним UPDATE, теж за сталу кількість запитів
+        small, small_ids = self.column('small', 3, gap=1)
+        large, large_ids = self.column('large', 300, gap=1)
+        small_count, _ = self.move_queries(small, small_ids[-1], 2)
+        large_count, _ = self.move_queries(large, large_ids[-1], 2)
+        self.assertEqual(small_count, large_count)
+        orders = list(Task.objects.filter(column=large).order_by('order').values_list('order', flat=True))
+        self.assertTrue(all(b - a >= REBALANCE_THRESHOLD for a, b in zip(orders, orders[1:])))
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, CACHES=TEST_CACHES)
+class ProjectConsumerMoveTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(name='Board', description='')
+        self.todo = Column.objects.create(project=self.project, name='To do', order=ORDER_GAP)
+        self.done = Column.objects.create(project=self.project, name='Done', order=2 * ORDER_GAP)
+        self.tasks = [
+            Task.objects.create(title=f'T{i}', description='', project=self.project,
+                                column=self.todo, order=(i + 1) * ORDER_GAP)
+            for i in range(3)
+        ]
+
+    def send(self, content):
+        async def exchange():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/projects/{self.project.id}/'
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.send_json_to(content)
+            message = await communicator.receive_json_from(timeout=5)
+            await communicator.disconnect()
+            return message
+        return async_to_sync(exchange)()
+
+    def column_titles(self, column):
+        return list(Task.objects.filter(column=column).order_by('order', 'id').values_list('title', flat=True))
+
+    def test_move_task_writes_only_the_moved_row(self):
+        last = self.tasks[-1]
+        message = self.send({'action': 'move_task', 'task_id': last.id, 'new_column': self.todo.id, 'new_order': 1})
+        self.assertEqual(self.column_titles(self.todo), ['T2', 'T0', 'T1'])
+        self.assertEqual([t['id'] for t in message['target_tasks']], [last.id])
+        # Ключі інших задач не змінилися
+        self.assertEqual(
+            list(Task.objects.filter(pk__in=[t.pk for t in self.tasks[:2]]).order_by('id').values_list('order', flat=True)),
+            [ORDER_GAP, 2 * ORDER_GAP],
+        )
+
+        self.send({'action': 'move_task', 'task_id': self.tasks[0].id, 'new_column': self.done.id, 'new_order': 5})
+        self.assertEqual(self.column_titles(self.todo), ['T2', 'T1'])
+        self.assertEqual(self.column_titles(self.done), ['T0'])
+        # rollup-и аналітики оновлені разом з переміщенням
+        self.assertEqual(analytics.check(), [])
+        self.assertEqual(
+            dict(TaskRollup.objects.filter(task_count__gt=0).values_list('column_id', 'task_count')),
+            {self.todo.id: 2, self.done.id: 1},
+        )
+        self.assertEqual(
+            list(Column.objects.order_by('order').values_list('task_count', flat=True)), [2, 1],
+        )
+        self.assertEqual(counters.drift(), [])
+
+    def test_consumer_actions_are_measured(self):
+        metrics.registry.reset()
+        self.send({'action': 'move_task', 'task_id': self.tasks[0].id, 'new_column': self.done.id, 'new_order': 1})
+        self.send({'action': 'no_such_action', 'payload': 1})
+        text = metrics.registry.render()
+        labels = 'kind="ws",handler="ProjectConsumer",action="move_task"'
+        self.assertIn(f'taskmaster_requests_total{{{labels},status="ok"}} 1', text)
+        self.assertIn('taskmaster_requests_total{kind="ws",handler="ProjectConsumer",action="other",status="ok"} 1', text)
+        queries = next(line for line in text.splitlines() if line.startswith(f'taskmaster_db_queries_total{{{labels}}}'))
+        self.assertGreater(int(queries.rsplit(' ', 1)[1]), 0)
+        self.assertIn('taskmaster_group_send_duration_seconds_count 2', text)
+
+    def test_invalid_messages_get_an_error_frame(self):
+        for content in (
+            {'action': 'move_task', 'task_id': self.tasks[0].id, 'new_column': self.done.id, 'new_order': 'top'},
+            {'action': 'move_column', 'column_id': 'x'},
+            {'action': 'add_column', 'column_name': 'Review', 'order': 'second'},
+            {'action': 'add_column'},
+        ):
+            message = self.send(content)
+            self.assertEqual((message['action'], message['request']), ('error', content['action']), message)
+        self.assertEqual(self.column_titles(self.todo), ['T0', 'T1', 'T2'])
+        self.assertFalse(Column.objects.filter(name='Review').exists())
+
+    def test_add_column_appends_or_inserts_at_position(self):
+        first = self.send({'action': 'add_column', 'column_name': 'Review'})
+        second = self.send({'action': 'add_column', 'column_name': 'Archive'})
+        inserted = self.send({'action': 'add_column', 'column_name': 'Backlog', 'position': 1})
+        # старий клієнт: щільний order – та сама позиція
+        legacy = self.send({'action': 'add_column', 'column_name': 'Doing', 'order': 3})
+        self.assertEqual([m['action'] for m in (first, second, inserted, legacy)], ['column_added'] * 4)
+        self.assertLess(first['column']['order'], second['column']['order'])
+        self.assertEqual(
+            list(Column.objects.filter(project=self.project).order_by('order').values_list('name', flat=True)),
+            ['Backlog', 'To do', 'Doing', 'Done', 'Review', 'Archive'],
+        )
+
+    def test_move_column(self):
+        message = self.send({'action': 'move_column', 'column_id': self.done.id, 'new_order': 1})
+        self.assertEqual([c['id'] for c in message['columns']], [self.done.id])
+        self.assertEqual(
+            list(Column.objects.filter(project=self.project).order_by('order').values_list('id', flat=True)),
+            [self.done.id, self.todo.id],
+        )
+
+    def test_actions_are_broadcast_to_the_whole_group(self):
+        async def exchange():
+            sender, watcher = (
+                WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/projects/{self.project.id}/')
+                for _ in range(2)
+            )
+            for communicator in (sender, watcher):
+                connected, _ = await communicator.connect()
+                self.assertTrue(connected)
+            for content in (
+                {'action': 'move_task', 'task_id': self.tasks[0].id, 'new_column': self.done.id, 'new_order': 1},
+                {'action': 'move_column', 'column_id': self.done.id, 'new_order': 1},
+                {'action': 'add_column', 'column_name': 'Review'},
+            ):
+                await sender.send_json_to(content)
+            frames = {}
+            for communicator in (sender, watcher):
+                frames[communicator] = [await communicator.receive_json_from(timeout=5) for _ in range(3)]
+                self.assertTrue(await communicator.receive_nothing(timeout=0.2))
+                await communicator.disconnect()
+            return frames[sender], frames[watcher]
+
+        sent, watched = async_to_sync(exchange)()
+        self.assertEqual(watched, sent)
+        self.assertEqual([m['action'] for m in watched], ['task_moved', 'column_moved', 'column_added'])
+        self.assertEqual((watched[0]['from_column'], watched[0]['to_column']), (self.todo.id, self.done.id))
+        self.assertEqual(watched[2]['column']['name'], 'Review')
+
+    def test_unknown_or_foreign_ids_are_ignored(self):
+        other = Project.objects.create(name='Other', description='')
+        foreign_column = Column.objects.create(project=other, name='Foreign', order=ORDER_GAP)
+        foreign_task = Task.objects.create(title='F', description='', project=other,
+                                           column=foreign_column, order=ORDER_GAP)
+
+        async def exchange():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/projects/{self.project.id}/'
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            for content in (
+                {'action': 'move_task', 'task_id': 999999, 'new_column': self.done.id},
+                {'action': 'move_task', 'task_id': foreign_task.id, 'new_column': self.done.id},
+                {'action': 'move_task', 'task_id': self.tasks[0].id, 'new_column': foreign_column.id},
+                {'action': 'move_column', 'column_id': foreign_column.id, 'new_order': 1},
+            ):
+                await communicator.send_json_to(content)
+            silent = await communicator.receive_nothing(timeout=0.5)
+            await communicator.disconnect()
+            return silent
+
+        self.assertTrue(async_to_sync(exchange)())
+        self.assertEqual(self.column_titles(self.todo), ['T0', 'T1', 'T2'])
+        self.assertEqual(self.column_titles(foreign_column), ['F'])
+
+    def test_update_handlers_forward_group_events(self):
+        async def exchange():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/projects/{self.project.id}/'
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            layer = get_channel_layer()
+            received = []
+            for kind in ('task_update', 'column_update', 'comment_update', 'project_update'):
+                await layer.group_send(f'project_{self.project.id}', {'type': kind, 'message': {'action': kind}})
+                received.append(await communicator.receive_json_from(timeout=5))
+            await communicator.disconnect()
+            return received
+
+        self.assertEqual(
+            [m['action'] for m in async_to_sync(exchange)()],
+            ['task_update', 'column_update', 'comment_update', 'project_update'],
+        )
+
+    def test_missing_project_is_rejected(self):
+        async def exchange():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/projects/999999/')
+            connected, code = await communicator.connect()
+            await communicator.disconnect()
+            return connected, code
+
+        self.assertEqual(async_to_sync(exchange)(), (False, 4001))
+
+    def test_exhausted_keys_are_rebalanced(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(order=1)
+        Task.objects.filter(pk=self.tasks[1].pk).update(order=2)
+        self.send({'action': 'move_task', 'task_id': self.tasks[2].id, 'new_column': self.todo.id, 'new_order': 2})
+        self.assertEqual(self.column_titles(self.todo), ['T0', 'T2', 'T1'])
+        orders = list(Task.objects.filter(column=self.todo).order_by('order').values_list('order', flat=True))
+        self.assertTrue(all(b - a >= REBALANCE_THRESHOLD for a, b in zip(orders, orders[1:])))
+
+    def test_resume_beyond_the_log_sends_a_board_snapshot(self):
+        async def resume():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/projects/{self.project.id}/?resume_from=999999999'
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            message = await communicator.receive_json_from(timeout=5)
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(resume)()
+        self.assertEqual(message['action'], 'board_snapshot')
+        self.assertEqual(message['board']['id'], self.project.id)
+        self.assertEqual([c['id'] for c in message['board']['columns']], [self.todo.id, self.done.id])
+
+    @override_settings(BOARD_EVENT_COALESCE_MS=300)
+    def test_burst_is_coalesced_into_one_frame(self):
+        moved = self.tasks[0]
+
+        async def burst():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f'/ws/projects/{self.project.id}/'
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            for position in (3, 1, 2):
+                await communicator.send_json_to({'action': 'move_task', 'task_id': moved.id,
+                                                 'new_column': self.done.id, 'new_order': position})
+            await communicator.send_json_to({'action': 'move_column', 'column_id': self.done.id, 'new_order': 1})
+            message = await communicator.receive_json_from(timeout=5)
+            self.assertTrue(await communicator.receive_nothing(timeout=0.5))
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(burst)()
+        self.assertEqual(message['action'], 'events_batch')
+        self.assertEqual([event['action'] for event in message['events']], ['task_moved', 'column_moved'])
+        self.assertEqual(message['events'][0]['order'], Task.objects.get(pk=moved.pk).order)
+
+
+class EventBatchTests(SimpleTestCase):
+    def frame(self, *messages):
+        batch = EventBatch()
+        for message in messages:
+            batch.add('task_update', message)
+        return batch.frame()
+
+    def test_last_state_wins_and_keeps_created(self):
+        frame = self.frame(
+            {'action': 'task_created', 'task': {'id': 1, 'title': 'a'}},
+            {'action': 'task_updated', 'task': {'id': 1, 'title': 'b'}},
+            {'action': 'task_updated', 'task': {'id': 2, 'title': 'c'}},
+            {'action': 'user_assigned', 'task': {'id': 1, 'title': 'd'}},
+        )
+        self.assertEqual(frame['type'], 'events_batch')
+        self.assertEqual(
+            [(e['action'], e['task']['title']) for e in frame['message']['events']],
+            [('task_updated', 'c'), ('task_created', 'd')],
+        )
+
+    def test_delete_evicts_pending_updates(self):
+        self.assertIsNone(self.frame(
+            {'action': 'task_created', 'task': {'id': 1}},
+            {'action': 'task_deleted', 'task_id': 1},
+        ))
+        frame = self.frame(
+            {'action': 'task_updated', 'task': {'id': 1}},
+            {'action': 'task_moved', 'task_id': 1, 'source_tasks': [], 'target_tasks': [{'id': 1, 'order': 5}]},
+            {'action': 'task_deleted', 'task_id': 1},
+        )
+        self.assertEqual(frame, {'type': 'task_update', 'message': {'action': 'task_deleted', 'task_id': 1}})
+
+    def test_merged_moves_keep_the_first_source_column(self):
+        frame = self.frame(
+            {'action': 'task_moved', 'task_id': 1, 'from_column': 10, 'to_column': 20, 'order': 5,
+             'source_tasks': [], 'target_tasks': [{'id': 1, 'order': 5}]},
+            {'action': 'task_moved', 'task_id': 1, 'from_column': 20, 'to_column': 30, 'order': 7,
+             'source_tasks': [], 'target_tasks': [{'id': 1, 'order': 7}]},
+        )
+        message = frame['message']
+        self.assertEqual((message['from_column'], message['to_column'], message['order']), (10, 30, 7))
+        self.assertEqual(message['target_tasks'], [{'id': 1, 'order': 7}])
+
+    def test_moves_with_rebalanced_neighbours_are_not_merged(self):
+        rebalanced = {'action': 'task_moved', 'task_id': 1, 'source_tasks': [],
+                      'target_tasks': [{'id': 2, 'order': 1}, {'id': 1, 'order': 2}]}
+        plain = {'action': 'task_moved', 'task_id': 1, 'source_tasks': [], 'target_tasks': [{'id': 1, 'order': 3}]}
+        frame = self.frame(rebalanced, plain)
+        self.assertEqual(frame['message']['events'], [rebalanced, plain])
@@ -0,0 +1,111 @@
+# file: task/transitions.py
+"""
+Журнал переходів задач (TaskTransition) для CFD, lead time і cycle time.
+
+Перехід фіксується, коли задача створюється, видаляється, змінює колонку
+або is_complete (API, ProjectConsumer – через сигнали Task; старий стан –
+той самий знімок, що й для rollup-ів task.analytics). У транзакції запису
+нічого не вставляється: після коміту переходи одним RPUSH потрапляють у
+буфер Redis, а flush_task_transitions (Celery beat) переносить їх у БД
+пакетами через bulk_create. Якщо Redis недоступний, пакет пишеться в БД
+одразу після коміту – історія не губиться.
+
+Журнал лише дописується; індекс (project, at) дає звітам range scan за
+датами, (task_id, at) – історію конкретних задач.
+"""
+
+import json
+import logging
+
+import redis
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .events import get_redis
+from .models import Project, TaskTransition
+
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = 'transitions:buffer'
+FLUSH_LOCK_KEY = 'transitions:flush'
+# Скільки переходів переносити з буфера в БД одним INSERT
+FLUSH_BATCH_SIZE = 1000
+
+# Індекси полів у знімку TASK_ROLLUP_FIELDS
+_PROJECT, _COLUMN, _COMPLETE = 0, 1, 3
+
+
+def transition(task_id, old, new, at=None):
+    """
+    Рядок переходу [project, task, from_column, to_column, from_complete, to_complete, at]
+    між знімками задачі old і new (None – задачі ще/вже немає) або None, якщо
+    колонка й статус не змінилися.
+    """
+    if old is None and new is None:
+        return None
+    if old is not None and new is not None and \
+            (old[_COLUMN], old[_COMPLETE]) == (new[_COLUMN], new[_COMPLETE]):
+        return None
+    return [
+        (new or old)[_PROJECT], task_id,
+        old[_COLUMN] if old else None, new[_COLUMN] if new else None,
+        old[_COMPLETE] if old else None, new[_COMPLETE] if new else None,
+        (at or timezone.now()).isoformat(),
+    ]
+
+
+def record(rows):
+    """Ставить переходи в буфер після коміту поточної транзакції (одним RPUSH)."""
+    rows = [row for row in rows if row is not None]
+    if rows:
+        transaction.on_commit(lambda: _push(rows))
+
+
+def _push(rows):
+    try:
+        get_redis().rpush(BUFFER_KEY, *(json.dumps(row) for row in rows))
+    except redis.RedisError:
+        logger.warning('Transition buffer is unavailable, writing %s transitions directly', len(rows), exc_info=True)
+        write(rows)
+
+
+def write(rows):
+    """Вставляє пакет переходів; переходи видалених тим часом проєктів відкидаються."""
+    existing = set(Project.objects.filter(pk__in={row[0] for row in rows}).values_list('pk', flat=True))
+    TaskTransition.objects.bulk_create(
+        (
+            TaskTransition(project_id=project_id, task_id=task_id,
+                           from_column=from_column, to_column=to_column,
+                           from_complete=from_complete, to_complete=to_complete,
+                           at=parse_datetime(at))
+            for project_id, task_id, from_column, to_column, from_complete, to_complete, at in rows
+            if project_id in existing
+        ),
+        batch_size=FLUSH_BATCH_SIZE,
+    )
+
+
+def flush(batch_size=FLUSH_BATCH_SIZE):
+    """
+    Переносить буфер у БД пакетами по batch_size. Пакет видаляється з буфера
+    лише після вставки (LRANGE → INSERT → LTRIM); паралельний flush не стартує
+    завдяки блокуванню в Redis. Повертає кількість перенесених переходів.
+    """
+    client = get_redis()
+    lock = client.lock(FLUSH_LOCK_KEY, timeout=300, blocking=False)
+    if not lock.acquire():
+        return 0
+    flushed = 0
+    try:
+        while True:
+            raw = client.lrange(BUFFER_KEY, 0, batch_size - 1)
+            if not raw:
+                break
+            write([json.loads(item) for item in raw])
+            client.ltrim(BUFFER_KEY, len(raw), -1)
+            flushed += len(raw)
+    finally:
+        lock.release()
+    return flushed
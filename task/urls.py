@@ -1,7 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import TaskViewSet, LabelViewSet, ProjectViewSet, CommentViewSet, RegisterView, ObtainTokenView, \
-    ProjectDetailNestedView, ColumnViewSet, InvitationCreateView, InvitationAcceptView, UserViewSet
+    ProjectDetailNestedView, ColumnViewSet, InvitationCreateView, InvitationAcceptView, UserViewSet, \
+    ProjectBoardView, ColumnTasksView, ProjectAnalyticsView, CumulativeFlowView, CycleTimeView, \
+    ProjectExportView, ProjectImportView, ProjectImportDetailView, MetricsView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -46,6 +48,17 @@ urlpatterns = [
     path('api/tasks/<int:pk>/unassign/', task_unassign_user, name='task-unassign-user'),
 
     path('project/<int:pk>/full/', ProjectDetailNestedView.as_view(), name='project-detail-nested'),
+    path('project/<int:pk>/board/', ProjectBoardView.as_view(), name='project-board'),
+    path('project/<int:pk>/analytics/', ProjectAnalyticsView.as_view(), name='project-analytics'),
+    path('project/<int:pk>/reports/cfd/', CumulativeFlowView.as_view(), name='project-report-cfd'),
+    path('project/<int:pk>/reports/cycle-time/', CycleTimeView.as_view(), name='project-report-cycle-time'),
+    path('project/<int:pk>/export/', ProjectExportView.as_view(), name='project-export'),
+    path('project/<int:pk>/imports/', ProjectImportView.as_view(), name='project-import'),
+    path('project/<int:pk>/imports/<int:import_id>/', ProjectImportDetailView.as_view(), name='project-import-detail'),
+    path('project/<int:pk>/columns/<int:column_id>/tasks/', ColumnTasksView.as_view(), name='project-column-tasks'),
+
+    # без слеша в кінці – стандартний шлях скрейпу Prometheus
+    path('metrics', MetricsView.as_view(), name='metrics'),
 
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -1,28 +1,43 @@
-from django.shortcuts import render
 from rest_framework import viewsets, status, generics
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.core.mail import send_mail
 
 from TaskMaster import settings
-from .models import Task, Label, Project, Comment, Column, Invitation
+from . import analytics, bulk, export, importer, membership, metrics, notifications, reminders, reports, \
+    response_cache, search
+from .events import publish
+from .board import board_queryset, get_board_version, board_etag, get_cached_board, set_cached_board, \
+    build_paged_board, task_cards_queryset
+from .membership import is_member
+from .response_cache import cached_response
+from .models import Task, Label, Project, Comment, Column, Invitation, TaskImport
+from .ordering import next_task_order
+from .pagination import ColumnTaskPagination, TaskCommentPagination, TaskPagination, CommentPagination, \
+    TaskSearchPagination
 from .permissions import IsMemberOfProject
+from .tasks import run_task_import
 from .serializers import TaskSerializer, LabelSerializer, ProjectSerializer, CommentSerializer, UserSerializer, \
     TokenObtainPairSerializer, ColumnSerializer, TaskNestedSerializer, ProjectNestedSerializer, CommentNestedSerializer, \
-    InvitationSerializer
+    InvitationSerializer, TaskCardSerializer, TaskSearchResultSerializer, TaskImportSerializer, ColumnListSerializer, \
+    ProjectListSerializer
 from django.contrib.auth.models import User
 from django_filters.rest_framework import DjangoFilterBackend
 import django_filters
 from rest_framework import filters
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Length
 from django.utils import timezone
-from django.shortcuts import redirect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect, get_object_or_404
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 import datetime
+import io
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
@@ -70,21 +85,60 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         """
         user = self.get_object()
         qs = Task.objects.filter(assigned_to=user)
-        serializer = TaskSerializer(qs, many=True)
-        return Response(serializer.data)
+        # Keyset за (created_at, id) – індекс (assigned_to, created_at, id)
+        paginator = TaskPagination()
+        page = paginator.paginate_queryset(qs, request)
+        serializer = TaskSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
 # Filter for TASK
+class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
+    pass
+
+
 class TaskFilter(django_filters.FilterSet):
+    """
+    ?labels=1,2,3&labels_match=any|all – задачі з будь-якою / з усіма мітками.
+    Фільтри міток – EXISTS по task_task_labels замість JOIN + DISTINCT:
+    жодних дублікатів і пошук за унікальним індексом (task_id, label_id).
+    """
+    MAX_LABELS = 20
+
     is_complete = django_filters.BooleanFilter(field_name='is_complete')
     due_date = django_filters.DateFilter(field_name='due_date', lookup_expr='exact')
     assigned_to = django_filters.NumberFilter(field_name='assigned_to')
-    labels = django_filters.CharFilter(field_name='labels__name', lookup_expr='icontains')
+    labels = NumberInFilter(method='filter_labels')
+    labels_match = django_filters.ChoiceFilter(choices=[('any', 'any'), ('all', 'all')], method='filter_noop')
+    # Пошук за частиною назви мітки: UPPER(name) LIKE – через триграмний індекс за UPPER(Label.name)
+    label_name = django_filters.CharFilter(method='filter_label_name')
     project = django_filters.NumberFilter(field_name='project', lookup_expr='exact')
 
     class Meta:
         model = Task
-        fields = ['is_complete', 'due_date', 'assigned_to', 'labels', 'project']
+        fields = ['is_complete', 'due_date', 'assigned_to', 'labels', 'labels_match', 'label_name', 'project']
+
+    def filter_noop(self, queryset, name, value):
+        return queryset
+
+    def filter_labels(self, queryset, name, value):
+        label_ids = list(dict.fromkeys(int(v) for v in value))
+        if len(label_ids) > self.MAX_LABELS:
+            # обрізання мовчки розширило б вибірку labels_match=all задачами, що не відповідають запиту
+            raise ValidationError({'labels': f'Не більше {self.MAX_LABELS} міток.'})
+        if not label_ids:
+            return queryset
+        task_labels = Task.labels.through.objects.filter(task_id=OuterRef('pk'))
+        if self.form.cleaned_data.get('labels_match') == 'all':
+            for label_id in label_ids:
+                queryset = queryset.filter(Exists(task_labels.filter(label_id=label_id)))
+            return queryset
+        return queryset.filter(Exists(task_labels.filter(label_id__in=label_ids)))
+
+    def filter_label_name(self, queryset, name, value):
+        return queryset.filter(Exists(
+            Task.labels.through.objects.filter(task_id=OuterRef('pk'), label__name__icontains=value)
+        ))
 
 # ViewSets for Task
 class TaskViewSet(viewsets.ModelViewSet):
@@ -95,6 +149,7 @@ class TaskViewSet(viewsets.ModelViewSet):
     filterset_class = TaskFilter
     ordering_fields = ['due_date', 'created_at']
     ordering = ['created_at']
+    pagination_class = TaskPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -110,62 +165,42 @@ class TaskViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         # Перевірка, чи поточний користувач має доступ до проекту
         project = serializer.validated_data.get('project')
-        user = self.request.user
-        if not project.users.filter(id=user.id).exists():
+        if not is_member(self.request, project.pk):
             raise PermissionDenied("У вас немає доступу до цього проєкту.")
-        # Створення задачі
+        # Створення задачі (без явного order – у кінець колонки з розрідженим ключем)
+        if 'order' not in serializer.validated_data:
+            serializer.validated_data['order'] = next_task_order(serializer.validated_data['column'].id)
         task = serializer.save()
         # Надсилання повідомлення про створення задачі через WebSocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{task.project.id}',
-            {
-                'type': 'task_update',
-                'message': {
-                    'action': 'task_created',
-                    'task': TaskNestedSerializer(task).data
-                }
-            }
-        )
+        publish(task.project_id, 'task_update', {
+            'action': 'task_created',
+            'task': TaskNestedSerializer(task).data
+        })
 
     def perform_update(self, serializer):
         # Оновлення задачі
         task = serializer.save()
         # Перевірка доступу (за потреби, якщо get_queryset уже це робить, можна пропустити)
-        if not task.project.users.filter(id=self.request.user.id).exists():
+        if not is_member(self.request, task.project_id):
             raise PermissionDenied("У вас немає доступу до цього проєкту.")
         # Надсилання повідомлення про оновлення задачі
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{task.project.id}',
-            {
-                'type': 'task_update',
-                'message': {
-                    'action': 'task_updated',
-                    'task': TaskNestedSerializer(task).data
-                }
-            }
-        )
+        publish(task.project_id, 'task_update', {
+            'action': 'task_updated',
+            'task': TaskNestedSerializer(task).data
+        })
 
     def perform_destroy(self, instance):
         # Перевірка доступу перед видаленням
-        if not instance.project.users.filter(id=self.request.user.id).exists():
+        if not is_member(self.request, instance.project_id):
             raise PermissionDenied("У вас немає доступу до цього проєкту.")
-        project_id = instance.project.id
+        project_id = instance.project_id
         task_id = instance.id
         instance.delete()
         # Надсилання повідомлення про видалення задачі
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{project_id}',
-            {
-                'type': 'task_update',
-                'message': {
-                    'action': 'task_deleted',
-                    'task_id': task_id,
-                }
-            }
-        )
+        publish(project_id, 'task_update', {
+            'action': 'task_deleted',
+            'task_id': task_id,
+        })
 
     @action(detail=True, methods=['patch'], url_path='set-deadline')
     def set_deadline(self, request, pk=None):
@@ -191,24 +226,72 @@ class TaskViewSet(viewsets.ModelViewSet):
             return Response({"error": "Due date must be in the future."}, status=status.HTTP_400_BAD_REQUEST)
         task.due_date = new_deadline
         task.save()
+        # Нагадування для нового дедлайну (старий просто перестане збігатися)
+        reminders.replan(task)
 
         # Надсилання push-сповіщення через WebSocket про зміну дедлайну
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{task.project.id}',
-            {
-                'type': 'task_update',
-                'message': {
-                    'action': 'deadline_updated',
-                    'task': TaskNestedSerializer(task).data,
-                }
-            }
-        )
+        publish(task.project_id, 'task_update', {
+            'action': 'deadline_updated',
+            'task': TaskNestedSerializer(task).data,
+        })
         return Response(
             {"message": "Deadline updated successfully.", "due_date": task.due_date},
             status=status.HTTP_200_OK
         )
 
+    @action(detail=True, methods=['get'], url_path='comments')
+    def comments(self, request, pk=None):
+        """
+        Коментарі однієї задачі на вимогу (для посторінкової дошки).
+        URL: GET /api/tasks/<task_id>/comments/?cursor=...
+        """
+        task = self.get_object()
+        paginator = TaskCommentPagination()
+        page = paginator.paginate_queryset(task.comments.select_related('user'), request, view=self)
+        return paginator.get_paginated_response(CommentNestedSerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], url_path='search')
+    def search(self, request):
+        """
+        Повнотекстовий пошук задач (назва, опис, коментарі) у проєктах користувача.
+        Кожне слово запиту – префікс; результати за спаданням релевантності.
+        URL: GET /api/tasks/search/?q=<текст>[&project=<id>][&cursor=...]
+        """
+        query = search.prefix_query(request.query_params.get('q', ''))
+        if query is None:
+            return Response({"error": "Query parameter 'q' is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        project_ids = membership.project_ids(request)
+        project_id = request.query_params.get('project')
+        if project_id:
+            if not project_id.isdigit() or not is_member(request, project_id):
+                raise PermissionDenied("У вас немає доступу до цього проєкту.")
+            project_ids = [int(project_id)]
+
+        queryset = search.search_tasks(query, project_ids).prefetch_related('labels')
+        paginator = TaskSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(TaskSearchResultSerializer(page, many=True).data)
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """
+        Пакет операцій над задачами в одній транзакції. URL: POST /api/tasks/bulk/
+        {
+            "create": [{"title": ..., "description": ..., "project": <id>, "column": <id>, ...}],
+            "update": [{"id": <task_id>, "title": ..., "labels": [<id>, ...], ...}],
+            "move":   [{"id": <task_id>, "column": <id>}]
+        }
+        Створені й переміщені задачі стають у кінець колонки. Кожен проєкт
+        отримує одну подію tasks_bulk_changed (див. task.bulk).
+        """
+        serializer = bulk.BulkTaskSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = bulk.apply(request, serializer.validated_data)
+        response, events = bulk.payloads(result)
+        for project_id, message in events.items():
+            publish(project_id, 'task_update', message)
+        return Response(response, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['patch'], url_path='assign')
     def assign_user(self, request, pk=None):
@@ -228,61 +311,20 @@ class TaskViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({"error": "User not found."}, status=status.HTTP_404_NOT_FOUND)
         # Перевірка: користувач повинен бути учасником цього проекту
-        if not task.project.users.filter(pk=user_to_assign.pk).exists():
+        if not is_member(request, task.project_id, user=user_to_assign):
             return Response({"error": "User does not belong to the project."}, status=status.HTTP_400_BAD_REQUEST)
 
         task.assigned_to = user_to_assign
         task.save()
 
         # Надсилання push-оновлення через WebSocket (якщо потрібно)
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{task.project.id}',
-            {
-                'type': 'task_update',
-                'message': {
-                    'action': 'user_assigned',
-                    'task': TaskNestedSerializer(task).data,
-                }
-            }
-        )
+        publish(task.project_id, 'task_update', {
+            'action': 'user_assigned',
+            'task': TaskNestedSerializer(task).data,
+        })
 
-        if user_to_assign.email:
-            subject = f"🎉 Ви призначені на задачу «{task.title}»"
-            text_message = (
-                f"Привіт, {user_to_assign.username}!\n\n"
-                f"Вас щойно призначили на задачу «{task.title}» у проекті «{task.project.name}».\n"
-                f"Подивіться всі деталі тут:\n"
-                f"{request.scheme}://{request.get_host()}/project/{task.project.id}/full/\n\n"
-                "Успіхів у виконанні! 🚀"
-            )
-            html_message = f"""
-                        <html>
-                          <body style="font-family: sans-serif; line-height:1.5;">
-                            <h2 style="color:#2F4F4F;">Привіт, {user_to_assign.username}!</h2>
-                            <p>🎉 <strong>Вас призначили</strong> на задачу 
-                               <em>«{task.title}»</em> у проекті 
-                               <strong>«{task.project.name}»</strong>.</p>
-                            <p>Деталі задачі можна побачити за посиланням:</p>
-                            <p>
-                              <a href="{request.scheme}://{request.get_host()}/project/{task.project.id}/full/"
-                                 style="color:#1E90FF; text-decoration:none;">
-                                Перейти до проекту
-                              </a>
-                            </p>
-                            <hr>
-                            <p>Бажаємо продуктивної роботи!</p>
-                          </body>
-                        </html>
-                    """
-            send_mail(
-                subject,
-                text_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user_to_assign.email],
-                html_message=html_message,
-                fail_silently=True,
-            )
+        # Лист – у фоні після коміту, не затримуючи відповідь
+        notifications.queue_emails(notifications.task_assigned(task, user_to_assign, notifications.board_url(request, task.project)))
         return Response({"message": "User assigned to task successfully."})
 
     @action(detail=True, methods=['delete'], url_path='unassign')
@@ -295,7 +337,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         task = self.get_object()
 
         # 1. Перевірка доступу
-        if not task.project.users.filter(id=request.user.id).exists():
+        if not is_member(request, task.project_id):
             raise PermissionDenied("У вас немає доступу до цього проєкту.")
 
         # 2. Зберігаємо, кому були призначені раніше
@@ -306,59 +348,59 @@ class TaskViewSet(viewsets.ModelViewSet):
         task.save()
 
         # 4. Push-оновлення через WebSocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{task.project.id}',
-            {
-                'type': 'task_update',
-                'message': {
-                    'action': 'task_unassigned',
-                    'task': TaskNestedSerializer(task).data
-                }
-            }
-        )
-
-        # 5. Email-сповіщення колишньому виконавцю
-        if user_to_notify and user_to_notify.email:
-            subject = f"❌ Вас зняли із задачі «{task.title}»"
-            text_message = (
-                f"Привіт, {user_to_notify.username}!\n\n"
-                f"Вас щойно зняли з задачі «{task.title}» у проекті «{task.project.name}».\n\n"
-                "Якщо це помилка — зверніться до менеджера проекту."
-            )
-            html_message = f"""
-                        <html>
-                          <body style="font-family: sans-serif; line-height:1.5;">
-                            <h2 style="color:#2F4F4F;">Привіт, {user_to_notify.username}!</h2>
-                            <p>❌ Вас зняли з задачі 
-                               <strong>«{task.title}»</strong> у проекті 
-                               <em>«{task.project.name}»</em>.</p>
-                            <p>Якщо ви вважаєте це помилкою — <a href="mailto:{settings.DEFAULT_FROM_EMAIL}"
-                               style="color:#1E90FF;">напишіть нам</a>.</p>
-                            <hr>
-                            <p>Дякуємо, що ви з нами!</p>
-                          </body>
-                        </html>
-                    """
-            send_mail(
-                subject,
-                text_message,
-                settings.DEFAULT_FROM_EMAIL,
-                [user_to_notify.email],
-                html_message=html_message,
-                fail_silently=True,
-            )
+        publish(task.project_id, 'task_update', {
+            'action': 'task_unassigned',
+            'task': TaskNestedSerializer(task).data
+        })
+
+        # 5. Email-сповіщення колишньому виконавцю (у фоні, після коміту)
+        if user_to_notify:
+            notifications.queue_emails(notifications.task_unassigned(task, user_to_notify))
         return Response({"message": "User unassigned from task."})
 
 # ViewSets for Label
 class LabelViewSet(viewsets.ModelViewSet):
+    AUTOCOMPLETE_LIMIT = 10
     queryset = Label.objects.all()
     serializer_class = LabelSerializer
     permission_classes = [IsMemberOfProject]
 
     def get_queryset(self):
-        return Label.objects.filter(tasks__project__users=self.request.user).distinct()
-        #return Label.objects.all()
+        # Мітки проєктів користувача (?project= – одного проєкту): range scan за індексом (project, name)
+        labels = Label.objects.filter(project_id__in=membership.project_ids(self.request))
+        project_id = self.request.query_params.get('project')
+        if project_id:
+            labels = labels.filter(project_id=project_id)
+        return labels.order_by('project', 'name')
+
+    def perform_create(self, serializer):
+        if not is_member(self.request, serializer.validated_data['project'].pk):
+            raise PermissionDenied("Ви не маєте доступу до цього проєкту.")
+        serializer.save()
+
+    @cached_response('labels', lambda view, request: [
+        response_cache.labels_tag(project_id) for project_id in membership.project_ids(request)
+    ])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'], url_path='autocomplete')
+    def autocomplete(self, request):
+        """
+        Підказки назв міток, що містять введений текст (icontains – UPPER(name) LIKE '%Q%',
+        через триграмний індекс за UPPER(name)): спершу ті, що з нього починаються, далі – коротші.
+        URL: GET /api/labels/autocomplete/?q=<частина назви>
+        """
+        q = request.query_params.get('q', '').strip()
+        if not q:
+            return Response([])
+        labels = (
+            self.get_queryset()
+                .filter(name__icontains=q)
+                .annotate(prefix=Q(name__istartswith=q), length=Length('name'))
+                .order_by('-prefix', 'length', 'name')[:self.AUTOCOMPLETE_LIMIT]
+        )
+        return Response(LabelSerializer(labels, many=True).data)
 
 # ViewSets for Project
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -369,6 +411,18 @@ class ProjectViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Project.objects.filter(users=self.request.user)
 
+    def get_serializer_class(self):
+        return ProjectListSerializer if self.action == 'list' else ProjectSerializer
+
+    # users – лише id учасників, тож зміни самих користувачів (USERS_TAG) списку не зачіпають
+    @cached_response('projects', lambda view, request: [
+        tag
+        for project_id in membership.project_ids(request)
+        for tag in (response_cache.project_tag(project_id), response_cache.members_tag(project_id))
+    ])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         project = serializer.save()
         project.users.add(self.request.user)
@@ -387,25 +441,14 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return Response({"error": "User not found."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        if project.users.filter(pk=user_to_add.pk).exists():
+        if is_member(request, project.pk, user=user_to_add):
             return Response({"message": f"User {user_to_add.username} is already added."},
                             status=status.HTTP_200_OK)
 
         project.users.add(user_to_add)
 
-        # — надсилаємо пошту про додавання —
-        accept_url = f"{request.scheme}://{request.get_host()}/project/{project.id}/full/"
-        send_mail(
-            subject=f"Вас додано до проєкту «{project.name}»",
-            message=(
-                f"Привіт, {user_to_add.username}!\n\n"
-                f"Вас щойно додали до проєкту «{project.name}».\n"
-                f"Переглянути можна за посиланням:\n{accept_url}"
-            ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_to_add.email],
-            fail_silently=False,
-        )
+        # — надсилаємо пошту про додавання (у фоні, після коміту) —
+        notifications.queue_emails(notifications.project_member_added(project, user_to_add, notifications.board_url(request, project)))
 
         return Response(
             {"message": f"User {user_to_add.username} added and notified by email."},
@@ -427,18 +470,8 @@ class ProjectViewSet(viewsets.ModelViewSet):
             task.assigned_to = None
             task.save()
 
-        # — надсилаємо пошту про видалення —
-        send_mail(
-            subject=f"Вас видалено з проєкту «{project.name}»",
-            message=(
-                f"Привіт, {user_to_remove.username}!\n\n"
-                f"Вас щойно видалили з проєкту «{project.name}».\n"
-                "Якщо це сталося помилково, зверніться до власника проєкту."
-            ),
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user_to_remove.email],
-            fail_silently=False,
-        )
+        # — надсилаємо пошту про видалення (у фоні, після коміту) —
+        notifications.queue_emails(notifications.project_member_removed(project, user_to_remove))
 
         return Response(
             {"message": f"User {user_to_remove.username} removed and notified by email."},
@@ -458,17 +491,10 @@ class ProjectViewSet(viewsets.ModelViewSet):
         project.save()
 
         # пуш-оновлення через WebSocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{project.id}',
-            {
-                'type': 'project_update',
-                'message': {
-                    'action': 'project_updated',
-                    'project': ProjectSerializer(project).data
-                }
-            }
-        )
+        publish(project.id, 'project_update', {
+            'action': 'project_updated',
+            'project': ProjectSerializer(project).data
+        })
 
         return Response({
             "message": "Project updated successfully.",
@@ -476,6 +502,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'], url_path='users', permission_classes=[IsAuthenticated])
+    @cached_response('project-users', lambda view, request, pk: [response_cache.members_tag(pk), response_cache.USERS_TAG])
     def list_users(self, request, pk=None):
         project = self.get_object()
         users = project.users.all()
@@ -488,62 +515,43 @@ class CommentViewSet(viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsMemberOfProject]
+    pagination_class = CommentPagination
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Comment.objects.none()
-        return Comment.objects.filter(task__project__users=self.request.user)
+        # task – для перевірки членства в IsMemberOfProject без окремого запиту
+        return Comment.objects.filter(task__project__users=self.request.user).select_related('task')
 
     def perform_create(self, serializer):
         # Перевірка доступу: переконайтеся, що поточний користувач має доступ до задачі, до якої додається коментар
         task = serializer.validated_data.get('task')
-        if not task.project.users.filter(id=self.request.user.id).exists():
+        if not is_member(self.request, task.project_id):
             raise PermissionDenied("Ви не маєте доступу до цього проєкту.")
         # Автоматично додамо користувача як автора коментаря
         comment = serializer.save(user=self.request.user)
 
         # Надсилання повідомлення через WebSocket
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{comment.task.project.id}',  # група для проекту
-            {
-                'type': 'comment_update',
-                'message': {
-                    'action': 'comment_created',
-                    'comment': CommentNestedSerializer(comment).data,
-                }
-            }
-        )
+        publish(comment.task.project_id, 'comment_update', {
+            'action': 'comment_created',
+            'comment': CommentNestedSerializer(comment).data,
+        })
 
     def perform_update(self, serializer):
         comment = serializer.save()
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{comment.task.project.id}',
-            {
-                'type': 'comment_update',
-                'message': {
-                    'action': 'comment_updated',
-                    'comment': CommentNestedSerializer(comment).data,
-                }
-            }
-        )
+        publish(comment.task.project_id, 'comment_update', {
+            'action': 'comment_updated',
+            'comment': CommentNestedSerializer(comment).data,
+        })
 
     def perform_destroy(self, instance):
-        project_id = instance.task.project.id
+        project_id = instance.task.project_id
         comment_id = instance.id
         instance.delete()
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f'project_{project_id}',
-            {
-                'type': 'comment_update',
-                'message': {
-                    'action': 'comment_deleted',
-                    'comment_id': comment_id,
-                }
-            }
-        )
+        publish(project_id, 'comment_update', {
+            'action': 'comment_deleted',
+            'comment_id': comment_id,
+        })
 
 
 class ColumnViewSet(viewsets.ModelViewSet):
@@ -558,12 +566,263 @@ class ColumnViewSet(viewsets.ModelViewSet):
             return Column.objects.filter(project_id=project_id).order_by('order')
         return super().get_queryset()
 
+    def get_serializer_class(self):
+        return ColumnListSerializer if self.action == 'list' else ColumnSerializer
+
+    @cached_response('columns', lambda view, request: [
+        response_cache.columns_tag(request.query_params['project'])
+        if request.query_params.get('project') else response_cache.COLUMNS_TAG
+    ])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
-class ProjectDetailNestedView(generics.RetrieveAPIView):
+def check_project_member(request, project_id):
+    """Як IsMemberOfProject для проєкту з URL, але без завантаження самого проєкту."""
+    if not (request.user.is_staff or is_member(request, project_id)):
+        raise PermissionDenied("Ви не маєте доступу до цього проєкту.")
+
+
+class BoardSnapshotMixin:
+    """
+    Віддає знімок дошки з кешу (Redis) під поточною версією проєкту.
+    Версія змінюється при будь-якому записі в Task/Column/Comment/Project,
+    тому If-None-Match з актуальним ETag отримує 304 без звернення до БД.
+    Нащадок визначає build_board_payload() і, за потреби, get_board_variant().
+    Членство перевіряється за кешем task.membership – теж без запитів до БД.
+    """
+
+    def get_board_variant(self):
+        return 'full'
+
+    def build_board_payload(self):
+        raise NotImplementedError
+
+    def board_response(self, project_id):
+        check_project_member(self.request, project_id)
+        variant = self.get_board_variant()
+        version = get_board_version(project_id)
+        etag = board_etag(project_id, version, variant)
+
+        if_none_match = parse_etags(self.request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            payload = get_cached_board(project_id, version, variant)
+            if payload is None:
+                payload = self.build_board_payload()
+                set_cached_board(project_id, version, payload, variant)
+            response = Response(payload)
+
+        response['ETag'] = etag
+        # Клієнт може зберігати відповідь, але щоразу має перепитувати сервер з If-None-Match
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ProjectDetailNestedView(BoardSnapshotMixin, generics.RetrieveAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectNestedSerializer
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        # Уся дошка (колонки → задачі → мітки/коментарі) за фіксовану кількість запитів
+        return board_queryset()
+
+    def build_board_payload(self):
+        return self.get_serializer(self.get_object()).data
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.board_response(kwargs['pk'])
+
+
+class ProjectBoardView(BoardSnapshotMixin, APIView):
+    """
+    GET /project/<pk>/board/?tasks_per_column=20
+    Посторінкова дошка: у кожній колонці лише перші N задач + next_cursor,
+    коментарі замінено на comment_count. Решта підвантажується на вимогу:
+      - GET /project/<pk>/columns/<column_id>/tasks/?cursor=<next_cursor>
+      - GET /api/tasks/<task_id>/comments/
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_tasks_per_column(self):
+        try:
+            per_column = int(self.request.query_params.get('tasks_per_column', settings.BOARD_TASKS_PER_COLUMN))
+        except ValueError:
+            per_column = settings.BOARD_TASKS_PER_COLUMN
+        return max(1, min(per_column, ColumnTaskPagination.max_page_size))
+
+    def get_board_variant(self):
+        return f'paged-{self.get_tasks_per_column()}'
+
+    def build_board_payload(self):
+        project = get_object_or_404(Project, pk=self.kwargs['pk'])
+        return build_paged_board(project, self.get_tasks_per_column())
+
+    def get(self, request, pk):
+        return self.board_response(pk)
+
+
+class ColumnTasksView(generics.ListAPIView):
+    """
+    GET /project/<pk>/columns/<column_id>/tasks/?cursor=...&page_size=...
+    Наступна сторінка задач однієї колонки (keyset за (order, id)).
+    """
+    serializer_class = TaskCardSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ColumnTaskPagination
+
+    def get_queryset(self):
+        return task_cards_queryset().filter(project_id=self.kwargs['pk'], column_id=self.kwargs['column_id'])
+
+    def list(self, request, *args, **kwargs):
+        check_project_member(request, kwargs['pk'])
+        get_object_or_404(Column.objects.only('pk'), pk=kwargs['column_id'], project_id=kwargs['pk'])
+        return super().list(request, *args, **kwargs)
+
+
+class ProjectAnalyticsView(APIView):
+    """
+    GET /project/<pk>/analytics/
+    Відкриті/завершені/прострочені задачі, сума estimated_time і time_spent –
+    для проєкту, кожної колонки та кожного виконавця. Читається з rollup-ів
+    (task.analytics), а не скануванням задач проєкту.
+    """
+    permission_classes = [IsMemberOfProject]
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        self.check_object_permissions(request, project)
+        return Response(analytics.project_stats(project))
+
+
+class ProjectReportView(APIView):
+    """
+    Базовий звіт за журналом переходів: ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    (включно, за замовчуванням – останні 30 днів, не довше MAX_DAYS).
+    Нащадок визначає build_report(project, start, end).
+    """
+    permission_classes = [IsMemberOfProject]
+    MAX_DAYS = 366
+
+    def get_date_range(self):
+        default_start, default_end = reports.default_range()
+        try:
+            start = datetime.date.fromisoformat(self.request.query_params.get('start', default_start.isoformat()))
+            end = datetime.date.fromisoformat(self.request.query_params.get('end', default_end.isoformat()))
+        except ValueError:
+            raise ValidationError({'detail': 'start та end мають бути датами у форматі YYYY-MM-DD.'})
+        if start > end:
+            raise ValidationError({'detail': 'start не може бути пізніше за end.'})
+        if (end - start).days >= self.MAX_DAYS:
+            raise ValidationError({'detail': f'Діапазон не може перевищувати {self.MAX_DAYS} днів.'})
+        return start, end
+
+    def build_report(self, project, start, end):
+        raise NotImplementedError
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        self.check_object_permissions(request, project)
+        return Response(self.build_report(project, *self.get_date_range()))
+
+
+class CumulativeFlowView(ProjectReportView):
+    """GET /project/<pk>/reports/cfd/ – кількість задач у колонках на кінець кожного дня."""
+
+    def build_report(self, project, start, end):
+        return reports.cumulative_flow(project, start, end)
+
+
+class CycleTimeView(ProjectReportView):
+    """GET /project/<pk>/reports/cycle-time/ – персентилі lead/cycle time завершених задач."""
+
+    def build_report(self, project, start, end):
+        return reports.cycle_time(project, start, end)
+
+
+class ProjectExportView(APIView):
+    """
+    GET /project/<pk>/export/?format=csv|ndjson[&since=<ISO datetime>][&comments=1]
+    Потоковий експорт задач проєкту (колонка, мітки, виконавець, час, за бажанням –
+    коментарі). Формат – також через Accept: text/csv / application/x-ndjson.
+    Для нічної синхронізації: since = X-Export-Next-Since з попереднього експорту.
+    """
+    permission_classes = [IsMemberOfProject]
+    renderer_classes = [export.CSVRenderer, export.NDJSONRenderer]
+
+    def get(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        self.check_object_permissions(request, project)
+        since = request.query_params.get('since')
+        if since is not None:
+            since = export.parse_since(since)
+            if since is None:
+                raise ValidationError({'detail': 'since має бути датою й часом у форматі ISO 8601.'})
+        comments = request.query_params.get('comments') in ('1', 'true')
+        output = request.accepted_renderer.format
+        started = timezone.now()
+
+        # під ASGI синхронний ітератор Django зібрав би в пам'ять цілком
+        stream = export.astream if isinstance(request._request, ASGIRequest) else export.stream
+        response = StreamingHttpResponse(
+            stream(project, output, since, comments),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="project-{project.pk}-tasks.{output}"'
+        response['X-Export-Next-Since'] = export.next_since(started).isoformat()
+        return response
+
+
+class ProjectImportView(APIView):
+    """
+    POST /project/<pk>/imports/ (multipart: file, format=csv|ndjson)
+    Завантажує файл у staging-таблицю (COPY) і ставить перенесення в задачі
+    в чергу Celery (run_task_import); відповідь 202 з TaskImport – прогрес
+    далі через GET /project/<pk>/imports/<id>/.
+    """
+    permission_classes = [IsMemberOfProject]
+
+    def post(self, request, pk):
+        project = get_object_or_404(Project, pk=pk)
+        self.check_object_permissions(request, project)
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Файл обов\'язковий.'})
+        fmt = request.data.get('format') or ('ndjson' if upload.name.endswith(('.ndjson', '.jsonl')) else 'csv')
+        if fmt not in dict(TaskImport.FORMAT_CHOICES):
+            raise ValidationError({'format': 'Очікується csv або ndjson.'})
+
+        with transaction.atomic():
+            task_import = importer.load(project, io.TextIOWrapper(upload.file, encoding='utf-8-sig'), fmt, request.user,
+                                        members_only=True)
+            transaction.on_commit(lambda: run_task_import.delay(task_import.pk))
+        return Response(TaskImportSerializer(task_import).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ProjectImportDetailView(APIView):
+    """
+    GET /project/<pk>/imports/<import_id>/ – прогрес імпорту.
+    POST /project/<pk>/imports/<import_id>/ – продовжити перерваний (failed) імпорт.
+    """
+    permission_classes = [IsMemberOfProject]
+
+    def get_import(self, request, pk, import_id):
+        project = get_object_or_404(Project, pk=pk)
+        self.check_object_permissions(request, project)
+        return get_object_or_404(TaskImport, pk=import_id, project=project)
+
+    def get(self, request, pk, import_id):
+        return Response(TaskImportSerializer(self.get_import(request, pk, import_id)).data)
+
+    def post(self, request, pk, import_id):
+        task_import = self.get_import(request, pk, import_id)
+        if task_import.status == TaskImport.DONE:
+            raise ValidationError({'detail': 'Імпорт уже завершено.'})
+        run_task_import.delay(task_import.pk)
+        return Response(TaskImportSerializer(task_import).data, status=status.HTTP_202_ACCEPTED)
+
 
 class InvitationCreateView(generics.CreateAPIView):
     serializer_class = InvitationSerializer
@@ -582,13 +841,7 @@ class InvitationCreateView(generics.CreateAPIView):
             invitation = serializer.save()
             # Формуємо URL для прийняття запрошення
             accept_url = f"{request.scheme}://{request.get_host()}/invitations/accept/?token={invitation.token}"
-            send_mail(
-                subject=f"Запрошення до проекту {project.name}",
-                message=f"Вас запрошують приєднатися до проекту {project.name}.\n Прийміть запрошення за посиланням: {accept_url}.",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[invitation.email],
-                fail_silently=False,
-            )
+            notifications.queue_emails(notifications.project_invitation(project, invitation, accept_url))
             return Response({
                 "message": "Invitation created and email sent successfully.",
                 "token": invitation.token
@@ -613,10 +866,25 @@ class InvitationAcceptView(APIView):
 
         if request.user.is_authenticated:
             project = invitation.project
-            project.users.add(request.user)
+            project.users.add(request.user)  # кеш членства скидає m2m_changed
             invitation.accepted = True
             invitation.save()
+            membership.forget(request)
             return Response({"message": "You have been added to the project."}, status=200)
         else:
             login_url = f"/login/?next=/invitations/accept/?token={token}"
-            return redirect(login_url)
\ No newline at end of file
+            return redirect(login_url)
+
+
+class MetricsView(APIView):
+    """
+    GET /metrics – метрики процесу в текстовому форматі Prometheus (task.metrics).
+    Без JWT: скрейпер автентифікується Bearer-токеном METRICS_TOKEN, якщо його задано.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        if not metrics.scrape_allowed(request):
+            raise PermissionDenied('Невірний токен метрик.')
+        return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)